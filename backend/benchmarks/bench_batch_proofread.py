@@ -0,0 +1,102 @@
+"""
+批量审校基准：逐篇调用 /api/proofread 与一次调用 /api/proofread/batch 的总耗时与吞吐
+
+模拟发布流水线的短文章（默认 300 篇、每篇约 600 字），关闭结果缓存。
+--llm-latency-ms 大于 0 时用固定延迟模拟千问调用（不访问网络），观察批内并发对大模型等待的摊薄。
+用法（在 backend 目录下）：
+    python benchmarks/bench_batch_proofread.py [--docs 300] [--chars 600] [--llm-latency-ms 0] [--concurrency 8]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import app
+from src.services.proofreading_engine import proofreading_engine
+
+SENTENCES = [
+    '今天天气很好,我们去散不吧。', '公园里的花都盛升了，胡蝶在花丛中飞舞。', '他认真的完成了作业。',
+    '会议纪要：项目进度正常，系统测试因该在下周完成！', '“这是一个测试（文档。', '本文不含暴力内容。', '\n',
+]
+
+
+def make_docs(count, chars, seed):
+    rng = random.Random(seed)
+    docs = []
+    for i in range(count):
+        parts = [f'第{i}篇。']
+        size = len(parts[0])
+        while size < chars:
+            sentence = rng.choice(SENTENCES)
+            parts.append(sentence)
+            size += len(sentence)
+        docs.append(''.join(parts))
+    return docs
+
+
+def simulate_llm(latency):
+    """以固定延迟替代千问调用（保留并发行为，不访问网络）"""
+    qwen = proofreading_engine.qwen_proofreader
+    qwen.api_key = qwen.api_key or 'bench'
+
+    def fake_proofread(content):
+        time.sleep(latency)
+        return {'issues': []}
+
+    qwen.proofread = fake_proofread
+    proofreading_engine._explain_sensitive = lambda content, issues: None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=300)
+    parser.add_argument('--chars', type=int, default=600)
+    parser.add_argument('--llm-latency-ms', type=float, default=0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    qwen_on = args.llm_latency_ms > 0
+    if qwen_on:
+        simulate_llm(args.llm_latency_ms / 1000.0)
+    proofreading_engine.batch_workers = max(proofreading_engine.batch_workers, args.concurrency)
+    options = {'qwen': qwen_on, 'use_cache': False}
+    docs = make_docs(args.docs, args.chars, 42)
+    client = app.test_client()
+    proofreading_engine.ensure_loaded()
+    # 静默引擎的逐篇日志，避免输出本身成为瓶颈
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        t0 = time.perf_counter()
+        single_issues = 0
+        for content in docs:
+            resp = client.post('/api/proofread', json={'content': content, 'options': options})
+            single_issues += len(resp.get_json()['data']['issues'])
+        t_single = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        resp = client.post('/api/proofread/batch', json={
+            'documents': [{'id': str(i), 'content': content} for i, content in enumerate(docs)],
+            'options': options,
+            'max_concurrency': args.concurrency,
+        })
+        results = resp.get_json()['data']['results']
+        t_batch = time.perf_counter() - t0
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    batch_issues = sum(len(r['data']['issues']) for r in results)
+    print(f"documents: {len(docs)} x ~{args.chars} chars, simulated LLM latency: {args.llm_latency_ms:.0f} ms, "
+          f"concurrency: {args.concurrency}")
+    print(f"{'per-document':<14} {t_single:8.2f} s  {len(docs) / t_single:8.1f} docs/s  "
+          f"{t_single / len(docs) * 1000:7.2f} ms/doc  issues {single_issues}")
+    print(f"{'batch':<14} {t_batch:8.2f} s  {len(docs) / t_batch:8.1f} docs/s  "
+          f"{t_batch / len(docs) * 1000:7.2f} ms/doc  issues {batch_issues}")
+
+
+if __name__ == '__main__':
+    main()
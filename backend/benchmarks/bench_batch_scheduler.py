@@ -0,0 +1,81 @@
+"""
+微批调度基准：并发请求下逐句调用模型 vs 跨请求合批
+
+模型以“每次调用固定开销 + 每句开销”模拟（批量接口摊薄固定开销，真实模型同理）。
+用法（在 backend 目录下）：
+    python benchmarks/bench_batch_scheduler.py [--requests 16] [--sentences 20] [--wait-ms 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.batch_scheduler import MicroBatcher
+
+
+class FakeModel:
+    def __init__(self, call_overhead, per_item):
+        self.call_overhead = call_overhead
+        self.per_item = per_item
+        self.calls = 0
+        # 模型推理串行执行
+        self._lock = threading.Lock()
+
+    def correct_batch(self, sentences):
+        with self._lock:
+            self.calls += 1
+            time.sleep(self.call_overhead + self.per_item * len(sentences))
+        return [(s, []) for s in sentences]
+
+
+def run(n_requests, n_sentences, submit):
+    latencies = []
+    lock = threading.Lock()
+
+    def request(n):
+        sentences = [f'请求{n}第{i}句。' for i in range(n_sentences)]
+        t0 = time.perf_counter()
+        submit(sentences)
+        with lock:
+            latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=request, args=(n,)) for n in range(n_requests)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1 if len(latencies) > 1 else 0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=16)
+    parser.add_argument('--sentences', type=int, default=20)
+    parser.add_argument('--batch', type=int, default=32)
+    parser.add_argument('--wait-ms', type=float, default=5)
+    parser.add_argument('--call-overhead-ms', type=float, default=2.0)
+    parser.add_argument('--per-item-ms', type=float, default=0.2)
+    args = parser.parse_args()
+    total = args.requests * args.sentences
+
+    serial = FakeModel(args.call_overhead_ms / 1000, args.per_item_ms / 1000)
+    elapsed, p50, p99 = run(args.requests, args.sentences,
+                            lambda sentences: [serial.correct_batch([s])[0] for s in sentences])
+    print(f"per-sentence  {total / elapsed:8.0f} sentences/s  p50 {p50 * 1000:7.1f}ms  p99 {p99 * 1000:7.1f}ms  model calls {serial.calls}")
+
+    batched = FakeModel(args.call_overhead_ms / 1000, args.per_item_ms / 1000)
+    batcher = MicroBatcher(batched.correct_batch, max_batch_size=args.batch, max_wait_ms=args.wait_ms)
+    elapsed, p50, p99 = run(args.requests, args.sentences, batcher.submit)
+    stats = batcher.stats()
+    print(f"micro-batched {total / elapsed:8.0f} sentences/s  p50 {p50 * 1000:7.1f}ms  p99 {p99 * 1000:7.1f}ms  model calls {batched.calls}  avg batch {stats['avg_batch_size']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+问题表示内存基准：紧凑 Issue 对象 vs 原 JSON 结构字典（默认 10 万字输入）
+
+1) 表示层：同一批规则问题分别以 Issue 与原字典结构（嵌套 position、suggestions 列表、uuid ID）驻留，
+   对比占用字节与内存块数；
+2) 端到端：整篇审校（仅规则）过程中的峰值内存与结束时驻留的内存块数。
+用法（在 backend 目录下）：
+    python benchmarks/bench_issue_memory.py [--chars 100000]
+"""
+
+import os
+import sys
+import gc
+import time
+import uuid
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.proofreading_engine import ProofreadingEngine
+
+WORDS = ['我们', '去', '散不', '吧', ',', '。', '胡蝶', '暴力', '的', '地', '得', '在', '象', '（', '）',
+         '“', '\n', '三个个', '被被', '.', ':', '!', '今天', '天气', '很好', '会议', '进度']
+
+
+def make_text(chars, seed):
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < chars:
+        word = rng.choice(WORDS)
+        parts.append(word)
+        size += len(word)
+    return ''.join(parts)[:chars]
+
+
+def legacy_dict(issue):
+    """原实现中每个问题的字典结构（含 uuid 字符串 ID）"""
+    result = issue.to_dict()
+    result['id'] = str(uuid.uuid4())
+    return result
+
+
+def measure(build):
+    """返回 (结果, 驻留字节, 驻留内存块数, 峰值字节)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    return result, current, blocks, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chars', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    content = make_text(args.chars, args.seed)
+    engine = ProofreadingEngine()
+    engine.ensure_loaded()
+    options = engine._normalize_options({'qwen': False, 'rules_mode': 'full', 'use_cache': False})
+
+    typo, punct, sensitive = engine._run_rules(content, options, 'full')
+    issues = typo + punct + sensitive
+    print(f"content: {len(content)} chars, rule issues: {len(issues)}")
+
+    _, dict_bytes, dict_blocks, _ = measure(lambda: [legacy_dict(it) for it in issues])
+    _, slot_bytes, slot_blocks, _ = measure(lambda: [it.shifted(0) for it in issues])
+    print(f"{'dict issues':<16} {dict_bytes / 1024:9.1f} KiB  {dict_blocks:8d} blocks  ({dict_bytes / len(issues):.0f} B/issue)")
+    print(f"{'Issue objects':<16} {slot_bytes / 1024:9.1f} KiB  {slot_blocks:8d} blocks  ({slot_bytes / len(issues):.0f} B/issue)")
+
+    t0 = time.perf_counter()
+    result, _, blocks, peak = measure(lambda: engine.proofread(content, {'qwen': False, 'rules_mode': 'full', 'use_cache': False, 'parallel': False}))
+    elapsed = time.perf_counter() - t0
+    print(f"{'end-to-end':<16} peak {peak / 1024 / 1024:7.1f} MiB  {blocks:8d} blocks retained  "
+          f"{len(result['issues'])} issues  {elapsed:.2f}s (traced)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+问题和解基准：区间扫描 / 二分索引 vs 原逐对比较实现（默认 1 万条问题）
+
+用法（在 backend 目录下）：
+    python benchmarks/bench_reconcile.py [--issues 10000] [--llm 1000] [--chars 100000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.reconcile import reconcile_overlaps, LLMWindowIndex, partition_for_display
+from src.services.text_index import TextIndex
+from src.services.issue import Issue, TYPO, GRAMMAR, PUNCTUATION, SENSITIVE, HIGH, MEDIUM, LOW, WARNING, LAYOUT_QWEN
+
+
+def legacy_reconcile(issues, weight):
+    suppressed = [False] * len(issues)
+    for i in range(len(issues)):
+        if suppressed[i]:
+            continue
+        a = issues[i]; a_s, a_e = a.start, a.end
+        for j in range(i+1, len(issues)):
+            if suppressed[j]:
+                continue
+            b = issues[j]; b_s, b_e = b.start, b.end
+            if not (b_s >= a_e or b_e <= a_s):
+                if weight(b) > weight(a):
+                    suppressed[i] = True; break
+                else:
+                    suppressed[j] = True
+    return [it for k, it in enumerate(issues) if not suppressed[k]]
+
+def legacy_window(issues, llm_ranges, radius):
+    kept = []
+    for it in issues:
+        s, e = it.start, it.end
+        near_llm = False
+        for ls, le in llm_ranges:
+            if max(0, min(e, le) - max(s, ls)) > 0:
+                near_llm = True; break
+            if abs(s - le) <= radius or abs(ls - e) <= radius:
+                near_llm = True; break
+        if not near_llm:
+            kept.append(it)
+    return kept
+
+def legacy_paragraphs(content, issues):
+    paragraph_id_by_pos = {}
+    pid = 0; last = 0
+    for i, ch in enumerate(content):
+        if ch == '\n':
+            for k in range(last, i+1):
+                paragraph_id_by_pos[k] = pid
+            last = i+1; pid += 1
+    for k in range(last, len(content)):
+        paragraph_id_by_pos[k] = pid
+    return [paragraph_id_by_pos.get(it.start, 0) for it in issues]
+
+def legacy_partition(issues):
+    llm_style = [it for it in issues if it.source == 'qwen' and it.subtype == 'style']
+    punct = [it for it in issues if it.type == PUNCTUATION]
+    other = [it for it in issues if it not in llm_style and it not in punct]
+    return llm_style + other + punct[:12]
+
+
+def new_window(issues, llm_ranges, radius):
+    index = LLMWindowIndex(llm_ranges, radius)
+    return [it for it in issues if not index.near(it.start, it.end)]
+
+def new_paragraphs(content, issues):
+    index = TextIndex(content)
+    return [index.paragraph_of(it.start) for it in issues]
+
+
+def weight(issue):
+    base = {TYPO: 3.0, GRAMMAR: 2.2, SENSITIVE: 2.6, PUNCTUATION: 1.25}.get(issue.type, 1.0)
+    return base + {HIGH: 1.0, MEDIUM: 0.5, WARNING: 0.5}.get(issue.severity, 0.0)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--issues', type=int, default=10000)
+    parser.add_argument('--llm', type=int, default=1000)
+    parser.add_argument('--chars', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    content = ''.join('\n' if rng.random() < 0.01 else '字' for _ in range(args.chars))
+    issues = []
+    for k in range(args.issues):
+        s = rng.randrange(args.chars)
+        issue = Issue(
+            rng.choice([TYPO, GRAMMAR, PUNCTUATION, SENSITIVE]), s, s + rng.randint(1, 6), '', '',
+            rng.choice([HIGH, MEDIUM, LOW, WARNING]), LAYOUT_QWEN,
+            source=rng.choice([None, None, None, 'qwen']),
+            subtype=rng.choice([None, 'style', 'high_value']),
+        )
+        issue.id = k
+        issues.append(issue)
+    issues.sort(key=lambda x: x.start)
+    llm_ranges = []
+    for _ in range(args.llm):
+        s = rng.randrange(args.chars)
+        llm_ranges.append((s, s + rng.randint(1, 20)))
+
+    print(f"issues: {len(issues)}, llm ranges: {len(llm_ranges)}, content: {len(content)} chars")
+    cases = [
+        ('overlap reconcile', lambda: legacy_reconcile(issues, weight), lambda: reconcile_overlaps(issues, weight)),
+        ('llm window', lambda: legacy_window(issues, llm_ranges, 25), lambda: new_window(issues, llm_ranges, 25)),
+        ('paragraph lookup', lambda: legacy_paragraphs(content, issues), lambda: new_paragraphs(content, issues)),
+        ('display partition', lambda: legacy_partition(issues), lambda: partition_for_display(issues)),
+    ]
+    total_legacy = total_new = 0.0
+    for name, legacy_fn, new_fn in cases:
+        legacy_result, t_legacy = timed(legacy_fn)
+        new_result, t_new = timed(new_fn)
+        assert legacy_result == new_result, name
+        total_legacy += t_legacy
+        total_new += t_new
+        print(f"{name:<18} legacy {t_legacy:8.3f}s   indexed {t_new:8.4f}s   speedup x{t_legacy / max(t_new, 1e-9):.0f}")
+    print(f"{'total':<18} legacy {total_legacy:8.3f}s   indexed {total_new:8.4f}s")
+
+
+if __name__ == '__main__':
+    main()
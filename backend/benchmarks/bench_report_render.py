@@ -0,0 +1,118 @@
+"""
+审校报告渲染基准：渲染耗时与峰值内存随问题数的变化
+
+对比原实现的做法（每个问题两次 SequenceMatcher、逐行 f-string、整篇 json.dumps 后拼成一个字符串）
+与 iter_report_html（模板填充、每对 原文/建议 只 diff 一次、分段流式输出并逐段丢弃）。
+用法（在 backend 目录下）：
+    python benchmarks/bench_report_render.py [--counts 500,1000,5000] [--repeat 3]
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import difflib
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.document_service import DocumentService, diff_html, diff_segments
+
+PAIRS = [('散不', '散步'), ('胡蝶', '蝴蝶'), ('因该', '应该'), ('认真的完成', '认真地完成'), (',', '，'),
+         ('盛升', '盛开'), ('（', '（...）'), ('暴力', '')]
+SENTENCE = '今天天气很好,我们去散不吧。公园里的花都盛升了，胡蝶在花丛中飞舞。'
+
+
+def make_report(count, seed):
+    rng = random.Random(seed)
+    content = SENTENCE * (count // 2 + 10)
+    issues = []
+    for k in range(count):
+        original, suggestion = rng.choice(PAIRS)
+        # 一部分建议带上下文差异，使 原文/建议 对不全相同
+        if k % 4 == 0:
+            suggestion = suggestion + str(k % 97)
+        start = rng.randrange(0, len(content) - 4)
+        issues.append({
+            'id': f'bench-{k}', 'type': rng.choice(['typo', 'grammar', 'punctuation', 'sensitive']),
+            'severity': rng.choice(['high', 'medium', 'warning']), 'category': '错别字',
+            'position': {'start': start, 'end': start + len(original)},
+            'original': original, 'suggestion': suggestion, 'message': '疑似错别字', 'source': 'rule',
+        })
+    return content, {'issues': issues, 'statistics': {'total_issues': count, 'typos': count}}
+
+
+def legacy_render(content, result):
+    """原实现的代价结构：两次 diff、逐行 f-string、整串拼接与整体 json.dumps"""
+    def esc(s):
+        return (s or '').replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+    def side(orig, sug, is_original):
+        parts = []
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(a=orig, b=sug).get_opcodes():
+            seg = esc(orig[i1:i2] if is_original else sug[j1:j2])
+            marked = tag in (('replace', 'delete') if is_original else ('replace', 'insert'))
+            parts.append(f'<u>{seg}</u>' if marked and seg else seg)
+        return ''.join(parts)
+
+    rows = []
+    for idx, it in enumerate(result['issues'], start=1):
+        pos = it['position']
+        ctx = esc(content[max(0, pos['start'] - 20):min(len(content), pos['end'] + 20)])
+        rows.append(f"""
+              <tr>
+                <td>{idx}</td><td>{esc(it['type'])}</td><td>{esc(it['severity'])}</td>
+                <td>{pos['start']}-{pos['end']}</td>
+                <td class='orig'>{side(it['original'], it['suggestion'], True)}</td>
+                <td>{side(it['original'], it['suggestion'], False)}</td>
+                <td>{esc(it['message'])}</td><td><code>{ctx}</code></td>
+              </tr>
+            """)
+    payload_json = json.dumps({'content': content, 'result': result}, ensure_ascii=False).replace('</', '<\\/')
+    return f"<html><body><table>{''.join(rows)}</table><script>{payload_json}</script></body></html>"
+
+
+def measure(render):
+    """返回 (输出字符数, 耗时, 峰值字节)；流式输出逐段丢弃，模拟写入响应"""
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    size = 0
+    for part in render():
+        size += len(part)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--counts', default='500,1000,5000')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    service = DocumentService()
+    print(f"{'issues':>7} {'renderer':<10} {'time ms':>9} {'peak MiB':>9} {'output KiB':>11}")
+    for count in [int(c) for c in args.counts.split(',')]:
+        content, result = make_report(count, 42)
+        for name, render in (
+            ('legacy', lambda: [legacy_render(content, result)]),
+            ('streamed', lambda: service.iter_report_html(content, result, {'title': '基准报告'})),
+        ):
+            best = None
+            for _ in range(args.repeat):
+                # 每轮清空 diff 缓存，计入首次计算的开销
+                diff_segments.cache_clear()
+                diff_html.cache_clear()
+                run = measure(render)
+                best = run if best is None or run[1] < best[1] else best
+            size, elapsed, peak = best
+            print(f"{count:>7} {name:<10} {elapsed * 1000:9.1f} {peak / 1024 / 1024:9.2f} {size / 1024:11.1f}")
+
+
+if __name__ == '__main__':
+    main()
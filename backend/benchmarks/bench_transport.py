@@ -0,0 +1,78 @@
+"""
+传输层基准：10 万字文档审校结果的 JSON 编码耗时与压缩后体积
+
+对比原 jsonify（标准库、排序键、\\uXXXX 转义）与 FastJSONProvider（orjson、UTF-8 原文），
+以及 gzip / br 压缩后的响应体积与压缩耗时。
+用法（在 backend 目录下）：
+    python benchmarks/bench_transport.py [--chars 100000] [--repeat 20]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.proofreading_engine import ProofreadingEngine
+from src.services import transport
+
+SENTENCES = [
+    '今天天气很好,我们去散不吧。', '公园里的花都盛升了，胡蝶在花丛中飞舞。', '他认真的完成了作业。',
+    '会议纪要：项目进度正常，系统测试因该在下周完成！', '“这是一个测试（文档。', '\n',
+]
+
+
+def make_text(chars, seed):
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < chars:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        size += len(sentence)
+    return ''.join(parts)[:chars]
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - t0) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chars', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    content = make_text(args.chars, 42)
+    engine = ProofreadingEngine()
+    result = engine.proofread(content, {'qwen': False, 'use_cache': False})
+    payload = {'success': True, 'data': result}
+    print(f"content: {len(content)} chars, issues: {len(result['issues'])}, json backend: {transport.FastJSONProvider.backend()}")
+
+    legacy, t_legacy = timed(
+        lambda: json.dumps(payload, ensure_ascii=True, sort_keys=True, separators=(',', ':')).encode('utf-8'), args.repeat)
+    fast, t_fast = timed(lambda: transport.dumps(payload).encode('utf-8'), args.repeat)
+    print(f"{'encode jsonify':<16} {t_legacy * 1000:8.2f} ms  {len(legacy) / 1024:8.1f} KiB")
+    print(f"{'encode fast':<16} {t_fast * 1000:8.2f} ms  {len(fast) / 1024:8.1f} KiB")
+
+    encodings = ['gzip'] + (['br'] if transport._brotli is not None else [])
+    for encoding in encodings:
+        body, t_compress = timed(lambda: transport.compress_body(fast, encoding), args.repeat)
+        print(f"{'+ ' + encoding:<16} {t_compress * 1000:8.2f} ms  {len(body) / 1024:8.1f} KiB  "
+              f"({len(legacy) / len(body):.1f}x smaller than jsonify)")
+
+    request_body = transport.dumps({'content': content, 'issues': result['issues']}).encode('utf-8')
+    compressed = transport.compress_body(request_body, 'gzip')
+    _, t_decode = timed(lambda: transport.decompress_body(compressed, 'gzip'), args.repeat)
+    print(f"{'request gzip':<16} {len(request_body) / 1024:8.1f} KiB -> {len(compressed) / 1024:.1f} KiB, "
+          f"decompress {t_decode * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
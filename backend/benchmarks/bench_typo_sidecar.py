@@ -0,0 +1,94 @@
+"""
+内存对比：每个 worker 进程内加载 pycorrector vs 共享 typo sidecar
+
+用法（在 backend 目录下，需已安装 pycorrector；仅 Linux 可读取 RSS）：
+    python benchmarks/bench_typo_sidecar.py [--workers 4]
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import multiprocessing
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SAMPLE = '今天天气很好，我们去散不吧。公园里的花都盛升了，胡蝶在花丛中飞舞。'
+
+
+def worker(socket_path, queue):
+    """模拟一个 web worker：导入审校模块并完成一次错别字检查后报告 RSS"""
+    if socket_path:
+        os.environ['TYPO_SIDECAR_SOCKET'] = socket_path
+    else:
+        os.environ.pop('TYPO_SIDECAR_SOCKET', None)
+    from src.services.typo_checker import get_typo_checker
+    from src.services.typo_sidecar import rss_kb
+    checker = get_typo_checker()
+    t0 = time.perf_counter()
+    checker.check_typos(SAMPLE)
+    queue.put((checker.backend, rss_kb(), time.perf_counter() - t0))
+
+
+def run_workers(n, socket_path):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(socket_path, queue)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    results = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return results
+
+
+def start_sidecar(socket_path):
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'src.services.typo_sidecar', 'serve', '--socket', socket_path],
+        cwd=BACKEND_DIR,
+    )
+    from src.services.typo_sidecar import SidecarCorrector, SidecarError
+    client = SidecarCorrector(socket_path)
+    deadline = time.time() + 300
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            return proc, None
+        try:
+            return proc, client.ping()
+        except SidecarError:
+            time.sleep(0.5)
+    return proc, None
+
+
+def report(title, results, extra_kb=0):
+    rss = [r[1] or 0 for r in results]
+    print(f"{title:<10} backend={results[0][0]:<12} per-worker RSS {sum(rss) / len(rss) / 1024:8.1f}MB   "
+          f"total {(sum(rss) + extra_kb) / 1024:8.1f}MB   first check {max(r[2] for r in results):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--socket', default='/tmp/proofread-typo-bench.sock')
+    args = parser.parse_args()
+
+    report('in-process', run_workers(args.workers, None))
+
+    proc, ping = start_sidecar(args.socket)
+    try:
+        if ping is None:
+            print('sidecar did not start (is pycorrector installed?); skipping sidecar mode')
+            return
+        results = run_workers(args.workers, args.socket)
+        sidecar_kb = ping.get('rss_kb') or 0
+        report('sidecar', results, extra_kb=sidecar_kb)
+        print(f"{'':<10} (total includes sidecar process RSS {sidecar_kb / 1024:.1f}MB)")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == '__main__':
+    main()
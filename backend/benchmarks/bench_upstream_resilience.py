@@ -0,0 +1,151 @@
+"""
+千问上游故障基准：上游正常 → 挂起至读超时 → 恢复三个阶段的审校吞吐与延迟
+
+模拟上游（不访问网络）正常时固定延迟返回空结果，故障阶段每个请求都挂起到读超时。
+对比原有做法（不限并发、固定约 1 秒间隔重试两次、不熔断）与默认的弹性控制
+（自适应并发上限、退避 + 重试预算、熔断后整篇降级为纯规则）。
+用法（在 backend 目录下）：
+    python benchmarks/bench_upstream_resilience.py [--concurrency 16] [--phase-seconds 6]
+                                                   [--llm-latency-ms 200] [--read-timeout 3]
+"""
+
+import os
+import sys
+import time
+import json
+import tempfile
+import argparse
+import threading
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.proofreading_engine import ProofreadingEngine
+from src.services.qwen_integration import QwenProofreader, UpstreamError
+from src.services.llm_cache import LLMResponseCache
+from src.services.resilience import UpstreamGuard, AdaptiveLimiter, CircuitBreaker, RetryBudget
+
+SENTENCES = ['今天天气很好,我们去散不吧。', '公园里的花都盛升了，胡蝶在花丛中飞舞。', '他认真的完成了作业。']
+
+
+class FakeResponse:
+    status_code = 200
+    text = ''
+
+    def json(self):
+        return {'choices': [{'message': {'content': json.dumps({'corrections': []})}}]}
+
+
+class FakeUpstream:
+    """healthy 时固定延迟返回；outage 时挂起到读超时后抛出 ReadTimeout"""
+    pool_size = 16
+
+    def __init__(self, latency, read_timeout):
+        self.latency = latency
+        self.read_timeout = read_timeout
+        self.timeout = (1, read_timeout)
+        self.healthy = True
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def post(self, url, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.healthy:
+            time.sleep(self.latency)
+            return FakeResponse()
+        time.sleep(self.read_timeout)
+        raise requests.exceptions.ReadTimeout('simulated read timeout')
+
+
+def legacy_guard():
+    """原有做法：无并发上限、固定约 1 秒间隔重试两次、不熔断、重试不设预算"""
+    return UpstreamGuard(
+        name='legacy', retryable=(UpstreamError, requests.exceptions.RequestException),
+        limiter=AdaptiveLimiter(initial=10000, max_limit=10000),
+        breaker=CircuitBreaker(min_calls=10 ** 9),
+        budget=RetryBudget(ratio=1, min_per_second=10 ** 6, capacity=10 ** 6),
+        max_retries=2, backoff_base=1.0, backoff_cap=1.0, queue_timeout=None, hedge='off',
+    )
+
+
+def default_guard(upstream):
+    return UpstreamGuard(
+        name='qwen', retryable=(UpstreamError, requests.exceptions.RequestException), max_limit=upstream.pool_size,
+    )
+
+
+def run_phase(engine, seconds, concurrency, seq):
+    deadline = time.time() + seconds
+    latencies, degraded = [], [0]
+    lock = threading.Lock()
+
+    def client(worker):
+        i = 0
+        while time.time() < deadline:
+            content = f'第{seq}-{worker}-{i}篇。' + ''.join(SENTENCES)
+            i += 1
+            t0 = time.perf_counter()
+            result = engine.proofread(content, {'qwen': True, 'use_cache': False})
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+                degraded[0] += bool(result.get('degraded'))
+
+    threads = [threading.Thread(target=client, args=(w,)) for w in range(concurrency)]
+    t0 = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.time() - t0
+    latencies.sort()
+    return {
+        'rps': len(latencies) / wall,
+        'p50': latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0,
+        'degraded': degraded[0],
+        'requests': len(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--phase-seconds', type=float, default=6)
+    parser.add_argument('--llm-latency-ms', type=float, default=200)
+    parser.add_argument('--read-timeout', type=float, default=3)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix='bench-resilience-')
+    print(f"concurrency {args.concurrency}, {args.phase_seconds:.0f}s per phase, LLM {args.llm_latency_ms:.0f} ms, "
+          f"outage read timeout {args.read_timeout:.0f}s")
+    print(f"{'guard':<8} {'phase':<9} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'degraded':>9} {'upstream calls':>15}")
+    for name in ('legacy', 'default'):
+        upstream = FakeUpstream(args.llm_latency_ms / 1000.0, args.read_timeout)
+        engine = ProofreadingEngine()
+        engine.ensure_loaded()
+        guard = legacy_guard() if name == 'legacy' else default_guard(upstream)
+        engine.qwen_proofreader = QwenProofreader(
+            api_key='bench', http_client=upstream, guard=guard,
+            response_cache=LLMResponseCache(path=os.path.join(cache_dir, f'{name}.sqlite3'), enabled=False),
+        )
+        for seq, (phase, healthy) in enumerate((('healthy', True), ('outage', False), ('recovery', True))):
+            upstream.healthy = healthy
+            calls_before = upstream.calls
+            # 静默引擎与重试的逐请求日志，避免输出本身成为瓶颈
+            stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+            try:
+                result = run_phase(engine, args.phase_seconds, args.concurrency, seq)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            print(f"{name:<8} {phase:<9} {result['rps']:7.1f} {result['p50']:8.0f} {result['p95']:8.0f} "
+                  f"{result['degraded']:>4}/{result['requests']:<4} {upstream.calls - calls_before:>15}")
+            if phase == 'outage' and name == 'default':
+                # 熔断冷却结束后才会探测恢复；等待冷却，使恢复阶段从半开开始
+                time.sleep(max(0.0, guard.breaker.cooldown - args.phase_seconds))
+
+
+if __name__ == '__main__':
+    main()
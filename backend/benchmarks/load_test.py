@@ -0,0 +1,230 @@
+"""
+服务模式负载测试：开发服务器（python src/main.py）与 gunicorn pre-fork（gunicorn.conf.py）
+
+分别启动服务，以固定并发持续请求 /api/proofread，统计每秒请求数、延迟分位与各进程常驻内存。
+大模型调用指向本地模拟上游（固定延迟返回空结果，不访问网络），使负载包含真实的 HTTP I/O 等待；
+--llm-latency-ms 0 时关闭大模型、只测规则路径。每个请求的文本都不同，不命中结果缓存。
+内存取自 /proc/<pid>/smaps_rollup：RSS 含与其他进程共享的页面，PSS 按共享进程数分摊，
+pre-fork 下 worker 共享 master 预加载的页面，PSS 之和才是实际占用。
+用法（在 backend 目录下，需 Linux）：
+    python benchmarks/load_test.py [--mode both] [--workers 2] [--threads 8] [--concurrency 16]
+                                   [--duration 15] [--llm-latency-ms 300]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import tempfile
+import argparse
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SENTENCES = ['今天天气很好,我们去散不吧。', '公园里的花都盛升了，胡蝶在花丛中飞舞。', '他认真的完成了作业。',
+             '会议纪要：项目进度正常，系统测试因该在下周完成！', '“这是一个测试（文档。', '\n']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def make_text(seq, chars):
+    parts = [f'第{seq}号文档。']
+    size = len(parts[0])
+    i = seq
+    while size < chars:
+        sentence = SENTENCES[i % len(SENTENCES)]
+        parts.append(sentence)
+        size += len(sentence)
+        i += 1
+    return ''.join(parts)
+
+
+def start_fake_llm(latency):
+    """模拟千问兼容接口：固定延迟后返回空纠错结果"""
+    body = json.dumps({'choices': [{'message': {'content': '{"corrections": []}'}}]}).encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', free_port()), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def launch(mode, port, args, llm_url, workdir):
+    env = dict(os.environ, PORT=str(port), JOB_QUEUE_PATH=os.path.join(workdir, f'{mode}-jobs.sqlite3'),
+               QWEN_CACHE_ENABLED='0', LEXICON_WATCH_INTERVAL='0', GUNICORN_ACCESS_LOG='',
+               WEB_CONCURRENCY=str(args.workers), GUNICORN_THREADS=str(args.threads))
+    if llm_url:
+        env.update(QWEN_API_KEY='load-test', QWEN_BASE_URL=llm_url)
+    else:
+        env.pop('QWEN_API_KEY', None)
+    if mode == 'dev':
+        cmd = [sys.executable, 'src/main.py']
+    else:
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'src.main:app']
+    log = open(os.path.join(workdir, f'{mode}.log'), 'w')
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+                            start_new_session=True)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/api/ready', timeout=2).status_code == 200:
+                return proc
+        except requests.RequestException:
+            pass
+        if proc.poll() is not None:
+            break
+        time.sleep(0.3)
+    stop(proc)
+    raise RuntimeError(f'{mode} server failed to start, see {log.name}')
+
+
+def stop(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(30)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+
+
+def process_tree(pid):
+    pids = [pid]
+    for p in pids:
+        try:
+            with open(f'/proc/{p}/task/{p}/children') as f:
+                pids.extend(int(c) for c in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def memory_kb(pid):
+    """(RSS, PSS) KiB"""
+    values = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('Rss', 'Pss'):
+                    values[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values.get('Rss', 0), values.get('Pss', 0)
+
+
+def run_load(port, args, llm_on):
+    url = f'http://127.0.0.1:{port}/api/proofread'
+    deadline = time.time() + args.duration
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    counter = iter(range(10 ** 9))
+
+    def client():
+        session = requests.Session()
+        while time.time() < deadline:
+            with lock:
+                seq = next(counter)
+            payload = {'content': make_text(seq, args.chars), 'options': {'qwen': llm_on, 'use_cache': False}}
+            t0 = time.perf_counter()
+            try:
+                ok = session.post(url, json=payload, timeout=120).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - t0
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    t0 = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.time() - t0
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0
+
+    return {'rps': len(latencies) / wall, 'ok': len(latencies), 'errors': errors[0], 'p50': pct(0.5), 'p95': pct(0.95)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=['dev', 'gunicorn', 'both'], default='both')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--chars', type=int, default=800)
+    parser.add_argument('--llm-latency-ms', type=float, default=300)
+    args = parser.parse_args()
+
+    llm = start_fake_llm(args.llm_latency_ms / 1000.0) if args.llm_latency_ms > 0 else None
+    llm_url = f'http://127.0.0.1:{llm.server_address[1]}' if llm else None
+    workdir = tempfile.mkdtemp(prefix='proofread-load-')
+    modes = ['dev', 'gunicorn'] if args.mode == 'both' else [args.mode]
+    print(f"concurrency {args.concurrency}, {args.duration:.0f}s, ~{args.chars} chars/request, "
+          f"LLM: {f'simulated {args.llm_latency_ms:.0f} ms' if llm else 'off'}, logs: {workdir}")
+
+    for mode in modes:
+        port = free_port()
+        proc = launch(mode, port, args, llm_url, workdir)
+        try:
+            result = run_load(port, args, bool(llm))
+            pids = process_tree(proc.pid)
+            label = f'gunicorn {args.workers}w x {args.threads}t' if mode == 'gunicorn' else 'dev server'
+            print(f"\n{label}: {result['rps']:.1f} req/s, p50 {result['p50']:.0f} ms, p95 {result['p95']:.0f} ms, "
+                  f"ok {result['ok']}, errors {result['errors']}")
+            total_pss = 0
+            for i, pid in enumerate(pids):
+                rss, pss = memory_kb(pid)
+                total_pss += pss
+                # 进程树中第一个是 gunicorn master，其余为 worker
+                role = 'server' if mode == 'dev' else ('master' if i == 0 else 'worker')
+                print(f"  {role:<7} pid {pid:<7} RSS {rss / 1024:7.1f} MiB  PSS {pss / 1024:7.1f} MiB")
+            print(f"  total PSS {total_pss / 1024:.1f} MiB")
+        finally:
+            stop(proc)
+
+    if llm:
+        llm.shutdown()
+
+
+if __name__ == '__main__':
+    main()
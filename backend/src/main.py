@@ -6,7 +6,13 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from flask import Flask, send_from_directory, jsonify
 from flask_cors import CORS
 from src.routes.proofreading import proofreading_bp
+from src.services.proofreading_engine import proofreading_engine
+from src.services import lexicon_store
+from src.services.readiness import readiness
+from src.services.transport import init_transport
+from src.services.job_queue import get_job_queue
 import datetime
+import threading
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -14,6 +20,9 @@ app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 # 启用CORS支持
 CORS(app)
 
+# 快速 JSON 编解码、压缩请求体解压与响应压缩协商
+init_transport(app)
+
 # 注册审校路由
 app.register_blueprint(proofreading_bp, url_prefix='/api')
 
@@ -52,7 +61,31 @@ def serve(path):
             return "index.html not found", 404
 
 
+def warm_up_connections():
+    """后台预热到千问接入点的长连接，避免首个请求承担 TCP/TLS 握手"""
+    threading.Thread(
+        target=proofreading_engine.qwen_proofreader.warm_up,
+        name='qwen-warmup',
+        daemon=True
+    ).start()
+
+
+def start_background_services():
+    """
+    启动每个服务进程各自的后台线程：上游连接预热、词库文件监视、异步审校任务 worker。
+    pre-fork 部署时在 worker 的 post_fork 中调用（线程不随 fork 继承）。
+    """
+    warm_up_connections()
+    lexicon_store.start_watcher()
+    # 异步审校任务 worker（重启后继续执行队列中的任务）
+    get_job_queue().start()
+
+
 if __name__ == '__main__':
+    # 开发服务器。生产环境使用 gunicorn -c gunicorn.conf.py src.main:app（见 gunicorn.conf.py）
+    # 词库与纠错模型在后台加载预热，服务先行监听端口；就绪状态见 /api/ready
+    readiness.start()
+    start_background_services()
     # 获取端口号，支持Render等平台的动态端口
     port = int(os.environ.get('PORT', 5000))
     # 生产环境关闭debug模式
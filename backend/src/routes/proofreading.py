@@ -2,15 +2,38 @@
 审校相关的API路由
 """
 
-from flask import Blueprint, request, jsonify, send_file, Response
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context
 from src.services.proofreading_engine import proofreading_engine
 from src.services.document_service import document_service
+from src.services import lexicon_store
+from src.services.readiness import readiness
+from src.services import transport
+from src.services import docx_import
+from src.services.job_queue import get_job_queue, TERMINAL_STATES, DONE
 import io
+import hmac
+import time
+import codecs
+import shutil
+import tempfile
 import datetime
 import os
 
 proofreading_bp = Blueprint('proofreading', __name__)
 
+# 流式上传的字符数上限（0 表示不限制）与每次读取的字节数
+UPLOAD_MAX_CHARS = int(os.getenv('PROOFREAD_UPLOAD_MAX_CHARS', 10000000))
+UPLOAD_READ_BYTES = 64 * 1024
+# 批量审校：单次请求的文档数与总字符数上限
+BATCH_MAX_DOCUMENTS = int(os.getenv('PROOFREAD_BATCH_MAX_DOCUMENTS', 1000))
+BATCH_MAX_CHARS = int(os.getenv('PROOFREAD_BATCH_MAX_CHARS', 5000000))
+# 任务事件订阅：检查新事件的间隔与心跳注释间隔（秒）
+JOB_EVENTS_POLL_INTERVAL = float(os.getenv('JOB_EVENTS_POLL_INTERVAL', 0.5))
+JOB_EVENTS_KEEPALIVE = 15
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {transport.dumps(payload)}\n\n"
+
 @proofreading_bp.route('/proofread', methods=['POST'])
 def proofread_text():
     """文档审校接口"""
@@ -30,12 +53,12 @@ def proofread_text():
         options = data.get('options', {})
         
         # 检查内容长度
-        if len(content) > 100000:  # 限制10万字符
+        if len(content) > 100000:  # 限制10万字符，更长的文档走 /proofread/upload 流式上传
             return jsonify({
                 'success': False,
                 'error': {
                     'code': 'CONTENT_TOO_LARGE',
-                    'message': '文档内容过大，请分段处理'
+                    'message': '文档内容过大，请使用 /api/proofread/upload 流式上传'
                 }
             }), 400
         
@@ -56,6 +79,362 @@ def proofread_text():
             }
         }), 500
 
+@proofreading_bp.route('/proofread/stream', methods=['POST'])
+def proofread_stream():
+    """流式审校接口（Server-Sent Events）：先推送规则结果，再逐块推送 LLM 结果，最后推送和解结果"""
+    data = request.get_json(silent=True)
+
+    if not data or 'content' not in data:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'INVALID_REQUEST',
+                'message': '请求参数无效，缺少content字段'
+            }
+        }), 400
+
+    content = data['content']
+    options = data.get('options', {})
+
+    if len(content) > 100000:  # 与 /proofread 保持一致
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'CONTENT_TOO_LARGE',
+                'message': '文档内容过大，请分段处理'
+            }
+        }), 400
+
+    def generate():
+        try:
+            for event, payload in proofreading_engine.proofread_events(content, options):
+                yield _sse(event, payload)
+        except Exception as e:
+            yield _sse('error', {
+                'code': 'PROCESSING_ERROR',
+                'message': f'处理过程中发生错误: {str(e)}'
+            })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _batch_error(code, message):
+    return jsonify({
+        'success': False,
+        'error': {
+            'code': code,
+            'message': message
+        }
+    }), 400
+
+@proofreading_bp.route('/proofread/batch', methods=['POST'])
+def proofread_batch():
+    """
+    批量审校接口：一次提交多篇文档（各自可带 options，覆盖请求级默认选项），共享加载、词库扫描与并发上限。
+    默认按输入顺序返回全部结果；stream=true 时以 Server-Sent Events 按完成顺序逐篇推送。
+    """
+    data = request.get_json(silent=True) or {}
+    documents = data.get('documents')
+    if not isinstance(documents, list) or not documents:
+        return _batch_error('INVALID_REQUEST', '请求参数无效，documents 应为非空数组')
+    if len(documents) > BATCH_MAX_DOCUMENTS:
+        return _batch_error('CONTENT_TOO_LARGE', f'单次最多提交 {BATCH_MAX_DOCUMENTS} 篇文档')
+
+    defaults = data.get('options') or {}
+    batch = []
+    ids = []
+    total_chars = 0
+    for i, doc in enumerate(documents):
+        if not isinstance(doc, dict) or not isinstance(doc.get('content'), str):
+            return _batch_error('INVALID_REQUEST', f'第 {i} 篇文档缺少 content 字段')
+        content = doc['content']
+        if len(content) > 100000:
+            return _batch_error('CONTENT_TOO_LARGE', f'第 {i} 篇文档内容过大，请使用 /api/proofread/upload 流式上传')
+        total_chars += len(content)
+        batch.append((content, dict(defaults, **(doc.get('options') or {}))))
+        ids.append(doc.get('id'))
+    if total_chars > BATCH_MAX_CHARS:
+        return _batch_error('CONTENT_TOO_LARGE', f'批量文档总字符数超过 {BATCH_MAX_CHARS}')
+    max_concurrency = data.get('max_concurrency')
+
+    def item(index, result, error):
+        entry = {'index': index, 'id': ids[index], 'success': error is None}
+        if error is None:
+            entry['data'] = result
+        else:
+            entry['error'] = {'code': 'PROCESSING_ERROR', 'message': f'处理过程中发生错误: {error}'}
+        return entry
+
+    start_time = time.time()
+    if data.get('stream'):
+        def generate():
+            failed = 0
+            try:
+                for index, result, error in proofreading_engine.proofread_batch(batch, max_concurrency):
+                    failed += error is not None
+                    yield _sse('result', item(index, result, error))
+                yield _sse('done', {
+                    'documents': len(batch),
+                    'failed': failed,
+                    'elapsed': round(time.time() - start_time, 3)
+                })
+            except Exception as e:
+                yield _sse('error', {
+                    'code': 'PROCESSING_ERROR',
+                    'message': f'处理过程中发生错误: {str(e)}'
+                })
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    try:
+        results = [None] * len(batch)
+        for index, result, error in proofreading_engine.proofread_batch(batch, max_concurrency):
+            results[index] = item(index, result, error)
+        return jsonify({
+            'success': True,
+            'data': {
+                'results': results,
+                'failed': sum(1 for r in results if not r['success']),
+                'elapsed': round(time.time() - start_time, 3)
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'PROCESSING_ERROR',
+                'message': f'处理过程中发生错误: {str(e)}'
+            }
+        }), 500
+
+class UploadTooLarge(Exception):
+    pass
+
+def _options_from_args(args):
+    """从查询参数读取审校选项（请求体为纯文本时使用）"""
+    options = {}
+    for key in ('qwen', 'check_typos', 'check_grammar', 'check_punctuation', 'check_sensitive'):
+        if key in args:
+            options[key] = args.get(key, '').strip().lower() not in ('0', 'false', 'no', 'off')
+    if args.get('rules_mode'):
+        options['rules_mode'] = args.get('rules_mode')
+    return options
+
+def _iter_upload_text(stream):
+    """按块读取请求体并增量解码 UTF-8（多字节字符跨块时自动拼接）"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    total = 0
+    while True:
+        block = stream.read(UPLOAD_READ_BYTES)
+        text = decoder.decode(block, final=not block)
+        total += len(text)
+        if UPLOAD_MAX_CHARS and total > UPLOAD_MAX_CHARS:
+            raise UploadTooLarge()
+        if text:
+            yield text
+        if not block:
+            return
+
+@proofreading_bp.route('/proofread/upload', methods=['POST'])
+def proofread_upload():
+    """
+    大文档流式审校接口（Server-Sent Events）：请求体为 UTF-8 纯文本，可分块传输、可压缩；
+    选项通过查询参数传递。服务端边读边切块审校，按块推送带全局偏移的问题，不在内存中保留全文。
+    """
+    options = _options_from_args(request.args)
+    stream = request.stream
+
+    def generate():
+        try:
+            for event, payload in proofreading_engine.proofread_stream(_iter_upload_text(stream), options):
+                yield _sse(event, payload)
+        except UploadTooLarge:
+            yield _sse('error', {
+                'code': 'CONTENT_TOO_LARGE',
+                'message': f'文档超过 {UPLOAD_MAX_CHARS} 字符上限'
+            })
+        except UnicodeDecodeError:
+            yield _sse('error', {
+                'code': 'INVALID_REQUEST',
+                'message': '请求体不是有效的 UTF-8 文本'
+            })
+        except Exception as e:
+            yield _sse('error', {
+                'code': 'PROCESSING_ERROR',
+                'message': f'处理过程中发生错误: {str(e)}'
+            })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@proofreading_bp.route('/proofread/docx', methods=['POST'])
+def proofread_docx():
+    """
+    Word 文档导入审校接口（Server-Sent Events）：multipart 字段 file 或请求体直接为 .docx 文件，
+    选项通过查询参数传递。服务端流式解析段落并审校，每个问题附带 (段落, run, 偏移) 位置。
+    """
+    options = _options_from_args(request.args)
+    upload = request.files.get('file')
+    if upload is not None:
+        source = upload.stream
+    else:
+        # 原始请求体先落到临时文件（zip 需要随机读取），小文件留在内存
+        source = tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024)
+        shutil.copyfileobj(request.stream, source, UPLOAD_READ_BYTES)
+        source.seek(0)
+    try:
+        document = docx_import.open_document_xml(source)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'INVALID_REQUEST',
+                'message': str(e)
+            }
+        }), 400
+
+    def generate():
+        try:
+            for event, payload in docx_import.proofread_docx(
+                    proofreading_engine, document, options, max_chars=UPLOAD_MAX_CHARS):
+                yield _sse(event, payload)
+        except docx_import.DocumentTooLarge:
+            yield _sse('error', {
+                'code': 'CONTENT_TOO_LARGE',
+                'message': f'文档超过 {UPLOAD_MAX_CHARS} 字符上限'
+            })
+        except Exception as e:
+            yield _sse('error', {
+                'code': 'PROCESSING_ERROR',
+                'message': f'处理过程中发生错误: {str(e)}'
+            })
+        finally:
+            document.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _job_not_found(job_id):
+    return jsonify({
+        'success': False,
+        'error': {
+            'code': 'JOB_NOT_FOUND',
+            'message': f'任务不存在或已过期: {job_id}'
+        }
+    }), 404
+
+@proofreading_bp.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    异步审校任务提交接口：入参与 /proofread 相同，立即返回任务 ID（HTTP 202），
+    之后通过 /jobs/<id> 轮询或 /jobs/<id>/events 订阅进度与结果。
+    """
+    try:
+        data = request.get_json()
+        if not data or 'content' not in data:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'INVALID_REQUEST',
+                    'message': '请求参数无效，缺少content字段'
+                }
+            }), 400
+
+        content = data['content']
+        options = data.get('options', {})
+        if len(content) > 100000:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'CONTENT_TOO_LARGE',
+                    'message': '文档内容过大，请使用 /api/proofread/upload 流式上传'
+                }
+            }), 400
+
+        queue = get_job_queue()
+        queue.start()
+        job_id = queue.submit(content, options)
+        return jsonify({
+            'success': True,
+            'data': {
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f'/api/jobs/{job_id}',
+                'events_url': f'/api/jobs/{job_id}/events'
+            }
+        }), 202
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'PROCESSING_ERROR',
+                'message': f'提交任务失败: {str(e)}'
+            }
+        }), 500
+
+@proofreading_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """任务状态、进度；完成后 result 与 /proofread 的 data 相同"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return _job_not_found(job_id)
+    return jsonify({'success': True, 'data': job})
+
+@proofreading_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    订阅任务进度（Server-Sent Events）：先补发已产生的阶段事件，再持续推送新事件，
+    结束时推送 final（或 error）。断线重连时按 Last-Event-ID（或 ?after=）续传。
+    """
+    queue = get_job_queue()
+    if queue.get(job_id, include_result=False) is None:
+        return _job_not_found(job_id)
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after') or 0)
+    except ValueError:
+        after = 0
+
+    def generate():
+        seq = after
+        idle_since = time.time()
+        while True:
+            # 先取状态再取事件：状态已结束时事件一定已全部写入
+            job = queue.get(job_id, include_result=False)
+            if job is None:
+                return
+            for seq, event, data in queue.events_after(job_id, seq):
+                yield f"id: {seq}\nevent: {event}\ndata: {data}\n\n"
+                idle_since = time.time()
+            if job['status'] in TERMINAL_STATES:
+                if job['status'] == DONE:
+                    yield _sse('final', queue.get(job_id)['result'])
+                else:
+                    yield _sse('error', {'code': 'PROCESSING_ERROR', 'message': job.get('error') or ''})
+                return
+            if time.time() - idle_since >= JOB_EVENTS_KEEPALIVE:
+                yield ": keepalive\n\n"
+                idle_since = time.time()
+            time.sleep(JOB_EVENTS_POLL_INTERVAL)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @proofreading_bp.route('/report/html', methods=['POST'])
 def report_html():
     """生成审校报告 HTML 供前端预览。支持三种输入：
@@ -99,8 +478,11 @@ def report_html():
             'export_time': datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
         }
 
-        html = document_service.render_report_html(content, final_result, meta)
-        return Response(html, mimetype='text/html; charset=utf-8')
+        # 报告逐段渲染、压缩并输出，不在内存中拼出完整 HTML
+        return transport.streamed_response(
+            document_service.iter_report_html(content, final_result, meta),
+            'text/html; charset=utf-8'
+        )
     except Exception as e:
         return jsonify({
             'success': False,
@@ -190,6 +572,49 @@ def export_word():
             }
         }), 500
 
+@proofreading_bp.route('/admin/lexicons/reload', methods=['POST'])
+def reload_lexicons():
+    """词库热更新接口：重新生成预编译产物并原子切换，其他 worker 经词库监视线程跟进"""
+    admin_token = os.getenv('ADMIN_TOKEN', '').strip()
+    provided = request.headers.get('X-Admin-Token', '')
+    if not admin_token or not hmac.compare_digest(provided.encode('utf-8'), admin_token.encode('utf-8')):
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'FORBIDDEN',
+                'message': '无权执行该操作'
+            }
+        }), 403
+
+    try:
+        data = request.get_json(silent=True) or {}
+        info = lexicon_store.reload_all(force=bool(data.get('force', False)))
+        return jsonify({
+            'success': True,
+            'data': info
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'PROCESSING_ERROR',
+                'message': f'词库加载失败: {str(e)}'
+            }
+        }), 500
+
+@proofreading_bp.route('/ready', methods=['GET'])
+def readiness_check():
+    """就绪检查接口：重量级组件全部加载并预热后返回 200，否则 503"""
+    # 未经 main 启动后台初始化时（如由其他 WSGI 服务器加载），首次探测即触发
+    readiness.start()
+    status = readiness.status()
+    return jsonify({
+        'success': status['ready'],
+        'timestamp': datetime.datetime.now().isoformat(),
+        'data': status
+    }), 200 if status['ready'] else 503
+
 @proofreading_bp.route('/health', methods=['GET'])
 def health_check():
     """健康检查接口"""
@@ -207,6 +632,11 @@ def health_check():
             'punctuation_check': True,
             'sensitive_check': True,
             'llm_proofreading': qwen_enabled
-        }
+        },
+        'cache': proofreading_engine.result_cache.stats(),
+        'qwen_pool': proofreading_engine.qwen_proofreader.http.stats(),
+        'qwen_resilience': proofreading_engine.qwen_proofreader.guard.stats(),
+        'llm_cache': proofreading_engine.qwen_proofreader.response_cache.stats(),
+        'lexicons': lexicon_store.status()
     })
 
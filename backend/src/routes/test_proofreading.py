@@ -0,0 +1,52 @@
+"""
+测试审校路由（流式审校的 SSE 输出）
+"""
+
+import json
+
+import pytest
+
+from src.main import app
+
+DOC = ''.join(f"第{i}段：我们去散不吧,今天天气很好（未闭合。\n" for i in range(10))
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+def _parse_sse(body):
+    """严格解析 SSE：每帧为 event 行 + 单行 data，以空行结束"""
+    text = body.decode('utf-8')
+    assert text.endswith('\n\n')
+    frames = []
+    for frame in text[:-2].split('\n\n'):
+        lines = frame.split('\n')
+        assert len(lines) == 2, frame
+        assert lines[0].startswith('event: ') and lines[1].startswith('data: ')
+        frames.append((lines[0][len('event: '):], json.loads(lines[1][len('data: '):])))
+    return frames
+
+def _without_ids(issues):
+    return [{k: v for k, v in it.items() if k != 'id'} for it in issues]
+
+def test_stream_frames_and_final_match_proofread(client):
+    options = {'qwen': False, 'use_cache': False}
+    resp = client.post('/api/proofread/stream', json={'content': DOC, 'options': options})
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/event-stream'
+    assert resp.headers['Cache-Control'] == 'no-cache'
+    frames = _parse_sse(resp.get_data())
+    assert [e for e, _ in frames] == ['rules', 'final']
+
+    final = frames[-1][1]
+    expected = client.post('/api/proofread', json={'content': DOC, 'options': options}).get_json()['data']
+    assert _without_ids(final['issues']) == _without_ids(expected['issues'])
+    assert final['statistics'] == expected['statistics']
+    # 规则阶段下发的问题要么保留在 final 中，要么列入 suppressed
+    final_ids = {it['id'] for it in final['issues']}
+    assert final['suppressed'] == [it['id'] for it in frames[0][1]['issues'] if it['id'] not in final_ids]
+
+def test_stream_rejects_missing_content(client):
+    resp = client.post('/api/proofread/stream', json={'options': {}})
+    assert resp.status_code == 400
+    assert resp.get_json()['error']['code'] == 'INVALID_REQUEST'
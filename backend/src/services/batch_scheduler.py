@@ -0,0 +1,111 @@
+"""
+跨请求微批调度
+把并发请求各自提交的句子汇集成批次（不超过 max_batch_size，首个句子最多等待 max_wait_ms），
+交给纠错模型的批量接口一次处理，再按提交顺序把结果分发回各自的请求。
+"""
+
+import os
+import time
+import threading
+from collections import deque
+
+
+class _Pending:
+    """一次 submit 的结果槽位：全部句子完成（或批次失败）后唤醒提交方"""
+    __slots__ = ('results', 'remaining', 'error', 'event')
+
+    def __init__(self, size):
+        self.results = [None] * size
+        self.remaining = size
+        self.error = None
+        self.event = threading.Event()
+
+
+class MicroBatcher:
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=5, name='micro-batcher'):
+        """
+        :param batch_fn: 批量处理函数，输入列表、返回等长结果列表
+        :param max_batch_size: 单批最大条数
+        :param max_wait_ms: 批次未满时，从第一条入队起最多等待的毫秒数
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.items = 0
+        self.max_observed_batch = 0
+
+    def _ensure_thread(self):
+        # fork 后的子进程没有父进程的调度线程，需要重新启动
+        if self._thread is None or self._pid != os.getpid():
+            self._queue = deque()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def submit(self, items, timeout=None):
+        """提交一组条目并阻塞等待结果，返回与 items 对齐的结果列表；批次失败时抛出原异常"""
+        if not items:
+            return []
+        pending = _Pending(len(items))
+        with self._cond:
+            self._ensure_thread()
+            for index, item in enumerate(items):
+                self._queue.append((item, pending, index))
+            self._cond.notify()
+        if not pending.event.wait(timeout):
+            raise TimeoutError(f'{self.name}: no result within {timeout}s')
+        if pending.error is not None:
+            raise pending.error
+        return pending.results
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            size = min(self.max_batch_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                results = self.batch_fn([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError(f'{self.name}: batch_fn returned {len(results)} results for {len(batch)} items')
+            except Exception as e:
+                for _, pending, _ in batch:
+                    if pending.error is None:
+                        pending.error = e
+                        pending.event.set()
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            self.max_observed_batch = max(self.max_observed_batch, len(batch))
+            for (_, pending, index), result in zip(batch, results):
+                if pending.error is not None:
+                    continue
+                pending.results[index] = result
+                pending.remaining -= 1
+                if pending.remaining == 0:
+                    pending.event.set()
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0,
+            'max_batch_size': self.max_observed_batch,
+            'queued': len(self._queue),
+        }
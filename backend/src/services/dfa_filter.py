@@ -1,30 +1,160 @@
 """
 DFA (Deterministic Finite Automaton) 敏感词过滤算法
-用于高效检测文本中的敏感词汇
+基于 Aho-Corasick 自动机（Trie + 失败指针），单次线性扫描即可找出全部匹配
 """
 
+import hashlib
+import threading
+from collections import deque, namedtuple
+from .issue import Issue, SENSITIVE, HIGH, LAYOUT_CATEGORIZED
+
+# 多词库匹配的标签：词库 ID、分类、替换建议（None 表示按词长打码）
+LexiconPayload = namedtuple('LexiconPayload', ['lexicon', 'category', 'replacement'])
+
 class DFAFilter:
     def __init__(self):
-        self.keyword_chains = {}
-        self.delimit = '\x00'
+        # 状态转移表：_goto[state] = {char: next_state}，0 为根
+        self._goto = [{}]
+        # 状态深度（即从根到该状态的词长）与是否为词尾
+        self._depth = [0]
+        self._terminal = [False]
+        # 词尾状态携带的标签（同一词可属于多个词库）
+        self._payloads = {}
+        # 失败指针与输出表（_out[state]：在该状态结束的全部词尾状态，含失败链上的后缀词，长词在前）
+        self._fail = [0]
+        self._out = [()]
+        self._built = True
+        self._build_lock = threading.Lock()
+        # 词库摘要：随加词累积，用作缓存键中的词库版本
+        self._digest = hashlib.sha1()
+        # 从预编译产物恢复时沿用产物记录的版本号
+        self._fixed_version = None
+
+    @property
+    def version(self):
+        """当前词库内容的短摘要"""
+        if self._fixed_version is not None:
+            return self._fixed_version
+        return self._digest.hexdigest()[:12]
+
+    def to_tables(self):
+        """导出编译后的状态表（仅含内置类型，便于序列化为预编译产物）"""
+        self._ensure_built()
+        return {
+            'goto': self._goto,
+            'depth': self._depth,
+            'terminal': self._terminal,
+            'payloads': {state: [tuple(p) for p in items] for state, items in self._payloads.items()},
+            'fail': self._fail,
+            'out': self._out,
+            'version': self.version,
+        }
+
+    @classmethod
+    def from_tables(cls, tables, payload_factory=None):
+        """由 to_tables 的结果直接恢复自动机，无需逐词重建"""
+        dfa = cls()
+        dfa._goto = tables['goto']
+        dfa._depth = tables['depth']
+        dfa._terminal = tables['terminal']
+        factory = payload_factory or tuple
+        dfa._payloads = {state: [factory(p) for p in items] for state, items in tables['payloads'].items()}
+        dfa._fail = tables['fail']
+        dfa._out = tables['out']
+        dfa._fixed_version = tables['version']
+        dfa._built = True
+        return dfa
     
-    def add_word(self, keyword):
-        """添加敏感词到DFA树中"""
+    def add_word(self, keyword, payload=None):
+        """添加敏感词到自动机（失败指针在下次扫描前统一重建），可附带匹配标签"""
         keyword = str(keyword).strip().lower()
         if not keyword:
             return
+        if self._fixed_version is not None:
+            self._digest = hashlib.sha1(self._fixed_version.encode('utf-8'))
+            self._fixed_version = None
+        self._digest.update(keyword.encode('utf-8') + b'\n')
+        if payload is not None:
+            self._digest.update(repr(payload).encode('utf-8') + b'\n')
         
-        chars = keyword
-        level = self.keyword_chains
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._depth.append(self._depth[state] + 1)
+                self._terminal.append(False)
+                self._goto[state][char] = nxt
+            state = nxt
         
-        for char in chars:
-            if char in level:
-                level = level[char]
-            else:
-                level[char] = {}
-                level = level[char]
-        
-        level[self.delimit] = 0
+        self._terminal[state] = True
+        if payload is not None:
+            self._payloads.setdefault(state, []).append(payload)
+        self._built = False
+    
+    def _ensure_built(self):
+        """按 BFS 顺序计算失败指针与输出表"""
+        if self._built:
+            return
+        with self._build_lock:
+            if self._built:
+                return
+            size = len(self._goto)
+            fail = [0] * size
+            out = [()] * size
+            queue = deque()
+            for nxt in self._goto[0].values():
+                out[nxt] = (nxt,) if self._terminal[nxt] else ()
+                queue.append(nxt)
+            while queue:
+                state = queue.popleft()
+                for char, nxt in self._goto[state].items():
+                    f = fail[state]
+                    while f and char not in self._goto[f]:
+                        f = fail[f]
+                    f = self._goto[f].get(char, 0)
+                    fail[nxt] = f
+                    own = (nxt,) if self._terminal[nxt] else ()
+                    out[nxt] = own + out[f]
+                    queue.append(nxt)
+            self._fail = fail
+            self._out = out
+            self._built = True
+    
+    def iter_matches(self, message):
+        """
+        单次扫描产出全部匹配 (start, end)，包含重叠与嵌套的词。
+        产出顺序：按结束位置递增，同一结束位置长词在前。
+        message 需已转为小写。
+        """
+        depth = self._depth
+        for end, terminal in self._scan(message):
+            yield end - depth[terminal], end
+
+    def iter_tagged(self, message):
+        """单次扫描产出带标签的匹配 (start, end, payload)，顺序同 iter_matches"""
+        depth = self._depth
+        payloads = self._payloads
+        for end, terminal in self._scan(message):
+            for payload in payloads.get(terminal, ()):
+                yield end - depth[terminal], end, payload
+
+    def _scan(self, message):
+        """沿转移与失败指针线性扫描，产出 (结束位置, 词尾状态)"""
+        self._ensure_built()
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        state = 0
+        for i, char in enumerate(message):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                end = i + 1
+                for terminal in out[state]:
+                    yield end, terminal
     
     def parse_words(self, path):
         """从文件中解析敏感词"""
@@ -38,153 +168,209 @@ class DFAFilter:
             print(f"敏感词文件 {path} 不存在")
     
     def filter(self, message, repl="*"):
-        """过滤敏感词，返回过滤后的文本和检测到的敏感词列表"""
+        """过滤敏感词，返回过滤后的文本和检测到的敏感词列表（自左向右取最短词，不重叠替换）"""
         message = str(message).lower()
         ret = []
         detected_words = []
-        start = 0
+        last = 0
         
-        while start < len(message):
-            level = self.keyword_chains
-            step_ins = 0
-            
-            for char in message[start:]:
-                if char in level:
-                    step_ins += 1
-                    if self.delimit not in level[char]:
-                        level = level[char]
-                    else:
-                        # 找到敏感词
-                        sensitive_word = message[start:start + step_ins]
-                        detected_words.append({
-                            'word': sensitive_word,
-                            'start': start,
-                            'end': start + step_ins
-                        })
-                        ret.append(repl * step_ins)
-                        start += step_ins - 1
-                        break
-                else:
-                    ret.append(message[start])
-                    break
-            else:
-                ret.append(message[start])
-            
-            start += 1
+        for start, end in sorted(self.iter_matches(message)):
+            if start < last:
+                continue
+            ret.append(message[last:start])
+            ret.append(repl * (end - start))
+            detected_words.append({
+                'word': message[start:end],
+                'start': start,
+                'end': end
+            })
+            last = end
+        ret.append(message[last:])
         
         return ''.join(ret), detected_words
     
     def contains(self, message):
         """检查文本是否包含敏感词"""
         message = str(message).lower()
-        
-        for start in range(len(message)):
-            level = self.keyword_chains
-            
-            for char in message[start:]:
-                if char in level:
-                    if self.delimit in level[char]:
-                        return True
-                    level = level[char]
-                else:
-                    break
-        
+        for _ in self.iter_matches(message):
+            return True
         return False
     
     def find_all(self, message):
-        """查找文本中所有的敏感词及其位置"""
+        """查找文本中所有的敏感词及其位置（含重叠与嵌套匹配，按起止位置排序）"""
         message_lower = str(message).lower()
         found_words = []
         
-        for start in range(len(message_lower)):
-            level = self.keyword_chains
-            step_ins = 0
-            
-            for char in message_lower[start:]:
-                if char in level:
-                    step_ins += 1
-                    if self.delimit not in level[char]:
-                        level = level[char]
-                    else:
-                        # 找到敏感词
-                        sensitive_word = message[start:start + step_ins]  # 保持原始大小写
-                        found_words.append({
-                            'word': sensitive_word,
-                            'start': start,
-                            'end': start + step_ins,
-                            'type': 'sensitive'
-                        })
-                        break
-                else:
-                    break
+        for start, end in sorted(self.iter_matches(message_lower)):
+            found_words.append({
+                'word': message[start:end],  # 保持原始大小写
+                'start': start,
+                'end': end,
+                'type': 'sensitive'
+            })
         
         return found_words
 
 
-# 创建全局实例
-sensitive_filter = DFAFilter()
-ideology_filter = DFAFilter()
+class LexiconMatcher:
+    """
+    多词库单次扫描：所有词库编译进同一个自动机，匹配结果带词库标签。
+    新增词库只增加自动机状态，扫描成本与词库数量无关。
+    词库更新时在锁外编译新自动机再原子切换，进行中的扫描继续使用旧自动机。
+    """
+    def __init__(self):
+        self._lexicons = {}  # lexicon_id -> {word: LexiconPayload}
+        self._compiled = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(lexicon_id, entries):
+        """(word, category, replacement) -> {小写词: LexiconPayload}，重复词以最后一次为准"""
+        words = {}
+        for word, category, replacement in entries:
+            word = str(word).strip()
+            if word:
+                words[word.lower()] = LexiconPayload(lexicon_id, category, replacement)
+        return words
+
+    @staticmethod
+    def _build(lexicons):
+        dfa = DFAFilter()
+        for lexicon_id in sorted(lexicons):
+            for word, payload in lexicons[lexicon_id].items():
+                dfa.add_word(word, payload)
+        dfa._ensure_built()
+        return dfa
+
+    def register(self, lexicon_id, entries):
+        """
+        注册（或整体替换）一个词库，下次扫描前重新编译。
+        :param entries: 可迭代的 (word, category, replacement)
+        同一词库内重复的词以最后一次为准（忽略大小写）；内容未变化时不触发重编译。
+        """
+        words = self._normalize(lexicon_id, entries)
+        with self._lock:
+            if self._lexicons.get(lexicon_id) == words:
+                return
+            self._lexicons = dict(self._lexicons, **{lexicon_id: words})
+            self._compiled = None
+
+    def replace_lexicons(self, lexicons):
+        """
+        整体替换若干词库：在锁外编译新自动机后原子切换。
+        :param lexicons: {lexicon_id: 可迭代的 (word, category, replacement)}
+        """
+        merged = dict(self._lexicons)
+        for lexicon_id, entries in lexicons.items():
+            merged[lexicon_id] = self._normalize(lexicon_id, entries)
+        compiled = self._build(merged)
+        with self._lock:
+            self._lexicons = merged
+            self._compiled = compiled
+        return compiled.version
+
+    def lexicons(self):
+        """当前全部词库：{lexicon_id: {word: (category, replacement)}}"""
+        return {
+            lexicon_id: {word: (p.category, p.replacement) for word, p in words.items()}
+            for lexicon_id, words in self._lexicons.items()
+        }
+
+    def snapshot(self):
+        """导出词库与编译后的自动机（用于生成预编译产物）"""
+        compiled = self._compile()
+        return {'lexicons': self.lexicons(), 'tables': compiled.to_tables()}
+
+    def restore(self, snapshot):
+        """从预编译产物恢复并原子切换"""
+        lexicons = {
+            lexicon_id: {word: LexiconPayload(lexicon_id, category, replacement)
+                         for word, (category, replacement) in words.items()}
+            for lexicon_id, words in snapshot['lexicons'].items()
+        }
+        compiled = DFAFilter.from_tables(snapshot['tables'], payload_factory=lambda p: LexiconPayload(*p))
+        with self._lock:
+            self._lexicons = lexicons
+            self._compiled = compiled
+        return compiled.version
+
+    def _compile(self):
+        compiled = self._compiled
+        if compiled is not None:
+            return compiled
+        with self._lock:
+            if self._compiled is None:
+                self._compiled = self._build(self._lexicons)
+            return self._compiled
+
+    @property
+    def version(self):
+        """全部词库内容的联合摘要"""
+        return self._compile().version
+
+    def scan(self, text):
+        """单次扫描，返回 {lexicon_id: [(start, end, payload), ...]}（每个已注册词库都有键）"""
+        compiled = self._compile()
+        hits = {lexicon_id: [] for lexicon_id in self._lexicons}
+        for start, end, payload in compiled.iter_tagged(str(text).lower()):
+            hits.setdefault(payload.lexicon, []).append((start, end, payload))
+        return hits
+
+    def scan_many(self, texts):
+        """
+        批量扫描：多篇文本以 \\x00 连接后只走一遍自动机（同一批次使用同一版本词库），
+        按文档切回各自的相对偏移，结果与逐篇 scan 相同。
+        :return: 与 texts 对齐的 scan 结果列表
+        """
+        compiled = self._compile()
+        lowered = [str(text).lower() for text in texts]
+        starts = []
+        offset = 0
+        for text in lowered:
+            starts.append(offset)
+            offset += len(text) + 1
+        results = [{lexicon_id: [] for lexicon_id in self._lexicons} for _ in lowered]
+        doc = 0
+        for start, end, payload in compiled.iter_tagged('\x00'.join(lowered)):
+            # 匹配按结束位置递增产出，文档序号只需向前推进
+            while doc + 1 < len(starts) and start >= starts[doc + 1]:
+                doc += 1
+            base = starts[doc]
+            results[doc].setdefault(payload.lexicon, []).append((start - base, end - base, payload))
+        return results
+
+
+# 创建全局实例：敏感词、意识形态词与错别字混淆集共用的单次扫描匹配器
+lexicon_matcher = LexiconMatcher()
 
 def init_filters():
-    """初始化过滤器，加载敏感词库"""
-    import os
-    
-    # 敏感词库路径
-    sensitive_words_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'sensitive_words.txt')
-    ideology_words_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'ideology_words.txt')
-    
-    # 创建数据目录
-    data_dir = os.path.dirname(sensitive_words_path)
-    os.makedirs(data_dir, exist_ok=True)
-    
-    # 如果文件不存在，创建示例文件
-    if not os.path.exists(sensitive_words_path):
-        with open(sensitive_words_path, 'w', encoding='utf-8') as f:
-            f.write("暴力\n色情\n赌博\n毒品\n")
-    
-    if not os.path.exists(ideology_words_path):
-        with open(ideology_words_path, 'w', encoding='utf-8') as f:
-            f.write("反动\n颠覆\n分裂\n")
-    
-    # 加载敏感词
-    sensitive_filter.parse_words(sensitive_words_path)
-    ideology_filter.parse_words(ideology_words_path)
+    """初始化过滤器，加载敏感词库（优先使用预编译产物，见 lexicon_store）"""
+    from .lexicon_store import load_lexicons
+    load_lexicons()
+
+def lexicon_version():
+    """全部词库（敏感词、意识形态词、错别字混淆集）的联合版本号"""
+    return lexicon_matcher.version
 
-def check_sensitive_content(text):
-    """检查敏感内容"""
+def check_sensitive_content(text, lexicon_hits=None):
+    """
+    检查敏感内容
+    :param lexicon_hits: 已有的 lexicon_matcher.scan(text) 结果；为空时自行扫描一次
+    """
+    if lexicon_hits is None:
+        lexicon_hits = lexicon_matcher.scan(text)
     issues = []
     
-    # 检查敏感词
-    sensitive_words = sensitive_filter.find_all(text)
-    for word_info in sensitive_words:
-        issues.append({
-            'type': 'sensitive',
-            'category': '敏感内容',
-            'position': {
-                'start': word_info['start'],
-                'end': word_info['end']
-            },
-            'original': word_info['word'],
-            'suggestion': '*' * len(word_info['word']),
-            'description': f'检测到敏感词汇: {word_info["word"]}',
-            'severity': 'high'
-        })
-    
-    # 检查意识形态问题
-    ideology_words = ideology_filter.find_all(text)
-    for word_info in ideology_words:
-        issues.append({
-            'type': 'sensitive',
-            'category': '意识形态问题',
-            'position': {
-                'start': word_info['start'],
-                'end': word_info['end']
-            },
-            'original': word_info['word'],
-            'suggestion': '[已删除]',
-            'description': f'检测到意识形态问题词汇: {word_info["word"]}',
-            'severity': 'high'
-        })
+    # 敏感词在前、意识形态词在后，各自按起止位置排序
+    for lexicon_id, description in (('sensitive', '检测到敏感词汇'), ('ideology', '检测到意识形态问题词汇')):
+        for start, end, payload in sorted(lexicon_hits.get(lexicon_id, ()), key=lambda h: (h[0], h[1])):
+            word = text[start:end]
+            issues.append(Issue(
+                SENSITIVE, start, end, word,
+                payload.replacement if payload.replacement is not None else '*' * len(word),
+                HIGH, LAYOUT_CATEGORIZED,
+                category=payload.category,
+                description=f'{description}: {word}',
+            ))
     
     return issues
-
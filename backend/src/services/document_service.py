@@ -13,7 +13,158 @@ import difflib
 from docx.shared import RGBColor, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
-import json
+from functools import lru_cache
+
+from . import transport
+
+# 审校报告 HTML 模板（模块加载时构建一次，渲染时只做字段填充）
+_REPORT_CSS = """
+<style>
+  body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, 'Noto Sans CJK SC', 'PingFang SC', 'Hiragino Sans GB', 'Microsoft YaHei', sans-serif; margin: 20px; }
+  h1, h2, h3 { margin: 0.6em 0; }
+  .muted { color: #666; }
+  .cover { border: 1px solid #eee; padding: 16px; border-radius: 8px; }
+  .badge { display:inline-block; background:#f5f5f5; border:1px solid #e5e5e5; padding:2px 6px; border-radius:6px; font-size:12px; color:#333; }
+  table { width: 100%; border-collapse: collapse; margin-top: 12px; }
+  th, td { border: 1px solid #ddd; padding: 8px; vertical-align: top; }
+  tr:nth-child(even) { background: #fafafa; }
+  .sev-high { color: #d32f2f; font-weight: 600; }
+  .sev-medium { color: #ef6c00; font-weight: 600; }
+  .sev-warning { color: #616161; }
+  .orig { color: #b91c1c; }
+  .arrow { color: #9e9e9e; padding: 0 6px; }
+  u { text-underline-offset: 4px; }
+  .actions { position: sticky; top: 0; background: #fff; padding: 10px 0; z-index: 10; border-bottom: 1px solid #eee; margin-bottom:12px; }
+  .btn { display:inline-flex; align-items:center; gap:6px; background:#1f6feb; color:#fff; border:none; border-radius:6px; padding:8px 12px; font-size:14px; cursor:pointer; }
+  .btn:hover { background:#1a5ec9; }
+</style>
+"""
+
+_REPORT_HEAD = """<html><head><meta charset='utf-8' />{css}</head>
+<body>
+  <div class='actions'>
+    <button id='exportBtn' class='btn' title='下载为 Word（结构化报告）'>
+      导出报告
+    </button>
+    <span class='muted' style='margin-left:8px;'>下载为 Word（结构化）</span>
+  </div>
+  <div class='cover'>
+    <h1>{title}</h1>
+    <div class='muted'>作者：{author}　·　导出时间：{export_time}</div>
+    <div style='margin-top:8px;'>
+      <span class='badge'>规则模式：{rules_mode}</span>
+      <span class='badge'>LLM：{qwen}</span>
+      <span class='badge'>字数：{chars}</span>
+      <span class='badge'>问题数：{total}</span>
+    </div>
+  </div>
+  <h2>摘要统计</h2>
+  <div class='muted'>错别字：{typos}　语法：{grammar}　标点：{punctuation}　敏感：{sensitive}</div>
+  <h2>问题清单</h2>
+  <table>
+    <thead>
+      <tr>
+        <th>#</th><th>类型</th><th>严重度</th><th>位置</th><th>原文</th><th>建议</th><th>说明</th><th>上下文</th>
+      </tr>
+    </thead>
+    <tbody>
+"""
+
+_REPORT_ROW = """      <tr>
+        <td>{0}</td>
+        <td>{1}</td>
+        <td class='{2}'>{3}</td>
+        <td>{4}-{5}</td>
+        <td class='orig'>{6}</td>
+        <td>{7}</td>
+        <td>{8}</td>
+        <td><code>{9}</code></td>
+      </tr>
+"""
+
+# 嵌入导出所需 payload（结构化报告），JSON 分段写出
+_REPORT_PAYLOAD_OPEN = """    </tbody>
+  </table>
+
+  <script id='__report_payload__' type='application/json'>"""
+
+_REPORT_TAIL = """</script>
+<script>
+(function(){
+  async function exportReport(){
+    try {
+      var el = document.getElementById('__report_payload__');
+      var payload = JSON.parse(el.textContent || '{}');
+      // 明确指定结构化报告模式
+      payload.mode = 'report';
+      var resp = await fetch('/api/export/word', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Accept': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' },
+        body: JSON.stringify(payload)
+      });
+      if (!resp.ok) throw new Error('导出失败: ' + resp.status);
+      var blob = await resp.blob();
+      var filename = (payload.title || '审校报告') + '.docx';
+      try {
+        var cd = resp.headers.get('Content-Disposition') || resp.headers.get('content-disposition') || '';
+        var m1 = /filename\\*?=([^;]+)/i.exec(cd);
+        if (m1) { filename = decodeURIComponent(m1[1].replace(/^UTF-8''/i, '').trim().replace(/^\"|\"$/g, '')); }
+        else { var m2 = /filename=\"?([^\";]+)\"?/i.exec(cd); if (m2) filename = m2[1]; }
+      } catch (e) {}
+      var url = window.URL.createObjectURL(blob);
+      var a = document.createElement('a');
+      a.href = url; a.download = filename;
+      document.body.appendChild(a); a.click(); a.remove();
+      setTimeout(function(){ window.URL.revokeObjectURL(url); }, 1000);
+    } catch (err) {
+      alert('导出报告失败：' + (err && err.message ? err.message : err));
+    }
+  }
+  var btn = document.getElementById('exportBtn');
+  if (btn) btn.addEventListener('click', exportReport);
+})();
+</script>
+</body></html>
+"""
+
+_SEVERITY_CLASSES = {'high': 'sev-high', 'medium': 'sev-medium', 'warning': 'sev-warning'}
+
+# 流式输出时累积到该字节数再产出一段，避免逐行写出的开销
+_REPORT_FLUSH_CHARS = 64 * 1024
+
+
+def _esc(s):
+    return (s or '').replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _json_embed(obj):
+    # 防止嵌入 <script> 的 JSON 提前闭合标签
+    return transport.dumps(obj).replace('</', '<\\/')
+
+
+@lru_cache(maxsize=8192)
+def diff_segments(orig, sug):
+    """
+    一次 SequenceMatcher 同时得到两侧的差异片段（相同的 原文/建议 对只计算一次）
+    :return: (原文片段, 建议片段)，每侧为 ((文本, 是否差异), ...)，不含空片段
+    """
+    orig_parts, sug_parts = [], []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(a=orig, b=sug).get_opcodes():
+        if i2 > i1:
+            orig_parts.append((orig[i1:i2], tag in ('replace', 'delete')))
+        if j2 > j1:
+            sug_parts.append((sug[j1:j2], tag in ('replace', 'insert')))
+    return tuple(orig_parts), tuple(sug_parts)
+
+
+@lru_cache(maxsize=8192)
+def diff_html(orig, sug):
+    """原文 / 建议两侧带 <u> 差异标记的 HTML 片段"""
+    sides = []
+    for parts in diff_segments(orig, sug):
+        sides.append(''.join(f'<u>{_esc(seg)}</u>' if changed else _esc(seg) for seg, changed in parts))
+    return sides[0], sides[1]
+
 
 class DocumentService:
     def __init__(self):
@@ -23,10 +174,17 @@ class DocumentService:
 
     def render_report_html(self, content, result, meta=None):
         """
-        生成可打印的审校报告 HTML（用于前端预览或前端导出为 PDF）。
+        生成可打印的审校报告 HTML（用于前端预览或前端导出为 PDF），一次性返回完整字符串。
+        大报告请使用 iter_report_html 流式输出。
+        """
+        return ''.join(self.iter_report_html(content, result, meta))
+
+    def iter_report_html(self, content, result, meta=None):
+        """
+        流式生成审校报告 HTML，按约 64KB 分段产出。
         - 原文为红色
         - 建议为默认颜色
-        - 仅差异字符添加下划线
+        - 仅差异字符添加下划线（每个问题只做一次 diff）
         """
         meta = meta or {}
         title = meta.get('title') or '审校报告'
@@ -35,174 +193,63 @@ class DocumentService:
         qwen_enabled = bool(meta.get('qwen', True))
         stats = (result or {}).get('statistics') or {}
         issues = (result or {}).get('issues') or []
+        content_len = len(content)
 
-        def esc(s):
-            return (s or '').replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-
-        def context_snippet(pos):
-            try:
-                s = pos.get('start', 0); e = pos.get('end', 0)
-                left = max(0, s - 20); right = min(len(content), e + 20)
-                snippet = content[left:right]
-                return esc(snippet)
-            except Exception:
-                return ''
-
-        # 简易 diff，返回两个带 <u> 的 HTML 片段
-        def diff_html(orig, sug, is_original):
-            orig = orig or ''
-            sug = sug or ''
-            sm = difflib.SequenceMatcher(a=orig, b=sug)
-            parts = []
-            for tag, i1, i2, j1, j2 in sm.get_opcodes():
-                if is_original:
-                    seg = esc(orig[i1:i2])
-                    if tag in ('replace', 'delete') and seg:
-                        parts.append(f'<u>{seg}</u>')
-                    else:
-                        parts.append(seg)
-                else:
-                    seg = esc(sug[j1:j2])
-                    if tag in ('replace', 'insert') and seg:
-                        parts.append(f'<u>{seg}</u>')
-                    else:
-                        parts.append(seg)
-            return ''.join(parts)
-
-        css = """
-        <style>
-          body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, 'Noto Sans CJK SC', 'PingFang SC', 'Hiragino Sans GB', 'Microsoft YaHei', sans-serif; margin: 20px; }
-          h1, h2, h3 { margin: 0.6em 0; }
-          .muted { color: #666; }
-          .cover { border: 1px solid #eee; padding: 16px; border-radius: 8px; }
-          .badge { display:inline-block; background:#f5f5f5; border:1px solid #e5e5e5; padding:2px 6px; border-radius:6px; font-size:12px; color:#333; }
-          table { width: 100%; border-collapse: collapse; margin-top: 12px; }
-          th, td { border: 1px solid #ddd; padding: 8px; vertical-align: top; }
-          tr:nth-child(even) { background: #fafafa; }
-          .sev-high { color: #d32f2f; font-weight: 600; }
-          .sev-medium { color: #ef6c00; font-weight: 600; }
-          .sev-warning { color: #616161; }
-          .orig { color: #b91c1c; }
-          .arrow { color: #9e9e9e; padding: 0 6px; }
-          u { text-underline-offset: 4px; }
-          .actions { position: sticky; top: 0; background: #fff; padding: 10px 0; z-index: 10; border-bottom: 1px solid #eee; margin-bottom:12px; }
-          .btn { display:inline-flex; align-items:center; gap:6px; background:#1f6feb; color:#fff; border:none; border-radius:6px; padding:8px 12px; font-size:14px; cursor:pointer; }
-          .btn:hover { background:#1a5ec9; }
-        </style>
-        """
+        buffer = [_REPORT_HEAD.format(
+            css=_REPORT_CSS,
+            title=_esc(title),
+            author=_esc(author),
+            export_time=meta.get('export_time') or '',
+            rules_mode=_esc(rules_mode),
+            qwen='启用' if qwen_enabled else '关闭',
+            chars=content_len,
+            total=stats.get('total_issues', 0),
+            typos=stats.get('typos', 0),
+            grammar=stats.get('grammar', 0),
+            punctuation=stats.get('punctuation', 0),
+            sensitive=stats.get('sensitive', 0),
+        )]
+        size = len(buffer[0])
 
-        rows = []
+        row = _REPORT_ROW.format
         for idx, it in enumerate(issues, start=1):
-            t = esc(it.get('type') or '-')
-            sev = (it.get('severity') or 'warning').lower()
-            sev_class = {
-                'high': 'sev-high', 'medium': 'sev-medium', 'warning': 'sev-warning'
-            }.get(sev, 'sev-warning')
+            severity = it.get('severity') or 'warning'
             pos = it.get('position') or {}
-            pos_text = f"{pos.get('start', 0)}-{pos.get('end', 0)}"
-            orig = it.get('original') or ''
-            sug = it.get('suggestion') or ''
-            msg = esc(it.get('message') or it.get('description') or '')
-            ctx = context_snippet(pos)
-            orig_html = diff_html(orig, sug, True)
-            sug_html = diff_html(orig, sug, False)
-            rows.append(f"""
-              <tr>
-                <td>{idx}</td>
-                <td>{t}</td>
-                <td class='{sev_class}'>{esc(it.get('severity') or 'warning')}</td>
-                <td>{pos_text}</td>
-                <td class='orig'>{orig_html}</td>
-                <td>{sug_html}</td>
-                <td>{msg}</td>
-                <td><code>{ctx}</code></td>
-              </tr>
-            """)
-
-        # 嵌入导出所需 payload（结构化报告）
-        payload = {
-            'content': content,
-            'result': {
-                'issues': issues,
-                'statistics': stats,
-            },
-            'title': title,
-            'author': author,
-        }
-        payload_json = json.dumps(payload, ensure_ascii=False).replace('</', '<\\/')
-
-        html = f"""
-        <html><head><meta charset='utf-8' />{css}</head>
-        <body>
-          <div class='actions'>
-            <button id='exportBtn' class='btn' title='下载为 Word（结构化报告）'>
-              导出报告
-            </button>
-            <span class='muted' style='margin-left:8px;'>下载为 Word（结构化）</span>
-          </div>
-          <div class='cover'>
-            <h1>{esc(title)}</h1>
-            <div class='muted'>作者：{esc(author)}　·　导出时间：{meta.get('export_time') or ''}</div>
-            <div style='margin-top:8px;'>
-              <span class='badge'>规则模式：{esc(rules_mode)}</span>
-              <span class='badge'>LLM：{'启用' if qwen_enabled else '关闭'}</span>
-              <span class='badge'>字数：{len(content)}</span>
-              <span class='badge'>问题数：{stats.get('total_issues', 0)}</span>
-            </div>
-          </div>
-          <h2>摘要统计</h2>
-          <div class='muted'>错别字：{stats.get('typos',0)}　语法：{stats.get('grammar',0)}　标点：{stats.get('punctuation',0)}　敏感：{stats.get('sensitive',0)}</div>
-          <h2>问题清单</h2>
-          <table>
-            <thead>
-              <tr>
-                <th>#</th><th>类型</th><th>严重度</th><th>位置</th><th>原文</th><th>建议</th><th>说明</th><th>上下文</th>
-              </tr>
-            </thead>
-            <tbody>
-              {''.join(rows)}
-            </tbody>
-          </table>
-
-          <script id='__report_payload__' type='application/json'>{payload_json}</script>
-          <script>
-          (function(){{
-            async function exportReport(){{
-              try {{
-                var el = document.getElementById('__report_payload__');
-                var payload = JSON.parse(el.textContent || '{{}}');
-                // 明确指定结构化报告模式
-                payload.mode = 'report';
-                var resp = await fetch('/api/export/word', {{
-                  method: 'POST',
-                  headers: {{ 'Content-Type': 'application/json', 'Accept': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' }},
-                  body: JSON.stringify(payload)
-                }});
-                if (!resp.ok) throw new Error('导出失败: ' + resp.status);
-                var blob = await resp.blob();
-                var filename = (payload.title || '审校报告') + '.docx';
-                try {{
-                  var cd = resp.headers.get('Content-Disposition') || resp.headers.get('content-disposition') || '';
-                  var m1 = /filename\*?=([^;]+)/i.exec(cd);
-                  if (m1) {{ filename = decodeURIComponent(m1[1].replace(/^UTF-8''/i, '').trim().replace(/^\"|\"$/g, '')); }}
-                  else {{ var m2 = /filename=\"?([^\";]+)\"?/i.exec(cd); if (m2) filename = m2[1]; }}
-                }} catch (e) {{}}
-                var url = window.URL.createObjectURL(blob);
-                var a = document.createElement('a');
-                a.href = url; a.download = filename;
-                document.body.appendChild(a); a.click(); a.remove();
-                setTimeout(function(){{ window.URL.revokeObjectURL(url); }}, 1000);
-              }} catch (err) {{
-                alert('导出报告失败：' + (err && err.message ? err.message : err));
-              }}
-            }}
-            var btn = document.getElementById('exportBtn');
-            if (btn) btn.addEventListener('click', exportReport);
-          }})();
-          </script>
-        </body></html>
-        """
-        return html
+            start = pos.get('start', 0)
+            end = pos.get('end', 0)
+            orig_html, sug_html = diff_html(it.get('original') or '', it.get('suggestion') or '')
+            line = row(
+                idx,
+                _esc(it.get('type') or '-'),
+                _SEVERITY_CLASSES.get(severity.lower(), 'sev-warning'),
+                _esc(severity),
+                start, end,
+                orig_html,
+                sug_html,
+                _esc(it.get('message') or it.get('description') or ''),
+                _esc(self._extract_context(content, pos)),
+            )
+            buffer.append(line)
+            size += len(line)
+            if size >= _REPORT_FLUSH_CHARS:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+
+        buffer.append(_REPORT_PAYLOAD_OPEN)
+        buffer.append('{"content":')
+        buffer.append(_json_embed(content))
+        buffer.append(',"result":{"issues":[')
+        for idx, it in enumerate(issues):
+            part = _json_embed(it) if idx == 0 else ',' + _json_embed(it)
+            buffer.append(part)
+            size += len(part)
+            if size >= _REPORT_FLUSH_CHARS:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+        buffer.append('],"statistics":' + _json_embed(stats) + '},')
+        buffer.append('"title":' + _json_embed(title) + ',"author":' + _json_embed(author) + '}')
+        buffer.append(_REPORT_TAIL)
+        yield ''.join(buffer)
 
     def docx_from_report(self, content, result, title="审校报告", author="", meta=None):
         """
@@ -285,22 +332,13 @@ class DocumentService:
         # 清空默认段落内容
         for r in p.runs:
             r.clear()
-        sm = difflib.SequenceMatcher(a=orig or '', b=sug or '')
-        for tag, i1, i2, j1, j2 in sm.get_opcodes():
+        orig_parts, sug_parts = diff_segments(orig or '', sug or '')
+        for seg, changed in (orig_parts if original_side else sug_parts):
+            run = p.add_run(seg)
             if original_side:
-                seg = (orig or '')[i1:i2]
-                if not seg:
-                    continue
-                run = p.add_run(seg)
                 run.font.color.rgb = RGBColor(0xB9, 0x1C, 0x1C)  # 红色
-                run.underline = tag in ('replace', 'delete')
-            else:
-                seg = (sug or '')[j1:j2]
-                if not seg:
-                    continue
-                run = p.add_run(seg)
-                # 默认颜色
-                run.underline = tag in ('replace', 'insert')
+            # 建议侧为默认颜色
+            run.underline = changed
         return cell
 
     def html_to_docx(self, html_content, title="文档", author=""):
@@ -0,0 +1,175 @@
+"""
+Word (.docx) 导入审校
+- iter_paragraphs：以 lxml iterparse 流式解析 word/document.xml，逐段产出段落及其 run 文本，
+  处理完的元素立即释放，内存占用与文档长度无关；
+- DocxLocator：全文偏移 → (段落, run, run 内偏移) 映射，已审校完的段落可随时释放；
+- proofread_docx：段落按文档顺序送入 engine.proofread_stream（沿用引擎的段落级切块），
+  每个问题附带其在源文件中的位置。
+
+段落序号按文档顺序（含表格内段落）从 0 计数；run 序号为段落内 w:r 的顺序（含超链接、修订插入中的 run）。
+修订删除的文本（w:delText）不参与审校。
+"""
+
+import zipfile
+from bisect import bisect_right
+
+from lxml import etree
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W_P = f'{{{W_NS}}}p'
+W_R = f'{{{W_NS}}}r'
+W_T = f'{{{W_NS}}}t'
+W_TAB = f'{{{W_NS}}}tab'
+W_BR = f'{{{W_NS}}}br'
+W_CR = f'{{{W_NS}}}cr'
+
+DOCUMENT_PART = 'word/document.xml'
+
+
+class DocumentTooLarge(Exception):
+    pass
+
+
+class DocxParagraph:
+    """一个段落：index 为文档内段落序号，runs 为各 run 的文本"""
+
+    __slots__ = ('index', 'runs')
+
+    def __init__(self, index, runs):
+        self.index = index
+        self.runs = runs
+
+    @property
+    def text(self):
+        return ''.join(self.runs)
+
+
+def open_document_xml(source):
+    """
+    打开 .docx 中的正文部件，返回可读的二进制流（不整体解压到内存）
+    :param source: 文件路径或可 seek 的二进制文件对象
+    :raises ValueError: 不是有效的 .docx 文件
+    """
+    try:
+        archive = zipfile.ZipFile(source)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise ValueError(f'不是有效的 .docx 文件: {str(e)}')
+    try:
+        return archive.open(DOCUMENT_PART)
+    except KeyError:
+        archive.close()
+        raise ValueError(f'不是有效的 .docx 文件: 缺少 {DOCUMENT_PART}')
+
+
+def _run_text(run):
+    parts = []
+    for node in run.iter(W_T, W_TAB, W_BR, W_CR):
+        if node.tag == W_T:
+            parts.append(node.text or '')
+        elif node.tag == W_TAB:
+            parts.append('\t')
+        else:
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def iter_paragraphs(stream):
+    """
+    流式产出 DocxParagraph。
+    文本框等嵌套段落先于外层段落产出，产出后即被清空，不会在外层段落中重复计入。
+    """
+    index = 0
+    for _, element in etree.iterparse(stream, events=('end',), tag=W_P, huge_tree=True):
+        runs = [_run_text(run) for run in element.iter(W_R)]
+        yield DocxParagraph(index, runs)
+        index += 1
+        # 释放已处理的段落及之前的兄弟节点
+        element.clear(keep_tail=True)
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+
+class DocxLocator:
+    """全文偏移到源文件位置的映射；段落之间以一个换行符连接"""
+
+    def __init__(self):
+        self._starts = []     # 段落在全文中的起点
+        self._paragraphs = []  # 段落序号
+        self._runs = []       # [(run 起点列表, run 序号列表, 段落长度)]，只登记非空 run
+        self.length = 0
+
+    def add(self, paragraph):
+        run_starts, run_indexes = [], []
+        local = 0
+        for i, text in enumerate(paragraph.runs):
+            if text:
+                run_starts.append(local)
+                run_indexes.append(i)
+                local += len(text)
+        self._starts.append(self.length)
+        self._paragraphs.append(paragraph.index)
+        self._runs.append((run_starts, run_indexes, local))
+        self.length += local + 1
+
+    def locate(self, pos):
+        """返回 {'paragraph', 'run', 'offset'}；段尾换行符处定位到末个 run 的末尾"""
+        k = bisect_right(self._starts, pos) - 1
+        if k < 0:
+            raise KeyError(pos)
+        run_starts, run_indexes, size = self._runs[k]
+        local = min(pos - self._starts[k], size)
+        if not run_starts:
+            return {'paragraph': self._paragraphs[k], 'run': None, 'offset': 0}
+        j = max(0, bisect_right(run_starts, local) - 1)
+        return {'paragraph': self._paragraphs[k], 'run': run_indexes[j], 'offset': local - run_starts[j]}
+
+    def locate_span(self, start, end):
+        """区间定位，end 为开区间：按最后一个字符定位后加一，避免落到下一个 run 的开头"""
+        first = self.locate(start)
+        if end <= start:
+            return {'start': first, 'end': dict(first)}
+        last = self.locate(end - 1)
+        last['offset'] += 1
+        return {'start': first, 'end': last}
+
+    def release(self, pos):
+        """释放整体位于 pos 之前的段落（保留包含 pos 的段落）"""
+        k = bisect_right(self._starts, pos) - 1
+        if k > 0:
+            del self._starts[:k]
+            del self._paragraphs[:k]
+            del self._runs[:k]
+
+
+def proofread_docx(engine, stream, options=None, max_chars=0):
+    """
+    审校 .docx 正文，按块产出 (event, data)：
+      - chunk：与 engine.proofread_stream 相同，每个问题另带 location（start/end 的段落、run、偏移）
+      - done：另带 paragraphs（段落数）
+    :param stream: open_document_xml 返回的正文流
+    :param max_chars: 字符数上限，0 表示不限制；超出时抛出 DocumentTooLarge
+    """
+    locator = DocxLocator()
+    paragraphs = 0
+
+    def pieces():
+        nonlocal paragraphs
+        for paragraph in iter_paragraphs(stream):
+            locator.add(paragraph)
+            paragraphs += 1
+            if max_chars and locator.length > max_chars:
+                raise DocumentTooLarge()
+            yield paragraph.text + '\n'
+
+    for event, payload in engine.proofread_stream(pieces(), options):
+        if event == 'chunk':
+            for issue in payload['issues']:
+                position = issue['position']
+                issue['location'] = locator.locate_span(position['start'], position['end'])
+            # 后续块都从本块末尾开始
+            locator.release(payload['offset'] + payload['length'])
+        else:
+            payload['paragraphs'] = paragraphs
+        yield event, payload
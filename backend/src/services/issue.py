@@ -0,0 +1,103 @@
+"""
+引擎内部的紧凑问题表示
+检查器与引擎之间传递 Issue 对象：__slots__ 存储、类型与严重度为整数编码、位置为两个整数字段，
+不再为每个问题创建嵌套的 position 字典、重复的 suggestions 列表与 uuid 字符串。
+仅在引擎对外返回结果时（proofread / proofread_events）转换为 API 约定的 JSON 结构。
+"""
+
+import uuid
+from itertools import count
+
+# 问题类型编码
+TYPO, GRAMMAR, PUNCTUATION, SENSITIVE = range(4)
+TYPE_NAMES = ('typo', 'grammar', 'punctuation', 'sensitive')
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+# 严重度编码
+HIGH, MEDIUM, LOW, WARNING, INFO = range(5)
+SEVERITY_NAMES = ('high', 'medium', 'low', 'warning', 'info')
+SEVERITY_CODES = {name: code for code, name in enumerate(SEVERITY_NAMES)}
+
+# 字段布局：决定 to_dict 输出哪些键及其顺序（与各检查器原有的 JSON 结构一致）
+LAYOUT_RULE_TYPO = ('type', 'message', 'original', 'suggestion', 'position', 'suggestions', 'severity', 'subtype')
+# 规则语法问题不提供具体建议，suggestions 输出空列表
+LAYOUT_RULE_GRAMMAR = ('type', 'message', 'original', 'suggestion', 'position', 'suggestions', 'severity')
+# 标点与敏感词
+LAYOUT_CATEGORIZED = ('type', 'category', 'position', 'original', 'suggestion', 'description', 'severity')
+# 敏感词经 LLM 补充解释后
+LAYOUT_CATEGORIZED_EXPLAINED = LAYOUT_CATEGORIZED + ('message', 'source', 'subtype')
+LAYOUT_QWEN = ('type', 'message', 'position', 'original', 'suggestion', 'suggestions', 'severity', 'source')
+LAYOUT_QWEN_STYLE = LAYOUT_QWEN + ('subtype',)
+# 从自然语言回复中提取的 LLM 建议（不带 source）
+LAYOUT_QWEN_TEXT = ('type', 'message', 'position', 'original', 'suggestion', 'suggestions', 'severity')
+
+
+class Issue:
+    __slots__ = (
+        'type', 'severity', 'start', 'end', 'original', 'suggestion',
+        'message', 'description', 'category', 'subtype', 'source', 'id', 'layout',
+    )
+
+    def __init__(self, type, start, end, original, suggestion, severity, layout,
+                 message=None, description=None, category=None, subtype=None, source=None):
+        self.type = type
+        self.severity = severity
+        self.start = start
+        self.end = end
+        self.original = original
+        self.suggestion = suggestion
+        self.message = message
+        self.description = description
+        self.category = category
+        self.subtype = subtype
+        self.source = source
+        self.id = None
+        self.layout = layout
+
+    @property
+    def type_name(self):
+        return TYPE_NAMES[self.type]
+
+    @property
+    def severity_name(self):
+        return SEVERITY_NAMES[self.severity]
+
+    def shifted(self, offset):
+        """返回平移 offset 后的副本（不修改原对象）"""
+        moved = Issue.__new__(Issue)
+        for name in Issue.__slots__:
+            setattr(moved, name, getattr(self, name))
+        moved.start += offset
+        moved.end += offset
+        return moved
+
+    def to_dict(self, offset=0):
+        """转换为 API 的 JSON 结构（可同时平移 offset）"""
+        result = {}
+        for key in self.layout:
+            if key == 'type':
+                result['type'] = TYPE_NAMES[self.type]
+            elif key == 'severity':
+                result['severity'] = SEVERITY_NAMES[self.severity]
+            elif key == 'position':
+                result['position'] = {'start': self.start + offset, 'end': self.end + offset}
+            elif key == 'suggestions':
+                result['suggestions'] = [] if self.layout is LAYOUT_RULE_GRAMMAR else [self.suggestion]
+            else:
+                result[key] = getattr(self, key)
+        if self.id is not None:
+            result['id'] = self.id
+        return result
+
+    def __repr__(self):
+        return f'Issue({TYPE_NAMES[self.type]}, {self.start}, {self.end}, {self.original!r} -> {self.suggestion!r})'
+
+
+def id_allocator():
+    """
+    单次请求内的问题 ID 生成器：随机前缀 + 递增序号。
+    每个请求只生成一次随机数，ID 在请求内唯一、跨请求几乎不会冲突。
+    """
+    prefix = uuid.uuid4().hex[:12]
+    counter = count(1)
+    return lambda: f'{prefix}-{next(counter)}'
@@ -0,0 +1,303 @@
+"""
+异步审校任务队列
+提交后立即返回任务 ID，由固定大小的 worker 线程池按提交顺序执行，与 HTTP 请求超时解耦。
+任务、阶段事件与结果持久化在本地 SQLite（WAL），多个 web 进程共享同一队列；
+进程崩溃后，心跳超时的运行中任务会被重新排队（超过最大尝试次数则标记失败）。
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+from .sqlite_store import SQLiteStore
+from . import transport
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    content TEXT NOT NULL,
+    options TEXT NOT NULL,
+    characters INTEGER NOT NULL,
+    chunks_done INTEGER NOT NULL DEFAULT 0,
+    chunks_total INTEGER,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+DEFAULT_QUEUE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'jobs', 'jobs.sqlite3')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+TERMINAL_STATES = (DONE, FAILED)
+
+
+class LeaseLost(Exception):
+    """任务已被重新排队并由其他 worker 认领"""
+    pass
+
+
+class JobQueue:
+    # 运行中任务超过该秒数未更新心跳，视为所在进程已退出
+    STALE_SECONDS = 600
+    # 重新排队中断任务、清理过期任务的间隔（秒）
+    MAINTENANCE_INTERVAL = 60
+
+    def __init__(self, engine, path=None, workers=None, max_attempts=None, retention=None, poll_interval=None):
+        """
+        :param engine: ProofreadingEngine 实例
+        :param path: SQLite 文件路径（默认 JOB_QUEUE_PATH 或 data/jobs 下）
+        :param workers: worker 线程数（默认 JOB_WORKERS，2）
+        :param max_attempts: 崩溃后重新排队的最大尝试次数（默认 JOB_MAX_ATTEMPTS，2）
+        :param retention: 已结束任务的保留秒数（默认 JOB_RETENTION_SECONDS，1 天）
+        :param poll_interval: 空闲 worker 检查其他进程提交任务的间隔（默认 JOB_POLL_INTERVAL，1 秒）
+        """
+        self.engine = engine
+        self.store = SQLiteStore(path or os.getenv('JOB_QUEUE_PATH') or DEFAULT_QUEUE_PATH, _SCHEMA)
+        self.workers = int(workers or os.getenv('JOB_WORKERS', 2))
+        self.max_attempts = int(max_attempts or os.getenv('JOB_MAX_ATTEMPTS', 2))
+        self.retention = float(retention or os.getenv('JOB_RETENTION_SECONDS', 86400))
+        self.poll_interval = float(poll_interval or os.getenv('JOB_POLL_INTERVAL', 1.0))
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._started_pid = None
+        self._stopping = False
+        self._maintenance_at = 0.0
+
+    # ---------- 提交与查询 ----------
+
+    def submit(self, content, options=None):
+        """写入队列并唤醒空闲 worker，返回任务 ID"""
+        job_id = uuid.uuid4().hex
+        self.store.connection().execute(
+            'INSERT INTO jobs (id, status, content, options, characters, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (job_id, QUEUED, content, json.dumps(options or {}, ensure_ascii=False), len(content), time.time())
+        )
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id, include_result=True):
+        """任务状态、进度与（完成时的）结果；不存在时返回 None"""
+        conn = self.store.connection()
+        row = conn.execute(
+            'SELECT status, characters, chunks_done, chunks_total, result, error, attempts, '
+            'created_at, started_at, finished_at FROM jobs WHERE id = ?', (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, characters, chunks_done, chunks_total, result, error, attempts, created_at, started_at, finished_at = row
+        job = {
+            'id': job_id,
+            'status': status,
+            'characters': characters,
+            'progress': {'chunks_done': chunks_done, 'chunks_total': chunks_total},
+            'attempts': attempts,
+            'created_at': created_at,
+            'started_at': started_at,
+            'finished_at': finished_at,
+        }
+        if status == QUEUED:
+            job['queue_position'] = conn.execute(
+                'SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at <= ?', (QUEUED, created_at)
+            ).fetchone()[0]
+        if status == DONE and include_result:
+            job['result'] = json.loads(result)
+        if status == FAILED:
+            job['error'] = error
+        return job
+
+    def events_after(self, job_id, seq=0):
+        """返回 seq 之后的阶段事件 [(seq, event, data 字符串)]"""
+        return self.store.connection().execute(
+            'SELECT seq, event, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq', (job_id, seq)
+        ).fetchall()
+
+    def stats(self):
+        counts = dict(self.store.connection().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+        return {
+            'workers': self.workers,
+            'running': self._started_pid == os.getpid(),
+            **{state: counts.get(state, 0) for state in (QUEUED, RUNNING, DONE, FAILED)},
+        }
+
+    # ---------- worker 池 ----------
+
+    def start(self):
+        """启动 worker 线程（幂等；fork 后的子进程会重新启动自己的线程）"""
+        with self._wakeup:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+            self._stopping = False
+            self._threads = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f'proofread-job-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"[JobQueue] Started {self.workers} workers, queue: {self.store.path}")
+
+    def stop(self, timeout=None):
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._started_pid = None
+
+    def requeue_stale(self):
+        """心跳超时的运行中任务重新排队，尝试次数用尽的标记失败"""
+        deadline = time.time() - self.STALE_SECONDS
+        with self.store.transaction() as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, finished_at = ? '
+                'WHERE status = ? AND heartbeat_at < ? AND attempts >= ?',
+                (FAILED, '任务执行中断且超过最大尝试次数', time.time(), RUNNING, deadline, self.max_attempts)
+            )
+            requeued = conn.execute(
+                'UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat_at < ?',
+                (QUEUED, RUNNING, deadline)
+            ).rowcount
+        if requeued:
+            print(f"[JobQueue] Requeued {requeued} interrupted jobs")
+        return requeued
+
+    def cleanup(self):
+        """删除保留期之外的已结束任务及其事件"""
+        deadline = time.time() - self.retention
+        with self.store.transaction() as conn:
+            expired = [row[0] for row in conn.execute(
+                'SELECT id FROM jobs WHERE status IN (?, ?) AND finished_at < ?', (DONE, FAILED, deadline)
+            )]
+            conn.executemany('DELETE FROM job_events WHERE job_id = ?', [(job_id,) for job_id in expired])
+            conn.executemany('DELETE FROM jobs WHERE id = ?', [(job_id,) for job_id in expired])
+        return len(expired)
+
+    def _claim(self, worker):
+        """
+        按提交顺序认领一个排队任务（BEGIN IMMEDIATE 保证多进程下只被认领一次）。
+        每次认领生成新的租约标记写入 worker 列，之后的写入都以它为条件：
+        任务被判定中断并重新排队后，原 worker 的迟到写入不会覆盖新一轮执行。
+        """
+        now = time.time()
+        lease = f'{worker}:{uuid.uuid4().hex[:8]}'
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                'SELECT id, content, options FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1', (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                'UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, started_at = ?, heartbeat_at = ?, '
+                'chunks_done = 0, chunks_total = NULL WHERE id = ?',
+                (RUNNING, lease, now, now, row[0])
+            )
+            # 重新执行时清除上一次的阶段事件
+            conn.execute('DELETE FROM job_events WHERE job_id = ?', (row[0],))
+        return row[0], lease, row[1], json.loads(row[2])
+
+    def _worker_loop(self):
+        worker = f'{os.getpid()}:{threading.current_thread().name}'
+        while not self._stopping:
+            try:
+                self._maintain()
+                job = self._claim(worker)
+            except sqlite3.Error as e:
+                print(f"[JobQueue] Claim failed: {str(e)}")
+                job = None
+            if job is None:
+                with self._wakeup:
+                    if not self._stopping:
+                        self._wakeup.wait(self.poll_interval)
+                continue
+            self._run(*job)
+
+    def _maintain(self):
+        # 进程内只由一个 worker 执行
+        with self._wakeup:
+            now = time.time()
+            if now - self._maintenance_at < self.MAINTENANCE_INTERVAL:
+                return
+            self._maintenance_at = now
+        self.requeue_stale()
+        self.cleanup()
+
+    def _run(self, job_id, lease, content, options):
+        start_time = time.time()
+        conn = self.store.connection()
+        seq = 0
+        chunks_done = 0
+        try:
+            for event, payload in self.engine.proofread_events(content, options):
+                now = time.time()
+                if event == 'final':
+                    updated = conn.execute(
+                        'UPDATE jobs SET status = ?, result = ?, chunks_done = COALESCE(chunks_total, ?), '
+                        'finished_at = ?, heartbeat_at = ? WHERE id = ? AND worker = ?',
+                        (DONE, transport.dumps(payload), chunks_done, now, now, job_id, lease)
+                    ).rowcount
+                    if not updated:
+                        raise LeaseLost()
+                    break
+                seq += 1
+                if event == 'llm':
+                    chunks_done += 1
+                total = payload.get('chunks')
+                with self.store.transaction() as tx:
+                    updated = tx.execute(
+                        'UPDATE jobs SET chunks_done = ?, chunks_total = COALESCE(?, chunks_total), heartbeat_at = ? '
+                        'WHERE id = ? AND worker = ?',
+                        (chunks_done, total, now, job_id, lease)
+                    ).rowcount
+                    if not updated:
+                        raise LeaseLost()
+                    tx.execute(
+                        'INSERT INTO job_events (job_id, seq, event, data) VALUES (?, ?, ?, ?)',
+                        (job_id, seq, event, transport.dumps(payload))
+                    )
+            print(f"[JobQueue] Job {job_id} finished in {time.time() - start_time:.2f}s")
+        except LeaseLost:
+            print(f"[JobQueue] Job {job_id} was requeued elsewhere, abandoning this run")
+        except Exception as e:
+            print(f"[JobQueue] Job {job_id} failed: {str(e)}")
+            try:
+                conn.execute(
+                    'UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND worker = ?',
+                    (FAILED, str(e), time.time(), job_id, lease)
+                )
+            except sqlite3.Error as db_error:
+                print(f"[JobQueue] Failed to record failure: {str(db_error)}")
+
+
+_shared_queue = None
+_shared_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """获取进程内共享的任务队列（懒创建，使用全局审校引擎）"""
+    global _shared_queue
+    if _shared_queue is None:
+        with _shared_queue_lock:
+            if _shared_queue is None:
+                from .proofreading_engine import proofreading_engine
+                _shared_queue = JobQueue(proofreading_engine)
+    return _shared_queue
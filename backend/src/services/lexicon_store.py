@@ -0,0 +1,281 @@
+"""
+词库预编译与热更新
+将 data 目录下的文本词库与代码内置词库（错别字混淆集）编译为带版本号的二进制产物，
+启动时直接加载状态表而不必逐词重建自动机；词库文件变化时在后台重新加载并原子切换，
+无需重启 worker。
+
+构建产物（在 backend 目录下）：
+    python -m src.services.lexicon_store build [--output PATH]
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import hashlib
+import threading
+from .dfa_filter import lexicon_matcher, LexiconMatcher
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+# 文本词库：lexicon_id -> (文件名, 分类, 替换建议)
+FILE_LEXICONS = {
+    'sensitive': ('sensitive_words.txt', '敏感内容', None),
+    'ideology': ('ideology_words.txt', '意识形态问题', '[已删除]'),
+}
+
+ARTIFACT_MAGIC = b'IPLEX\n'
+ARTIFACT_FORMAT = 1
+
+_state = {
+    'fingerprint': None,
+    'version': None,
+    'source': None,
+    'loaded_at': None,
+    'load_seconds': None,
+    'reloads': 0,
+}
+_load_lock = threading.Lock()
+
+
+def data_dir():
+    return os.getenv('LEXICON_DATA_DIR') or DATA_DIR
+
+def artifact_path():
+    return os.getenv('LEXICON_ARTIFACT_PATH') or os.path.join(data_dir(), 'lexicons.bin')
+
+def _source_path(lexicon_id):
+    return os.path.join(data_dir(), FILE_LEXICONS[lexicon_id][0])
+
+def read_source_words():
+    """读取文本词库：{lexicon_id: [word, ...]}，文件缺失时视为空词库"""
+    sources = {}
+    for lexicon_id in FILE_LEXICONS:
+        path = _source_path(lexicon_id)
+        try:
+            with open(path, encoding='utf-8') as f:
+                sources[lexicon_id] = [line.strip() for line in f if line.strip()]
+        except FileNotFoundError:
+            print(f"敏感词文件 {path} 不存在")
+            sources[lexicon_id] = []
+    return sources
+
+def source_fingerprint(sources):
+    """文本词库内容摘要，用于判断预编译产物是否过期"""
+    h = hashlib.sha1()
+    for lexicon_id in sorted(sources):
+        h.update(lexicon_id.encode('utf-8') + b'\x00')
+        for word in sources[lexicon_id]:
+            h.update(word.encode('utf-8') + b'\n')
+        h.update(b'\x00')
+    return h.hexdigest()
+
+def _file_entries(sources):
+    entries = {}
+    for lexicon_id, words in sources.items():
+        _, category, replacement = FILE_LEXICONS[lexicon_id]
+        entries[lexicon_id] = [(w, category, replacement) for w in words]
+    return entries
+
+def _python_tag():
+    return f'{sys.version_info[0]}.{sys.version_info[1]}'
+
+
+def build_artifact(path=None):
+    """
+    编译词库产物：文本词库 + 当前已注册的代码内置词库。
+    在独立的匹配器上编译，不改动进程内正在使用的词库（切换统一由 load_lexicons 在锁内完成）。
+    文件格式：MAGIC + 一行 JSON 头（格式版本、词库版本、源文件摘要）+ pickle 状态表。
+    先写临时文件再 os.replace，正在读取旧产物的进程不受影响。
+    """
+    path = path or artifact_path()
+    sources = read_source_words()
+    entries = {
+        lexicon_id: [(w, c, r) for w, (c, r) in words.items()]
+        for lexicon_id, words in lexicon_matcher.lexicons().items()
+        if lexicon_id not in FILE_LEXICONS
+    }
+    entries.update(_file_entries(sources))
+    builder = LexiconMatcher()
+    builder.replace_lexicons(entries)
+    snapshot = builder.snapshot()
+    header = {
+        'format': ARTIFACT_FORMAT,
+        'python': _python_tag(),
+        'version': snapshot['tables']['version'],
+        'sources': source_fingerprint(sources),
+        'built_at': time.time(),
+        'lexicons': {lexicon_id: len(words) for lexicon_id, words in snapshot['lexicons'].items()},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(ARTIFACT_MAGIC)
+        f.write(json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n')
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    print(f"[Lexicon] Built artifact {path} (version {header['version']}, {header['lexicons']})")
+    return header
+
+def read_artifact(path=None, expected_sources=None):
+    """
+    读取预编译产物，返回 (header, snapshot)。
+    文件缺失、格式/解释器版本不符或源文件摘要不一致时返回 None（调用方回退到文本编译）。
+    """
+    path = path or artifact_path()
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(ARTIFACT_MAGIC)) != ARTIFACT_MAGIC:
+                print(f"[Lexicon] Ignoring {path}: not a lexicon artifact")
+                return None
+            header = json.loads(f.readline().decode('utf-8'))
+            if header.get('format') != ARTIFACT_FORMAT or header.get('python') != _python_tag():
+                print(f"[Lexicon] Ignoring {path}: built for format {header.get('format')} / python {header.get('python')}")
+                return None
+            if expected_sources is not None and header.get('sources') != expected_sources:
+                print(f"[Lexicon] Ignoring {path}: word lists changed since build")
+                return None
+            return header, pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError) as e:
+        print(f"[Lexicon] Failed to read artifact {path}: {str(e)}")
+        return None
+
+
+def load_lexicons(force=False):
+    """
+    加载文本词库：优先使用与当前词库文件一致的预编译产物，否则从文本编译。
+    两种路径都在新自动机上完成后原子切换，进行中的请求继续使用旧词库。
+    词库文件内容未变化且未指定 force 时直接返回。
+    """
+    with _load_lock:
+        sources = read_source_words()
+        fingerprint = source_fingerprint(sources)
+        if not force and fingerprint == _state['fingerprint']:
+            return status()
+
+        t0 = time.time()
+        source = 'text'
+        artifact = read_artifact(expected_sources=fingerprint)
+        if artifact is not None:
+            _, snapshot = artifact
+            # 代码内置词库（如错别字混淆集）与产物中的不一致时，恢复后再单独替换
+            current = lexicon_matcher.lexicons()
+            stale = {
+                lexicon_id: words for lexicon_id, words in current.items()
+                if lexicon_id not in FILE_LEXICONS and snapshot['lexicons'].get(lexicon_id) != words
+            }
+            lexicon_matcher.restore(snapshot)
+            if stale:
+                lexicon_matcher.replace_lexicons({
+                    lexicon_id: [(w, c, r) for w, (c, r) in words.items()]
+                    for lexicon_id, words in stale.items()
+                })
+            source = 'artifact'
+        else:
+            lexicon_matcher.replace_lexicons(_file_entries(sources))
+
+        if _state['fingerprint'] is not None:
+            _state['reloads'] += 1
+        _state.update({
+            'fingerprint': fingerprint,
+            'version': lexicon_matcher.version,
+            'source': source,
+            'loaded_at': time.time(),
+            'load_seconds': round(time.time() - t0, 4),
+        })
+        print(f"[Lexicon] Loaded from {source} in {_state['load_seconds']}s (version {_state['version']})")
+        return status()
+
+def reload_all(force=False):
+    """
+    管理接口触发的热更新：重新生成预编译产物后在本进程加载。
+    产物以 os.replace 写入，修改时间随之变化，其他 worker 的 LexiconWatcher 在一个轮询周期内重新加载。
+    产物无法写入或监视线程未启动时只作用于当前进程，返回的 scope 为 worker。
+    """
+    broadcast = True
+    try:
+        build_artifact()
+    except OSError as e:
+        print(f"[Lexicon] Cannot write artifact, reloading this worker only: {str(e)}")
+        broadcast = False
+    info = load_lexicons(force=force)
+    info['pid'] = os.getpid()
+    if broadcast and info['watching']:
+        info['scope'] = 'all_workers'
+        info['propagation_seconds'] = _watcher.interval
+    else:
+        info['scope'] = 'worker'
+    return info
+
+def status():
+    """当前词库加载信息"""
+    return {
+        'version': _state['version'],
+        'source': _state['source'],
+        'loaded_at': _state['loaded_at'],
+        'load_seconds': _state['load_seconds'],
+        'reloads': _state['reloads'],
+        'watching': _watcher is not None and _watcher.is_alive(),
+    }
+
+
+class LexiconWatcher(threading.Thread):
+    """轮询词库文件与产物的修改时间，变化时重新加载"""
+    def __init__(self, interval):
+        super().__init__(name='lexicon-watcher', daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def signature():
+        paths = [_source_path(lexicon_id) for lexicon_id in FILE_LEXICONS] + [artifact_path()]
+        sig = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                sig.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append((path, None, None))
+        return tuple(sig)
+
+    def run(self):
+        last = self.signature()
+        while not self._stop_event.wait(self.interval):
+            current = self.signature()
+            if current == last:
+                continue
+            last = current
+            try:
+                load_lexicons()
+            except Exception as e:
+                print(f"[Lexicon] Reload failed, keeping current lexicons: {str(e)}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_watcher = None
+
+def start_watcher(interval=None):
+    """启动词库文件监视线程（LEXICON_WATCH_INTERVAL 秒，默认 30；0 关闭）"""
+    global _watcher
+    if interval is None:
+        interval = float(os.getenv('LEXICON_WATCH_INTERVAL', 30))
+    if interval <= 0 or (_watcher is not None and _watcher.is_alive()):
+        return _watcher
+    _watcher = LexiconWatcher(interval)
+    _watcher.start()
+    return _watcher
+
+
+if __name__ == '__main__':
+    import argparse
+    from . import typo_checker  # noqa: F401  注册错别字混淆集，使其一并编译进产物
+
+    parser = argparse.ArgumentParser(description='词库预编译')
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('--output', default=None, help='产物路径（默认 LEXICON_ARTIFACT_PATH 或 data/lexicons.bin）')
+    args = parser.parse_args()
+    build_artifact(args.output)
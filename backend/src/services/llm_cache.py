@@ -0,0 +1,173 @@
+"""
+大模型响应持久化缓存
+基于本地 SQLite，跨进程共享、重启后仍然有效，条目按写入时间过期，按总字节数做最近最少使用淘汰
+"""
+
+import os
+import time
+import json
+import hashlib
+import sqlite3
+import threading
+from typing import Optional
+from .sqlite_store import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed ON llm_responses(accessed_at);
+"""
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'llm_responses.sqlite3')
+
+
+class LLMResponseCache:
+    # 命中时刷新访问时间的最小间隔（秒），避免每次读取都争抢写锁
+    TOUCH_INTERVAL = 60
+    # 每写入若干次检查一次总容量
+    EVICT_CHECK_EVERY = 50
+
+    def __init__(self, path=None, max_bytes=None, enabled=None, ttl=None):
+        """
+        :param path: SQLite 文件路径（默认 QWEN_CACHE_PATH 或 data/cache 下）
+        :param max_bytes: 缓存总字节上限（默认 QWEN_CACHE_MAX_BYTES，256MB）
+        :param enabled: 是否启用（默认 QWEN_CACHE_ENABLED，'0' 关闭）
+        :param ttl: 条目有效期秒数，自写入起计（默认 QWEN_CACHE_TTL，7 天；0 表示不过期）；
+                    模型别名背后的版本会更新，过期后重新请求
+        """
+        if enabled is None:
+            enabled = os.getenv('QWEN_CACHE_ENABLED', '1').strip() not in ('0', 'false', 'no')
+        self.enabled = bool(enabled)
+        self.max_bytes = int(max_bytes or os.getenv('QWEN_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+        self.ttl = float(ttl if ttl is not None else os.getenv('QWEN_CACHE_TTL', 7 * 24 * 3600))
+        self.store = SQLiteStore(path or os.getenv('QWEN_CACHE_PATH') or DEFAULT_CACHE_PATH, _SCHEMA)
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, temperature: float, text: str, **extra) -> str:
+        """缓存键：模型 + 提示词版本 + 温度 + 输入文本（及其他影响输出的参数）"""
+        h = hashlib.sha256()
+        h.update(json.dumps({
+            'model': model,
+            'prompt_version': prompt_version,
+            'temperature': temperature,
+            'extra': extra,
+        }, sort_keys=True).encode('utf-8'))
+        h.update(b'\x00')
+        h.update(text.encode('utf-8'))
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        try:
+            conn = self.store.connection()
+            row = conn.execute(
+                'SELECT value, created_at, accessed_at FROM llm_responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self._count('misses')
+                return None
+            value, created_at, accessed_at = row
+            now = time.time()
+            if self.ttl and now - created_at > self.ttl:
+                conn.execute('DELETE FROM llm_responses WHERE key = ? AND created_at = ?', (key, created_at))
+                self._count('expirations')
+                self._count('misses')
+                return None
+            if now - accessed_at > self.TOUCH_INTERVAL:
+                conn.execute('UPDATE llm_responses SET accessed_at = ? WHERE key = ?', (now, key))
+            self._count('hits')
+            return value
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"[LLMCache] Read failed, treat as miss: {str(e)}")
+            return None
+
+    def put(self, key: str, value: str):
+        if not self.enabled or value is None:
+            return
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            self.store.connection().execute(
+                'INSERT OR REPLACE INTO llm_responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (key, value, size, now, now)
+            )
+            with self._lock:
+                self._puts += 1
+                check = (self._puts - 1) % self.EVICT_CHECK_EVERY == 0
+            if check:
+                self.evict()
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"[LLMCache] Write failed: {str(e)}")
+
+    def evict(self):
+        """先清除过期条目；总量仍超过上限时，按访问时间从旧到新删除，直到降到上限的 90%"""
+        with self.store.transaction() as conn:
+            if self.ttl:
+                conn.execute('DELETE FROM llm_responses WHERE created_at < ?', (time.time() - self.ttl,))
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM llm_responses').fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            target = total - int(self.max_bytes * 0.9)
+            freed = 0
+            victims = []
+            for key, size in conn.execute('SELECT key, size FROM llm_responses ORDER BY accessed_at'):
+                victims.append((key,))
+                freed += size
+                if freed >= target:
+                    break
+            conn.executemany('DELETE FROM llm_responses WHERE key = ?', victims)
+        print(f"[LLMCache] Evicted {len(victims)} entries ({freed} bytes)")
+        return len(victims)
+
+    def stats(self):
+        result = {
+            'enabled': self.enabled,
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expirations': self.expirations,
+            'errors': self.errors,
+        }
+        if self.enabled:
+            try:
+                entries, size = self.store.connection().execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses'
+                ).fetchone()
+                result.update({'entries': entries, 'bytes': size})
+            except sqlite3.Error:
+                pass
+        return result
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_response_cache() -> LLMResponseCache:
+    """获取进程内共享的响应缓存（懒创建）"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = LLMResponseCache()
+    return _shared_cache
@@ -3,20 +3,66 @@
 整合各种检查服务，提供统一的审校接口
 """
 
-import uuid
+import os
+import json
+import hashlib
 import time
-from .typo_checker import check_typos_and_grammar, FUNCTION_WORDS
+import threading
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .typo_checker import check_typos_and_grammar, get_typo_checker, FUNCTION_WORDS
 from .punctuation_checker import check_punctuation
-from .dfa_filter import check_sensitive_content, init_filters
+from .dfa_filter import check_sensitive_content, init_filters, lexicon_version, lexicon_matcher
 from .qwen_integration import QwenProofreader
+from .result_cache import ResultCache
+from .readiness import readiness
+from .reconcile import reconcile_overlaps, LLMWindowIndex, partition_for_display
+from .text_index import TextIndex
+from .issue import (
+    TYPO, GRAMMAR, PUNCTUATION, SENSITIVE, HIGH, MEDIUM, LOW, WARNING, INFO,
+    LAYOUT_CATEGORIZED_EXPLAINED, id_allocator,
+)
+
+# 严重度加成（按严重度编码）：全局和解与块内和解各一套
+_FINAL_SEVERITY_BONUS = {HIGH: 1.0, MEDIUM: 0.5, LOW: 0.0, WARNING: 0.5, INFO: 0.2}
+_CHUNK_SEVERITY_BONUS = {HIGH: 1.0, MEDIUM: 0.5, LOW: 0.0, WARNING: 0.2, INFO: 0.1}
+
+# 预热语料：覆盖错别字、语法、标点与敏感词各条规则路径
+WARMUP_CORPUS = [
+    "今天天气很好,我们去散不吧。公园里的花都盛升了，胡蝶在花丛中飞舞。",
+    "他认真的完成了作业，跑得很快地回家了。“这是一个测试（文档。",
+    "会议纪要：项目进度正常，系统测试因该在下周完成！！",
+]
 
 class ProofreadingEngine:
     def __init__(self):
-        # 初始化敏感词过滤器
-        init_filters()
+        # 敏感词库按需加载（首次审校或后台初始化时，见 ensure_loaded）
+        self._filters_loaded = False
+        self._filters_lock = threading.Lock()
         # 长文本分块阈值
         self.chunk_size = 5000
+        # 分块并行：进程内共享的工作线程数上限与整体截止时间（秒）
+        self.chunk_workers = int(os.getenv('PROOFREAD_CHUNK_WORKERS', 4))
+        self.chunk_deadline = float(os.getenv('PROOFREAD_CHUNK_DEADLINE', 120))
+        self._chunk_executor = None
+        self._chunk_executor_lock = threading.Lock()
+        # 创建线程池的进程：pre-fork 部署时 master 预热创建的线程池不能被 worker 继承使用
+        self._executor_pid = None
+        # 批量审校：独立线程池（长文档会再扇出到分块线程池，共用会互相等待），线程数即批内并发上限
+        self.batch_workers = int(os.getenv('PROOFREAD_BATCH_WORKERS', 8))
+        self._batch_executor = None
         self.qwen_proofreader = QwenProofreader()
+        # 整篇结果缓存：相同内容 + 相同有效选项直接复用上次结果
+        self.result_cache = ResultCache(
+            max_bytes=int(os.getenv('PROOFREAD_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+            ttl=float(os.getenv('PROOFREAD_CACHE_TTL', 3600)),
+        )
+        # 增量审校的段落级记忆：段落内容哈希 -> 段内相对偏移的问题列表
+        self.paragraph_cache = ResultCache(
+            max_bytes=int(os.getenv('PROOFREAD_PARAGRAPH_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+            ttl=float(os.getenv('PROOFREAD_CACHE_TTL', 3600)),
+        )
         # 规则模式：'off' | 'lite' | 'full'（默认 lite）
         # 注意：统一使用小写，后续比较均以小写进行
         self.default_rules_mode = 'lite'
@@ -66,7 +112,26 @@ class ProofreadingEngine:
             },
         }
 
-    def _is_false_positive_confusion(self, content: str, issue: dict) -> bool:
+    def ensure_loaded(self):
+        """加载敏感词库（幂等）；后台初始化未完成时由首个请求同步加载"""
+        if not self._filters_loaded:
+            with self._filters_lock:
+                if not self._filters_loaded:
+                    init_filters()
+                    self._filters_loaded = True
+        return {'lexicon_version': lexicon_version()}
+
+    def warm_up(self):
+        """用预热语料跑一遍全部规则检查，使模型与自动机在首个真实请求前完成懒加载"""
+        self.ensure_loaded()
+        options = self._normalize_options({'rules_mode': 'full'})
+        issues = 0
+        for text in WARMUP_CORPUS:
+            for found in self._run_rules(text, options, options['rules_mode']):
+                issues += len(found)
+        return {'documents': len(WARMUP_CORPUS), 'issues': issues}
+
+    def _is_false_positive_confusion(self, content: str, issue) -> bool:
         """
         使用白名单短语过滤常见混淆字在固定搭配中的误报（如“象/像”“作/做”）。
         仅对 type == 'typo' 且 original/suggestion 为单字的场景生效；
@@ -76,16 +141,15 @@ class ProofreadingEngine:
         若命中白名单短语则返回 True（表示应过滤）。
         """
         try:
-            if issue.get('type') != 'typo':
+            if issue.type != TYPO:
                 return False
-            orig = (issue.get('original') or '').strip()
-            sug = (issue.get('suggestion') or '').strip()
+            orig = (issue.original or '').strip()
+            sug = (issue.suggestion or '').strip()
             if len(orig) != 1 or len(sug) != 1:
                 return False
 
-            pos = issue.get('position') or {}
-            s = pos.get('start'); e = pos.get('end')
-            if not (isinstance(s, int) and isinstance(e, int) and 0 <= s < e <= len(content)):
+            s, e = issue.start, issue.end
+            if not 0 <= s < e <= len(content):
                 return False
 
             cur = content[s:e]
@@ -113,23 +177,42 @@ class ProofreadingEngine:
             # 任何异常都不应影响主流程，保守地认为不是误报
             return False
 
-    def proofread(self, content, options=None):
+    def _options_fingerprint(self, options):
         """
-        对文本进行全面审校
-        
-        Args:
-            content (str): 要审校的文本内容
-            options (dict): 审校选项
-                - check_typos: 是否检查错别字
-                - check_grammar: 是否检查语法
-                - check_punctuation: 是否检查标点符号
-                - check_sensitive: 是否检查敏感内容
-        
-        Returns:
-            dict: 审校结果
+        有效选项指纹：取规整后的有效值，并纳入模型名与词库版本，
+        换模型或更新词库后相关缓存自然失效。
         """
-        start_time = time.time()
-        
+        fingerprint = {
+            'rules_mode': options.get('rules_mode'),
+            # 未配置 API Key 时 LLM 实际不会参与，与 qwen=False 等价
+            'qwen': bool(options.get('qwen', True)) and bool(self.qwen_proofreader.api_key),
+            'check_typos': bool(options.get('check_typos', True)),
+            'check_grammar': bool(options.get('check_grammar', True)),
+            'check_punctuation': bool(options.get('check_punctuation', True)),
+            'check_sensitive': bool(options.get('check_sensitive', True)),
+            'model': self.qwen_proofreader.model_name,
+            'lexicon': lexicon_version(),
+            'chunk_size': self.chunk_size,
+            'incremental': bool(options.get('incremental')),
+        }
+        return json.dumps(fingerprint, sort_keys=True)
+
+    def _cache_key(self, content, options, fingerprint=None, scope='doc'):
+        """
+        缓存键：内容哈希 + 有效选项指纹。
+        内容按原样哈希（问题位置依赖原文偏移，不能做改变长度的规整）。
+        """
+        if fingerprint is None:
+            fingerprint = self._options_fingerprint(options)
+        h = hashlib.sha256(scope.encode('utf-8'))
+        h.update(b'\x00')
+        h.update(content.encode('utf-8'))
+        h.update(b'\x00')
+        h.update(fingerprint.encode('utf-8'))
+        return h.hexdigest()
+
+    def _normalize_options(self, options):
+        """补全默认选项并规整 rules_mode（原地修改传入的 options）"""
         if options is None:
             options = {
                 'check_typos': True,
@@ -147,117 +230,445 @@ class ProofreadingEngine:
             options['rules_mode'] = options['rules_mode'].strip().lower() or self.default_rules_mode
         else:
             options['rules_mode'] = self.default_rules_mode
+        # 未配置 API Key 时大模型不会参与，按 qwen=False 处理（与缓存指纹一致），必然失败的调用不算作降级
+        if not self.qwen_proofreader.api_key:
+            options['qwen'] = False
+        return options
+
+    def _degrade_if_unavailable(self, options):
+        """
+        千问上游熔断期间，本次请求直接按纯规则审校（原地关闭 qwen，缓存键随之对应纯规则结果），
+        不再逐块等待必然失败的调用；返回是否降级。
+        """
+        if options.get('qwen', True) and self.qwen_proofreader.api_key and not self.qwen_proofreader.available():
+            options['qwen'] = False
+            print("[Resilience] Qwen upstream unavailable, degrading to rules-only")
+            return True
+        return False
+
+    def proofread(self, content, options=None):
+        """
+        对文本进行全面审校
+        
+        Args:
+            content (str): 要审校的文本内容
+            options (dict): 审校选项
+                - check_typos: 是否检查错别字
+                - check_grammar: 是否检查语法
+                - check_punctuation: 是否检查标点符号
+                - check_sensitive: 是否检查敏感内容
+                - use_cache: 是否读取结果缓存（默认 True；False 时强制重新审校并刷新缓存）
+                - incremental: 是否按段落增量审校（仅重算新增或改动的段落）
+                - parallel: 长文本分块是否并行处理（默认 True）
+        
+        Returns:
+            dict: 审校结果（命中缓存时与上次结果共享 issue 对象，调用方应只读使用）；
+                  大模型上游熔断而降级为纯规则时带 degraded: True
+        """
+        start_time = time.time()
+        self.ensure_loaded()
+        options = self._normalize_options(options)
+        degraded = self._degrade_if_unavailable(options)
+
+        cache_key = self._cache_key(content, options)
+        if options.get('use_cache', True):
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                print(f"[Cache] Result cache hit for {len(content)} chars")
+                result = {
+                    'issues': cached['issues'],
+                    'statistics': cached['statistics']
+                }
+                if degraded:
+                    result['degraded'] = True
+                return result
         
         all_issues = []
+        # 全文结构索引只建一次，分块、句子切分、段落定位与各检查器共用
+        text_index = TextIndex(content)
         
-        # 判断是否需要分块处理
-        if len(content) > self.chunk_size:
+        # 判断是否需要增量或分块处理（partial：有块超时或大模型调用被拒绝/失败，只得到规则结果）
+        if options.get('incremental'):
+            all_issues, partial = self._process_incremental(content, options, text_index)
+        elif len(content) > self.chunk_size:
             print(f"[Performance] Long text detected ({len(content)} chars), using chunked processing")
-            all_issues = self._process_chunked(content, options)
+            all_issues, partial = self._process_chunked(content, options, text_index)
         else:
-            all_issues = self._process_single(content, options)
+            all_issues, partial = self._process_single(content, options, text_index)
+        
+        # 不完整的结果不写入缓存，否则会在 TTL 内冒充完整结果
+        result = self._build_result(all_issues, None if partial else cache_key)
+        if degraded or partial:
+            result['degraded'] = True
         
-        # 为每个问题分配唯一ID
+        end_time = time.time()
+        processing_time = end_time - start_time
+        print(f"[Performance] Total processing time: {processing_time:.2f}s for {len(content)} chars")
+        return result
+
+    def _build_result(self, all_issues, cache_key):
+        """和解、分配 ID 并转换为 API 结构，写入结果缓存（cache_key 为 None 时不缓存）"""
+        all_issues, statistics = self._finalize(all_issues)
+        # 对外边界：内部 Issue 对象转换为 API 的 JSON 结构
+        issues = [issue.to_dict() for issue in all_issues]
+        if cache_key is not None:
+            self.result_cache.put(cache_key, {
+                'issues': issues,
+                'statistics': statistics
+            })
+        return {
+            'issues': issues,
+            'statistics': statistics
+        }
+
+    def proofread_batch(self, documents, max_concurrency=None):
+        """
+        批量审校：documents 为 [(content, options)]，按完成顺序产出 (序号, 结果, 错误信息)，
+        结果与逐篇调用 proofread 相同，单篇失败时结果为 None、错误信息为字符串。
+        - 整批只做一次加载检查，缓存命中的文档最先产出；
+        - 未命中的短文档由 scan_many 一遍自动机完成全部词库匹配；
+        - 各文档在批量线程池上并发处理，在途数不超过 max_concurrency（且不超过 batch_workers），
+          大模型调用并发受同一上限约束；并发文档的纠错模型调用由 MicroBatcher 合批。
+        """
+        start_time = time.time()
+        self.ensure_loaded()
+        limit = max(1, min(int(max_concurrency or self.batch_workers), self.batch_workers))
+
+        pending = deque()
+        degraded = set()
+        for index, (content, options) in enumerate(documents):
+            options = self._normalize_options(dict(options or {}))
+            if self._degrade_if_unavailable(options):
+                degraded.add(index)
+            cache_key = self._cache_key(content, options)
+            cached = self.result_cache.get(cache_key) if options.get('use_cache', True) else None
+            if cached is not None:
+                result = {'issues': cached['issues'], 'statistics': cached['statistics']}
+                if index in degraded:
+                    result['degraded'] = True
+                yield index, result, None
+            else:
+                pending.append((index, content, options, cache_key))
+
+        short = [item for item in pending if len(item[1]) <= self.chunk_size and not item[2].get('incremental')]
+        lexicon_hits = {}
+        if short:
+            scan_start = time.time()
+            lexicon_hits = dict(zip((item[0] for item in short), lexicon_matcher.scan_many([item[1] for item in short])))
+            print(f"[Performance] Batch lexicon scan: {len(short)} documents, {time.time() - scan_start:.3f}s")
+
+        executor = self._get_batch_executor()
+        in_flight = {}
+        processed = len(pending)
+        while pending or in_flight:
+            while pending and len(in_flight) < limit:
+                index, content, options, cache_key = pending.popleft()
+                future = executor.submit(self._proofread_batch_item, content, options, cache_key, lexicon_hits.pop(index, None))
+                in_flight[future] = index
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield index, None, str(e)
+                    continue
+                if index in degraded:
+                    result['degraded'] = True
+                yield index, result, None
+
+        print(f"[Performance] Batch: {len(documents)} documents ({processed} processed), concurrency={limit}, {time.time() - start_time:.2f}s")
+
+    def _proofread_batch_item(self, content, options, cache_key, lexicon_hits):
+        if lexicon_hits is None:
+            # 长文档或增量审校：走完整流程（已确认未命中缓存）
+            return self.proofread(content, dict(options, use_cache=False))
+        issues, partial = self._process_single(content, options, None, lexicon_hits)
+        result = self._build_result(issues, None if partial else cache_key)
+        if partial:
+            result['degraded'] = True
+        return result
+
+    def proofread_events(self, content, options=None):
+        """
+        流式审校：按阶段产出 (event, data)。
+          - rules：规则检查结果（错别字/语法、标点、敏感词），毫秒级返回
+          - llm：每个文本块的大模型结果，按完成顺序逐块产出
+          - final：与 proofread 相同的和解结果，suppressed 列出此前已下发但被抑制的问题 ID
+        流式阶段下发的问题已带最终 ID，客户端可用 final 事件整体替换。
+        大模型上游熔断而降级为纯规则时，rules 与 final 事件带 degraded: True，且不会有 llm 事件；
+        有块超过截止时间或大模型结果不完整（被限流、调用失败）时 final 事件带 degraded: True，且结果不写入缓存。
+        """
+        start_time = time.time()
+        self.ensure_loaded()
+        options = self._normalize_options(options)
+        rules_mode = options['rules_mode']
+        degraded = {'degraded': True} if self._degrade_if_unavailable(options) else {}
+
+        cache_key = self._cache_key(content, options)
+        if options.get('use_cache', True):
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                yield 'final', {'issues': cached['issues'], 'statistics': cached['statistics'], 'suppressed': [], **degraded}
+                return
+
+        text_index = TextIndex(content)
+        chunks = self._split_text_smart(content, text_index) if len(content) > self.chunk_size else [(content, 0)]
+        chunk_indexes = [text_index.sub(offset, offset + len(text)) for text, offset in chunks]
+        next_id = id_allocator()
+        emitted_ids = []
+
+        # 1) 规则阶段
+        chunk_rules = []
+        rule_events = []
+        for (chunk_text, chunk_offset), chunk_index in zip(chunks, chunk_indexes):
+            typo_issues, punctuation_issues, sensitive_issues = self._run_rules(chunk_text, options, rules_mode, chunk_index)
+            chunk_rules.append((typo_issues, punctuation_issues, sensitive_issues))
+            for issue in typo_issues + punctuation_issues + sensitive_issues:
+                issue.id = next_id()
+                emitted_ids.append(issue.id)
+                rule_events.append(issue.to_dict(chunk_offset))
+        yield 'rules', {'issues': rule_events, 'chunks': len(chunks), 'elapsed': round(time.time() - start_time, 3), **degraded}
+
+        # 2) 大模型阶段：各块并行，按完成顺序下发
+        chunk_qwen = [[] for _ in chunks]
+        partial = False
+        if options.get('qwen', True):
+            def llm_stage(i):
+                chunk_text = chunks[i][0]
+                qwen_issues, qwen_partial = self._run_qwen(chunk_text)
+                explained = self._explain_sensitive(chunk_text, chunk_rules[i][2])
+                return qwen_issues, qwen_partial or not explained
+
+            for i, future in self._iter_chunks_with_deadline(llm_stage, len(chunks)):
+                if future is None:
+                    partial = True
+                    print(f"[Stream] Chunk {i+1} exceeded deadline {self.chunk_deadline:.0f}s, finishing with rules only")
+                    continue
+                try:
+                    qwen_issues, chunk_partial = future.result()
+                    partial = partial or chunk_partial
+                except Exception as e:
+                    partial = True
+                    print(f"[Stream] Chunk {i+1} LLM stage failed: {str(e)}")
+                    continue
+                for issue in qwen_issues:
+                    issue.id = next_id()
+                    emitted_ids.append(issue.id)
+                chunk_qwen[i] = qwen_issues
+                yield 'llm', {
+                    'chunk': i,
+                    'chunks': len(chunks),
+                    'issues': [it.to_dict(chunks[i][1]) for it in qwen_issues],
+                    'elapsed': round(time.time() - start_time, 3)
+                }
+            if partial:
+                degraded = {'degraded': True}
+
+        # 3) 和解阶段：与非流式路径相同的块内/全局后处理
+        all_issues = []
+        for (chunk_text, chunk_offset), chunk_index, qwen_issues, (typo_issues, punctuation_issues, sensitive_issues) in zip(chunks, chunk_indexes, chunk_qwen, chunk_rules):
+            kept = self._postprocess_chunk(
+                chunk_text, qwen_issues + typo_issues + punctuation_issues + sensitive_issues, rules_mode, chunk_index
+            )
+            all_issues.extend(it.shifted(chunk_offset) for it in kept)
+        all_issues, statistics = self._finalize(all_issues, next_id)
+        final_ids = {it.id for it in all_issues}
+        all_issues = [it.to_dict() for it in all_issues]
+        if not partial:
+            self.result_cache.put(cache_key, {'issues': all_issues, 'statistics': statistics})
+
+        print(f"[Performance] Streamed proofreading finished in {time.time() - start_time:.2f}s for {len(content)} chars")
+        yield 'final', {
+            'issues': all_issues,
+            'statistics': statistics,
+            'suppressed': [i for i in emitted_ids if i not in final_ids],
+            **degraded
+        }
+
+    def proofread_stream(self, pieces, options=None):
+        """
+        大文档流式审校：pieces 为按序到达的文本片段（如上传请求体的增量解码结果），长度不限。
+        按与 _split_text_smart 相同的规则切块（切块结果与整篇切分一致），块内处理与 proofread 相同，
+        按块顺序产出 (event, data)：
+          - chunk：该块的问题（全局偏移，块内已和解并分配 ID）
+          - done：总字符数、块数与累计统计
+        只保留尚未切出的尾部文本和至多 chunk_workers 个在途块，内存占用与文档长度无关；不写入结果缓存。
+        开始时大模型上游已熔断则整篇按纯规则处理，有块的大模型结果不完整（被限流或调用失败）时同样在 done 事件带 degraded: True。
+        """
+        start_time = time.time()
+        self.ensure_loaded()
+        options = self._normalize_options(options)
+        degraded = {'degraded': True} if self._degrade_if_unavailable(options) else {}
+        executor = self._get_chunk_executor()
+        max_in_flight = max(1, self.chunk_workers)
+        next_id = id_allocator()
+        statistics = self._calculate_statistics([])
+        in_flight = deque()  # [(future, 块序号, 全局偏移, 长度)]
+        submitted = 0
+
+        def submit(chunk_text, chunk_offset):
+            nonlocal submitted
+            future = executor.submit(self._process_single, chunk_text, options)
+            in_flight.append((future, submitted, chunk_offset, len(chunk_text)))
+            submitted += 1
+
+        def drain(keep):
+            # 按块顺序取回结果，在途块不超过 keep 个
+            while len(in_flight) > keep:
+                future, idx, chunk_offset, length = in_flight.popleft()
+                chunk_issues, chunk_partial = future.result()
+                if chunk_partial:
+                    degraded['degraded'] = True
+                issues, chunk_statistics = self._finalize(chunk_issues, next_id)
+                for key, value in chunk_statistics.items():
+                    statistics[key] += value
+                yield 'chunk', {
+                    'chunk': idx,
+                    'offset': chunk_offset,
+                    'length': length,
+                    'issues': [it.to_dict(chunk_offset) for it in issues],
+                    'elapsed': round(time.time() - start_time, 3)
+                }
+
+        buffer = ''
+        offset = 0  # buffer 起点的全局偏移
+        for piece in pieces:
+            buffer += piece
+            if len(buffer) <= self.chunk_size:
+                continue
+            # 尾部仍超过一块时才切：此时切点之后一定还有文本，与整篇切分的判断一致
+            index = TextIndex(buffer)
+            pos = 0
+            while len(buffer) - pos > self.chunk_size:
+                end = self._next_chunk_end(index, pos)
+                submit(buffer[pos:end], offset + pos)
+                yield from drain(max_in_flight - 1)
+                pos = end
+            buffer = buffer[pos:]
+            offset += pos
+
+        if buffer:
+            index = TextIndex(buffer)
+            pos = 0
+            while pos < len(buffer):
+                end = self._next_chunk_end(index, pos)
+                submit(buffer[pos:end], offset + pos)
+                yield from drain(max_in_flight - 1)
+                pos = end
+            offset += len(buffer)
+        yield from drain(0)
+
+        print(f"[Performance] Streamed {offset} chars in {submitted} chunks, {time.time() - start_time:.2f}s")
+        yield 'done', {
+            'characters': offset,
+            'chunks': submitted,
+            'statistics': statistics,
+            'elapsed': round(time.time() - start_time, 3),
+            **degraded
+        }
+
+    def _finalize(self, all_issues, next_id=None):
+        """
+        全局后处理：分配ID、重叠和解、展示排序与统计，返回 (issues, statistics)
+        :param next_id: 本次请求的 ID 生成器（流式模式下与已下发的问题共用）
+        """
+        # 为每个问题分配请求内唯一ID（流式模式下已提前分配的保持不变）
+        if next_id is None:
+            next_id = id_allocator()
         for issue in all_issues:
-            issue['id'] = str(uuid.uuid4())
+            if issue.id is None:
+                issue.id = next_id()
         
         # 按位置排序
-        all_issues.sort(key=lambda x: x['position']['start'])
+        all_issues.sort(key=lambda x: x.start)
         
         # 新增：权重与去噪处理（上调标点权重、突出LLM风格与语法、敏感可见度）
         def _weight(issue):
-            t = issue.get('type')
-            sev = issue.get('severity', '')
-            source = issue.get('source', '')
-            subtype = issue.get('subtype', '')
+            t = issue.type
+            source = issue.source
             
             # 基础权重：LLM style > typo > grammar/sensitive > punctuation
-            if source == 'qwen' and subtype == 'style':
+            if source == 'qwen' and issue.subtype == 'style':
                 base = 4.5
-            elif t == 'typo':
+            elif t == TYPO:
                 base = 3.0
-            elif t == 'grammar':
+            elif t == GRAMMAR:
                 base = 2.7 if source == 'qwen' else 2.2
-            elif t == 'sensitive':
+            elif t == SENSITIVE:
                 base = 2.6
-            elif t == 'punctuation':
+            elif t == PUNCTUATION:
                 base = 1.25  # 从0.8上调至1.25，提高可见度
             else:
                 base = 1.0
                 
             # severity 加成：high>medium>low
-            sev_bonus = {'high': 1.0, 'medium': 0.5, 'low': 0.0, 'warning': 0.5, 'info': 0.2}.get(sev, 0.0)
-            return base + sev_bonus
+            return base + _FINAL_SEVERITY_BONUS[issue.severity]
         
         # 重叠和解：同一区间优先保留权重高者
-        suppressed = [False] * len(all_issues)
-        for i in range(len(all_issues)):
-            if suppressed[i]:
-                continue
-            a = all_issues[i]
-            a_s, a_e = a['position']['start'], a['position']['end']
-            for j in range(i+1, len(all_issues)):
-                if suppressed[j]:
-                    continue
-                b = all_issues[j]
-                b_s, b_e = b['position']['start'], b['position']['end']
-                # 有交集则和解
-                if not (b_s >= a_e or b_e <= a_s):
-                    if _weight(b) > _weight(a):
-                        suppressed[i] = True
-                        break
-                    else:
-                        suppressed[j] = True
-        filtered_issues = [it for k, it in enumerate(all_issues) if not suppressed[k]]
-        
-        # 分离 LLM style 和其他类型，确保 LLM style 优先展示
-        llm_style = [it for it in filtered_issues if it.get('source') == 'qwen' and it.get('subtype') == 'style']
-        punct = [it for it in filtered_issues if it.get('type') == 'punctuation']
-        other = [it for it in filtered_issues if it not in llm_style and it not in punct]
+        filtered_issues = reconcile_overlaps(all_issues, _weight)
         
-        # 对标点进行温和限流（最多前 12 条），但较之前更宽松
-        punct = punct[:12]
-        
-        # 重组：LLM style + 其他问题 + 有限标点
-        all_issues = llm_style + other + punct
+        # 重组：LLM style 优先展示 + 其他问题 + 温和限流的标点（最多前 12 条）
+        all_issues = partition_for_display(filtered_issues, punct_limit=12)
         
         # 统计信息
         statistics = self._calculate_statistics(all_issues)
-        
-        end_time = time.time()
-        processing_time = end_time - start_time
-        print(f"[Performance] Total processing time: {processing_time:.2f}s for {len(content)} chars")
-        
-        return {
-            'issues': all_issues,
-            'statistics': statistics
-        }
-    
-    def _process_single(self, content, options):
-        """处理单个文本块"""
-        all_issues = []
+        return all_issues, statistics
+
+    def _process_single(self, content, options, text_index=None, lexicon_hits=None):
+        """
+        处理单个文本块（text_index 为该块的 TextIndex，为空时自行构建；lexicon_hits 为已有的词库扫描结果），
+        返回 (issues, partial)：partial 表示请求了大模型但其结果不完整（被限流、熔断或调用失败）
+        """
+        if text_index is None:
+            text_index = TextIndex(content)
         # 规则模式（统一小写）
         rules_mode = str(options.get('rules_mode', self.default_rules_mode)).strip().lower()
         # 0. 千问大模型辅助审校（可选）
-        if options.get('qwen', True):
-            qwen_start = time.time()
-            try:
-                qwen_result = self.qwen_proofreader.proofread(content)
-                qwen_issues = qwen_result.get('issues', [])
-                # 简单去重：基于 (start,end,message)
-                seen = set()
-                for issue in qwen_issues:
-                    key = (issue['position']['start'], issue['position']['end'], issue.get('message'))
-                    if key not in seen:
-                        all_issues.append(issue)
-                        seen.add(key)
-                print(f"[Performance] Qwen check: {time.time() - qwen_start:.2f}s, issues: {len(qwen_issues)}")
-            except Exception as e:
-                print(f"[Qwen] 调用失败，跳过大模型审校：{str(e)}")
+        qwen_issues, partial = self._run_qwen(content) if options.get('qwen', True) else ([], False)
+        # 1~3. 错别字/语法、标点、敏感内容
+        typo_issues, punctuation_issues, sensitive_issues = self._run_rules(content, options, rules_mode, text_index, lexicon_hits)
+        # 混合方案：DFA 召回 + LLM 解释与重写（可选，静默降级）
+        if options.get('qwen', True) and not self._explain_sensitive(content, sensitive_issues):
+            partial = True
+        all_issues = qwen_issues + typo_issues + punctuation_issues + sensitive_issues
+        return self._postprocess_chunk(content, all_issues, rules_mode, text_index), partial
+
+    def _run_qwen(self, content):
+        """千问大模型辅助审校，返回 (issues, partial)；被限流、熔断或调用失败时静默降级，partial 为 True"""
+        qwen_issues = []
+        qwen_start = time.time()
+        try:
+            qwen_result = self.qwen_proofreader.proofread(content)
+            partial = bool(qwen_result.get('degraded'))
+            raw_issues = qwen_result.get('issues', [])
+            # 简单去重：基于 (start,end,message)
+            seen = set()
+            for issue in raw_issues:
+                key = (issue.start, issue.end, issue.message)
+                if key not in seen:
+                    qwen_issues.append(issue)
+                    seen.add(key)
+            print(f"[Performance] Qwen check: {time.time() - qwen_start:.2f}s, issues: {len(raw_issues)}")
+        except Exception as e:
+            partial = True
+            print(f"[Qwen] 调用失败，跳过大模型审校：{str(e)}")
+        return qwen_issues, partial
+
+    def _run_rules(self, content, options, rules_mode, text_index=None, lexicon_hits=None):
+        """规则检查（毫秒级）：返回 (typo_issues, punctuation_issues, sensitive_issues)"""
+        if text_index is None:
+            text_index = TextIndex(content)
+        typo_issues, punctuation_issues, sensitive_issues = [], [], []
+        check_typo = options.get('check_typos', True) or options.get('check_grammar', True)
+        check_sensitive = options.get('check_sensitive', True)
+        # 词库类检查（敏感词、意识形态词、混淆集）共用一次自动机扫描
+        if lexicon_hits is None and (check_typo or check_sensitive):
+            lexicon_hits = lexicon_matcher.scan(content)
         # 1. 错别字和语法检查
-        if options.get('check_typos', True) or options.get('check_grammar', True):
+        if check_typo:
             typo_start = time.time()
-            typo_issues = check_typos_and_grammar(content)
+            typo_issues = check_typos_and_grammar(content, lexicon_hits, text_index)
             # 先做白名单误判过滤（规则输出）
             typo_issues = [it for it in typo_issues if not self._is_false_positive_confusion(content, it)]
             # 规则模式裁剪
@@ -267,117 +678,95 @@ class ProofreadingEngine:
                 for it in typo_issues:
                     if rules_mode == 'off':
                         continue  # 全部忽略规则 typo/grammar
-                    t = it.get('type')
-                    st = it.get('subtype')
-                    orig = (it.get('original') or '').strip()
-                    sug = (it.get('suggestion') or '').strip()
+                    orig = (it.original or '').strip()
+                    sug = (it.suggestion or '').strip()
                     # 过滤低价值功能词（覆盖 typo 与 grammar），含 subtype 与兜底匹配
-                    if t in ('typo', 'grammar') and (
-                        st == 'function_word' or orig in FUNCTION_WORDS or (sug and sug in FUNCTION_WORDS)
+                    if it.type in (TYPO, GRAMMAR) and (
+                        it.subtype == 'function_word' or orig in FUNCTION_WORDS or (sug and sug in FUNCTION_WORDS)
                     ):
                         continue
                     filtered.append(it)
                 typo_issues = filtered
-            all_issues.extend(typo_issues)
             print(f"[Performance] Typo/Grammar check: {time.time() - typo_start:.2f}s")
         # 2. 标点符号检查
         if options.get('check_punctuation', True):
             punct_start = time.time()
-            punctuation_issues = check_punctuation(content)
-            all_issues.extend(punctuation_issues)
+            punctuation_issues = check_punctuation(content, text_index)
             print(f"[Performance] Punctuation check: {time.time() - punct_start:.2f}s")
         # 3. 敏感内容检查
-        if options.get('check_sensitive', True):
+        if check_sensitive:
             sensitive_start = time.time()
-            sensitive_issues = check_sensitive_content(content)
-            # 混合方案：DFA 召回 + LLM 解释与重写（可选，静默降级）
-            try:
-                if options.get('qwen', True) and sensitive_issues:
-                    detections = []
-                    for it in sensitive_issues:
-                        pos = it.get('position') or {}
-                        s = pos.get('start'); e = pos.get('end')
-                        if isinstance(s, int) and isinstance(e, int) and 0 <= s < e <= len(content):
-                            detections.append({
-                                'start': s,
-                                'end': e,
-                                'word': content[s:e],
-                                'category': it.get('category') or '敏感内容'
-                            })
-                    if detections:
-                        exps = self.qwen_proofreader.explain_sensitive(content, detections)
-                        # 按区间索引合并
-                        exp_map = { (ex['start'], ex['end']): ex for ex in exps }
-                        for it in sensitive_issues:
-                            pos = it.get('position') or {}
-                            key = (pos.get('start'), pos.get('end'))
-                            ex = exp_map.get(key)
-                            if ex and ex.get('corrected'):
-                                reason = (ex.get('reason') or '优化表述').strip()
-                                corrected = ex.get('corrected').strip()
-                                # 用更安全的改写替换建议，同时补充友好解释
-                                it['suggestion'] = corrected
-                                category = it.get('category') or '敏感内容'
-                                msg = f"敏感内容（{category}）：{reason}"
-                                if 'message' not in it or not it.get('message'):
-                                    it['message'] = msg
-                                desc = (it.get('description') or '').strip()
-                                it['description'] = (desc + ('；' if desc else '') + reason)[:120]
-                                it['source'] = it.get('source') or 'hybrid'
-                                it['subtype'] = it.get('subtype') or 'sensitive_explain'
-            except Exception as e:
-                # 安全降级：不中断流程
-                print(f"[Sensitive-Hybrid] 解释阶段降级：{str(e)}")
-            all_issues.extend(sensitive_issues)
+            sensitive_issues = check_sensitive_content(content, lexicon_hits)
             print(f"[Performance] Sensitive content check: {time.time() - sensitive_start:.2f}s, issues: {len(sensitive_issues)}")
+        return typo_issues, punctuation_issues, sensitive_issues
+
+    def _explain_sensitive(self, content, sensitive_issues):
+        """对 DFA 召回的敏感词调用 LLM 补充解释与改写建议（原地更新，失败静默降级），返回解释是否完整"""
+        try:
+            if sensitive_issues:
+                detections = []
+                for it in sensitive_issues:
+                    s, e = it.start, it.end
+                    if 0 <= s < e <= len(content):
+                        detections.append({
+                            'start': s,
+                            'end': e,
+                            'word': content[s:e],
+                            'category': it.category or '敏感内容'
+                        })
+                if detections:
+                    exps = self.qwen_proofreader.explain_sensitive(content, detections)
+                    if exps is None:
+                        return False
+                    # 按区间索引合并
+                    exp_map = { (ex['start'], ex['end']): ex for ex in exps }
+                    for it in sensitive_issues:
+                        ex = exp_map.get((it.start, it.end))
+                        if ex and ex.get('corrected'):
+                            reason = (ex.get('reason') or '优化表述').strip()
+                            corrected = ex.get('corrected').strip()
+                            # 用更安全的改写替换建议，同时补充友好解释
+                            it.suggestion = corrected
+                            category = it.category or '敏感内容'
+                            if not it.message:
+                                it.message = f"敏感内容（{category}）：{reason}"
+                            desc = (it.description or '').strip()
+                            it.description = (desc + ('；' if desc else '') + reason)[:120]
+                            it.source = it.source or 'hybrid'
+                            it.subtype = it.subtype or 'sensitive_explain'
+                            # 输出结构追加 message/source/subtype 字段
+                            it.layout = LAYOUT_CATEGORIZED_EXPLAINED
+        except Exception as e:
+            # 安全降级：不中断流程
+            print(f"[Sensitive-Hybrid] 解释阶段降级：{str(e)}")
+            return False
+        return True
+
+    def _postprocess_chunk(self, content, all_issues, rules_mode, text_index=None):
+        """块内后处理：规则 Lite 抑制、重叠和解与展示排序"""
         # === 规则 Lite 抑制：靠近 LLM 的规则建议抑制 + 每段上限 ===
         if rules_mode in ('lite', 'full'):
             # 1) 计算 LLM 区间集合
-            llm_ranges = []
-            for it in all_issues:
-                src = it.get('source', '')
-                if src == 'qwen':
-                    pos = it.get('position') or {}
-                    s = pos.get('start'); e = pos.get('end')
-                    if isinstance(s, int) and isinstance(e, int):
-                        llm_ranges.append((s, e))
+            llm_ranges = [(it.start, it.end) for it in all_issues if it.source == 'qwen']
+            llm_window = LLMWindowIndex(llm_ranges, self.window_suppress_radius)
             # 2) 窗口抑制与分段上限
             suppressed = []
             kept = []
             # 简易段落切分：以换行作为段界
-            paragraph_id_by_pos = {}
-            pid = 0; last = 0
-            for i,ch in enumerate(content):
-                if ch == '\n':
-                    for k in range(last, i+1):
-                        paragraph_id_by_pos[k] = pid
-                    last = i+1; pid += 1
-            for k in range(last, len(content)):
-                paragraph_id_by_pos[k] = pid
+            if text_index is None:
+                text_index = TextIndex(content)
             per_para_count = {}
             for it in all_issues:
-                t = it.get('type')
-                src = it.get('source', '')
-                st = it.get('subtype')
-                if t in ('typo','grammar') and src != 'qwen':
-                    pos = it.get('position') or {}
-                    s = pos.get('start'); e = pos.get('end')
-                    if not (isinstance(s,int) and isinstance(e,int)):
-                        suppressed.append(it); continue
+                t = it.type
+                if t in (TYPO, GRAMMAR) and it.source != 'qwen':
+                    s, e = it.start, it.end
                     # 窗口抑制：靠近任何 LLM 区间则抑制（仅 lite）
-                    if rules_mode == 'lite':
-                        near_llm = False
-                        for ls, le in llm_ranges:
-                            if max(0, min(e, le) - max(s, ls)) > 0:
-                                near_llm = True; break
-                            if abs(s - le) <= self.window_suppress_radius or abs(ls - e) <= self.window_suppress_radius:
-                                near_llm = True; break
-                        if near_llm:
-                            suppressed.append(it); continue
+                    if rules_mode == 'lite' and llm_window.near(s, e):
+                        suppressed.append(it); continue
                     # 每段上限
-                    pid_s = paragraph_id_by_pos.get(s, 0)
+                    pid_s = text_index.paragraph_of(s)
                     cnt = per_para_count.get(pid_s, 0)
-                    limit = self.rule_typos_per_paragraph_limit if t == 'typo' else 3
+                    limit = self.rule_typos_per_paragraph_limit if t == TYPO else 3
                     if cnt >= limit:
                         suppressed.append(it); continue
                     per_para_count[pid_s] = cnt + 1
@@ -387,98 +776,281 @@ class ProofreadingEngine:
             all_issues = kept
         # === 权重、重叠和解、重组 ===
         # 按位置排序
-        all_issues.sort(key=lambda x: x['position']['start'])
+        all_issues.sort(key=lambda x: x.start)
         # 权重计算
         def _weight(issue):
-            t = issue.get('type')
-            sev = issue.get('severity', '')
-            source = issue.get('source', '')
-            subtype = issue.get('subtype', '')
+            t = issue.type
+            source = issue.source
+            subtype = issue.subtype
             # 基础权重
             if source == 'qwen' and subtype == 'style':
                 base = 4.0  # 略降
-            elif t == 'typo':
+            elif t == TYPO:
                 if subtype == 'function_word':
                     base = 0.5  # 明显下调
                 elif subtype == 'high_value':
                     base = 3.0
                 else:
                     base = 2.2
-            elif t == 'grammar':
+            elif t == GRAMMAR:
                 base = 2.5 if source == 'qwen' else 2.0
-            elif t == 'sensitive':
+            elif t == SENSITIVE:
                 base = 2.6
-            elif t == 'punctuation':
+            elif t == PUNCTUATION:
                 base = 1.25
             else:
                 base = 1.0
-            sev_bonus = {'high': 1.0, 'medium': 0.5, 'low': 0.0, 'warning': 0.2, 'info': 0.1}.get(sev, 0.0)
-            return base + sev_bonus
+            return base + _CHUNK_SEVERITY_BONUS[issue.severity]
         # 重叠和解
-        suppressed = [False] * len(all_issues)
-        for i in range(len(all_issues)):
-            if suppressed[i]:
-                continue
-            a = all_issues[i]; a_s, a_e = a['position']['start'], a['position']['end']
-            for j in range(i+1, len(all_issues)):
-                if suppressed[j]:
-                    continue
-                b = all_issues[j]; b_s, b_e = b['position']['start'], b['position']['end']
-                if not (b_s >= a_e or b_e <= a_s):
-                    if _weight(b) > _weight(a):
-                        suppressed[i] = True; break
-                    else:
-                        suppressed[j] = True
-        filtered_issues = [it for k, it in enumerate(all_issues) if not suppressed[k]]
-        # 组装展示顺序
-        llm_style = [it for it in filtered_issues if it.get('source') == 'qwen' and it.get('subtype') == 'style']
-        punct = [it for it in filtered_issues if it.get('type') == 'punctuation']
-        other = [it for it in filtered_issues if it not in llm_style and it not in punct]
-        # 标点限流
-        punct = punct[:12]
-        all_issues = llm_style + other + punct
-        return all_issues
+        filtered_issues = reconcile_overlaps(all_issues, _weight)
+        # 组装展示顺序（标点限流）
+        return partition_for_display(filtered_issues, punct_limit=12)
     
-    def _process_chunked(self, content, options):
-        """分块处理长文本"""
+    def _process_chunked(self, content, options, text_index=None):
+        """分块处理长文本（默认并行扇出，按块顺序合并），返回 (issues, partial)"""
         all_issues = []
-        chunks = self._split_text_smart(content)
+        partial = False
+        if text_index is None:
+            text_index = TextIndex(content)
+        chunks = self._split_text_smart(content, text_index)
+        # 各块索引由全文索引切片得到，不再重新扫描
+        chunk_indexes = [text_index.sub(offset, offset + len(text)) for text, offset in chunks]
         
-        for i, (chunk_text, chunk_offset) in enumerate(chunks):
-            print(f"[Performance] Processing chunk {i+1}/{len(chunks)} (offset: {chunk_offset}, size: {len(chunk_text)})")
-            
-            chunk_issues = self._process_single(chunk_text, options)
-            
+        if options.get('parallel', True) and self.chunk_workers > 1 and len(chunks) > 1:
+            chunk_results, partial = self._run_chunks_parallel(chunks, options, chunk_indexes)
+        else:
+            chunk_results = []
+            for i, (chunk_text, chunk_offset) in enumerate(chunks):
+                print(f"[Performance] Processing chunk {i+1}/{len(chunks)} (offset: {chunk_offset}, size: {len(chunk_text)})")
+                chunk_issues, chunk_partial = self._process_single(chunk_text, options, chunk_indexes[i])
+                chunk_results.append(chunk_issues)
+                partial = partial or chunk_partial
+        
+        for (_, chunk_offset), chunk_issues in zip(chunks, chunk_results):
             # 调整位置偏移（全局偏移）
             for issue in chunk_issues:
-                issue['position']['start'] += chunk_offset
-                issue['position']['end'] += chunk_offset
+                issue.start += chunk_offset
+                issue.end += chunk_offset
             
             all_issues.extend(chunk_issues)
         
-        return all_issues
-    
-    def _split_text_smart(self, text):
+        return all_issues, partial
+
+    def _check_executor_pid(self):
+        # fork 后子进程里父进程的工作线程已不存在，丢弃旧线程池（不 shutdown，避免等待不存在的线程）
+        if self._executor_pid != os.getpid():
+            with self._chunk_executor_lock:
+                if self._executor_pid != os.getpid():
+                    self._chunk_executor = None
+                    self._batch_executor = None
+                    self._executor_pid = os.getpid()
+
+    def _get_chunk_executor(self):
+        """懒创建共享线程池；线程数即进程内分块处理的并发上限"""
+        self._check_executor_pid()
+        if self._chunk_executor is None:
+            with self._chunk_executor_lock:
+                if self._chunk_executor is None:
+                    self._chunk_executor = ThreadPoolExecutor(
+                        max_workers=self.chunk_workers,
+                        thread_name_prefix='proofread-chunk'
+                    )
+        return self._chunk_executor
+
+    def _get_batch_executor(self):
+        """懒创建批量审校线程池"""
+        self._check_executor_pid()
+        if self._batch_executor is None:
+            with self._chunk_executor_lock:
+                if self._batch_executor is None:
+                    self._batch_executor = ThreadPoolExecutor(
+                        max_workers=max(1, self.batch_workers),
+                        thread_name_prefix='proofread-batch'
+                    )
+        return self._batch_executor
+
+    def _iter_chunks_with_deadline(self, fn, count):
+        """
+        在共享线程池上执行 fn(0..count-1)，按完成顺序产出 (序号, future)；超过截止时间的块产出 (序号, None)。
+        每块的截止时间从工作线程开始执行它时计起，在线程池中排队等待的时间不计入，
+        避免其他请求占满线程池时把本请求的块挤成超时；排队超过截止时间仍未开始的块取消。
+        已开始执行的超时块无法中断，会在其大模型调用返回后结束，结果被丢弃。
+        """
+        executor = self._get_chunk_executor()
+        dispatched = [None] * count
+        abandoned = [False] * count
+
+        def run(i):
+            # 判定超时后才轮到执行的块直接放弃，尽快让出工作线程
+            if abandoned[i]:
+                return None
+            dispatched[i] = time.monotonic()
+            return fn(i)
+
+        submitted = time.monotonic()
+        futures = {executor.submit(run, i): i for i in range(count)}
+        pending = set(futures)
+
+        def expires(future):
+            started = dispatched[futures[future]]
+            return (started if started is not None else submitted) + self.chunk_deadline
+
+        while pending:
+            timeout = max(0.0, min(expires(f) for f in pending) - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                yield futures[future], future
+            now = time.monotonic()
+            for future in [f for f in pending if expires(f) <= now]:
+                pending.discard(future)
+                abandoned[futures[future]] = True
+                future.cancel()
+                yield futures[future], None
+
+    def _run_chunks_parallel(self, chunks, options, chunk_indexes=None):
+        """
+        在共享线程池上并行处理各块，结果按块序号归位，保证合并顺序确定，返回 (results, partial)。
+        超过截止时间（见 _iter_chunks_with_deadline）的块降级为纯规则处理（规则检查为毫秒级）；
+        有块超时或大模型结果不完整时 partial 为 True。
+        """
+        start = time.time()
+        if chunk_indexes is None:
+            chunk_indexes = [None] * len(chunks)
+        results = [None] * len(chunks)
+        late = []
+        partial = False
+        for i, future in self._iter_chunks_with_deadline(
+            lambda i: self._process_single(chunks[i][0], options, chunk_indexes[i]), len(chunks)
+        ):
+            if future is None:
+                late.append(i)
+            else:
+                # 块内异常与串行路径一致：直接抛出
+                results[i], chunk_partial = future.result()
+                partial = partial or chunk_partial
+
+        if late:
+            print(f"[Performance] Chunk deadline {self.chunk_deadline:.0f}s exceeded, {len(late)}/{len(chunks)} chunks degraded to rules-only")
+            fallback_options = dict(options, qwen=False)
+            for i in sorted(late):
+                results[i], _ = self._process_single(chunks[i][0], fallback_options, chunk_indexes[i])
+
+        print(f"[Performance] Parallel chunks: {len(chunks)} chunks, workers={self.chunk_workers}, {time.time() - start:.2f}s")
+        return results, partial or bool(late)
+
+    def _process_segment(self, content, options):
+        """处理一段文本：超过分块阈值时分块，否则整体处理，返回 (issues, partial)"""
+        text_index = TextIndex(content)
+        if len(content) > self.chunk_size:
+            return self._process_chunked(content, options, text_index)
+        return self._process_single(content, options, text_index)
+
+    def _process_incremental(self, content, options, text_index=None):
+        """
+        段落级增量审校：按换行切段，段落问题以内容哈希记忆（段内相对偏移），
+        仅重算新增或改动的段落，最后把所有段落的问题平移到当前全局偏移，返回 (issues, partial)。
+        跨段问题（多为大模型给出）及 Lite 抑制窗口越过段界的大模型问题涉及的段落不记忆，
+        之后每次与相邻的待重算段落一起重算，与整篇审校一致；但改动段落只与同样待重算的相邻段落合并，
+        与已记忆的未改动段落之间新出现的跨段关联检测不到。
+        """
+        if text_index is None:
+            text_index = TextIndex(content)
+        # 以换行作为段界，换行符归属前一段（与 Lite 每段上限的段落划分一致）
+        paragraphs = [(content[start:end], start) for start, end in text_index.paragraph_spans()]
+        fingerprint = self._options_fingerprint(options)
+        keys = [self._cache_key(text, options, fingerprint, scope='paragraph') for text, _ in paragraphs]
+        resolved = [None] * len(paragraphs)
+        pending = []
+        for idx, (text, _) in enumerate(paragraphs):
+            if not text.strip():
+                resolved[idx] = []
+                continue
+            cached = self.paragraph_cache.get(keys[idx])
+            if cached is None:
+                pending.append(idx)
+            else:
+                resolved[idx] = cached
+
+        print(f"[Incremental] {len(paragraphs)} paragraphs, {len(pending)} to recompute")
+
+        partial = False
+        radius = self.window_suppress_radius if options['rules_mode'] == 'lite' else 0
+        for group in self._group_pending_paragraphs(paragraphs, pending):
+            seg_start = paragraphs[group[0]][1]
+            seg_text = ''.join(paragraphs[i][0] for i in group)
+            bounds = [paragraphs[i][1] - seg_start for i in group]
+            buckets = {i: [] for i in group}
+            linked = set()
+            issues, segment_partial = self._process_segment(seg_text, options)
+            partial = partial or segment_partial
+            for issue in issues:
+                # 按起点归属段落（跨段问题归入起点所在段）
+                k = max(0, bisect_right(bounds, issue.start) - 1)
+                # 跨段问题与 Lite 抑制窗口越过段界的大模型问题依赖相邻段落的内容：
+                # 涉及的段落都不记忆，下次与相邻的待重算段落合并重算
+                reach = radius if issue.source == 'qwen' else 0
+                first = max(0, bisect_right(bounds, issue.start - reach) - 1)
+                last = bisect_right(bounds, max(issue.start, issue.end - 1) + reach) - 1
+                if last > first:
+                    linked.update(group[first:last + 1])
+                buckets[group[k]].append(issue.shifted(-bounds[k]))
+            for idx, items in buckets.items():
+                # 超时降级的片段只有规则结果，不记忆，下次编辑时重算
+                if not segment_partial and idx not in linked:
+                    self.paragraph_cache.put(keys[idx], items)
+                resolved[idx] = items
+
+        all_issues = []
+        for (_, offset), items in zip(paragraphs, resolved):
+            all_issues.extend(issue.shifted(offset) for issue in items)
+        return all_issues, partial
+
+    def _group_pending_paragraphs(self, paragraphs, pending):
+        """将相邻的待重算段落合并为不超过分块阈值的片段，减少 LLM 调用次数"""
+        groups = []
+        current = []
+        size = 0
+        for idx in pending:
+            length = len(paragraphs[idx][0])
+            if current and (idx != current[-1] + 1 or size + length > self.chunk_size):
+                groups.append(current)
+                current = []
+                size = 0
+            current.append(idx)
+            size += length
+        if current:
+            groups.append(current)
+        return groups
+
+    def _split_text_smart(self, text, text_index=None):
         """智能分割文本，尽量在句子边界分割"""
+        if text_index is None:
+            text_index = TextIndex(text)
         chunks = []
         current_pos = 0
         
         while current_pos < len(text):
-            chunk_end = min(current_pos + self.chunk_size, len(text))
-            
-            # 如果不是最后一块，尝试在句子边界分割
-            if chunk_end < len(text):
-                # 寻找句号、问号、感叹号等句子结束符
-                for i in range(chunk_end, max(current_pos + self.chunk_size // 2, chunk_end - 200), -1):
-                    if text[i-1] in '。！？\n':
-                        chunk_end = i
-                        break
-            
+            chunk_end = self._next_chunk_end(text_index, current_pos)
             chunk_text = text[current_pos:chunk_end]
             chunks.append((chunk_text, current_pos))
             current_pos = chunk_end
         
         return chunks
+
+    def _next_chunk_end(self, text_index, current_pos):
+        """从 current_pos 开始的下一块的结束位置；只依赖 current_pos 之后 chunk_size 字以内的文本"""
+        chunk_end = min(current_pos + self.chunk_size, text_index.length)
+        
+        # 如果不是最后一块，尝试在句子边界分割
+        if chunk_end < text_index.length:
+            # 寻找句号、问号、感叹号等句子结束符（向前最多 200 字、不少于半块）
+            boundary = text_index.last_sentence_end(
+                max(current_pos + self.chunk_size // 2, chunk_end - 200), chunk_end
+            )
+            if boundary is not None:
+                chunk_end = boundary
+        return chunk_end
     
     def _calculate_statistics(self, issues):
         """计算统计信息"""
@@ -491,14 +1063,14 @@ class ProofreadingEngine:
         }
         
         for issue in issues:
-            issue_type = issue['type']
-            if issue_type == 'typo':
+            issue_type = issue.type
+            if issue_type == TYPO:
                 stats['typos'] += 1
-            elif issue_type == 'grammar':
+            elif issue_type == GRAMMAR:
                 stats['grammar'] += 1
-            elif issue_type == 'punctuation':
+            elif issue_type == PUNCTUATION:
                 stats['punctuation'] += 1
-            elif issue_type == 'sensitive':
+            elif issue_type == SENSITIVE:
                 stats['sensitive'] += 1
         
         return stats
@@ -506,3 +1078,8 @@ class ProofreadingEngine:
 # 创建全局实例
 proofreading_engine = ProofreadingEngine()
 
+# 后台初始化顺序：词库 → 纠错模型 → 规则预热（由 readiness.start() 触发）
+readiness.register('lexicons', proofreading_engine.ensure_loaded)
+readiness.register('typo_checker', lambda: get_typo_checker().describe())
+readiness.register('warmup', proofreading_engine.warm_up)
+
@@ -3,7 +3,8 @@
 检查中文标点符号的规范使用
 """
 
-import re
+from .text_index import TextIndex
+from .issue import Issue, PUNCTUATION, LOW, MEDIUM, LAYOUT_CATEGORIZED
 
 class PunctuationChecker:
     def __init__(self):
@@ -12,36 +13,17 @@ class PunctuationChecker:
         # 英文标点符号 - 使用原始字符串避免转义问题
         self.english_punctuation = r',.!?;:"\'()[]<>'
         
-        # 标点符号配对
+        # 标点符号配对（开 -> 闭）。英文直引号开闭同形、无法区分，不做配对检查
         self.paired_punctuation = {
-            '"': '"',
-            "'": "'",
             '（': '）',
             '【': '】',
-            '《': '》'
+            '《': '》',
+            '“': '”',
+            '‘': '’'
         }
-    
-    def check_punctuation(self, text):
-        """检查标点符号使用规范"""
-        issues = []
-        
-        # 检查中英文标点混用
-        issues.extend(self._check_mixed_punctuation(text))
-        
-        # 检查标点符号配对
-        issues.extend(self._check_paired_punctuation(text))
-        
-        # 检查标点符号位置
-        issues.extend(self._check_punctuation_position(text))
-        
-        return issues
-    
-    def _check_mixed_punctuation(self, text):
-        """检查中英文标点混用"""
-        issues = []
-        
+        self.closing_punctuation = {close: open_ for open_, close in self.paired_punctuation.items()}
         # 常见的中英文标点对应关系
-        replacements = {
+        self.mixed_replacements = {
             ',': '，',
             '.': '。',
             '!': '！',
@@ -49,73 +31,90 @@ class PunctuationChecker:
             ';': '；',
             ':': '：'
         }
+        self.mixed_chars = ''.join(self.mixed_replacements)
+        self.pair_chars = ''.join(self.paired_punctuation) + ''.join(self.closing_punctuation)
+    
+    def check_punctuation(self, text, text_index=None):
+        """
+        检查标点符号使用规范
+        :param text_index: 已有的 TextIndex(text)；为空时自行构建
+        """
+        issues = []
+        if text_index is None:
+            text_index = TextIndex(text)
         
-        for english, chinese in replacements.items():
-            # 查找英文标点在中文文本中的使用
-            pattern = r'[\u4e00-\u9fff]' + re.escape(english)
-            matches = re.finditer(pattern, text)
-            
-            for match in matches:
-                issues.append({
-                    'type': 'punctuation',
-                    'category': '标点符号',
-                    'position': {
-                        'start': match.end() - 1,
-                        'end': match.end()
-                    },
-                    'original': english,
-                    'suggestion': chinese,
-                    'description': f'建议使用中文标点符号 "{chinese}" 替换 "{english}"',
-                    'severity': 'low'
-                })
+        # 检查中英文标点混用与标点符号配对
+        issues.extend(self._scan_punctuation(text, text_index))
+        
+        # 检查标点符号位置
+        issues.extend(self._check_punctuation_position(text))
         
         return issues
     
-    def _check_paired_punctuation(self, text):
-        """检查配对标点符号"""
+    def _scan_punctuation(self, text, text_index):
+        """
+        单遍扫描（各标点位置由 TextIndex 码点数组一次筛出，无需逐个正则或 count/rfind 扫描全文）：
+          - 中英文标点混用：紧跟在汉字之后的英文标点；
+          - 配对标点：开标点入栈，闭标点与栈中最近的同类开标点配对，
+            其间未闭合的开标点与找不到开标点的闭标点均在原位置报告，扫描结束时栈中剩余的开标点同样报告。
+        """
         issues = []
-        
-        for open_punct, close_punct in self.paired_punctuation.items():
-            open_count = text.count(open_punct)
-            close_count = text.count(close_punct)
-            
-            if open_count != close_count:
-                # 找到不配对的位置
-                if open_count > close_count:
-                    # 缺少闭合标点
-                    last_pos = text.rfind(open_punct)
-                    if last_pos != -1:
-                        issues.append({
-                            'type': 'punctuation',
-                            'category': '标点符号',
-                            'position': {
-                                'start': last_pos,
-                                'end': last_pos + 1
-                            },
-                            'original': open_punct,
-                            'suggestion': f'{open_punct}...{close_punct}',
-                            'description': f'配对标点符号 "{open_punct}" 缺少对应的 "{close_punct}"',
-                            'severity': 'medium'
-                        })
-                else:
-                    # 多余的闭合标点
-                    last_pos = text.rfind(close_punct)
-                    if last_pos != -1:
-                        issues.append({
-                            'type': 'punctuation',
-                            'category': '标点符号',
-                            'position': {
-                                'start': last_pos,
-                                'end': last_pos + 1
-                            },
-                            'original': close_punct,
-                            'suggestion': '',
-                            'description': f'多余的闭合标点符号 "{close_punct}"',
-                            'severity': 'medium'
-                        })
-        
+        for pos in text_index.positions_after_cjk(self.mixed_chars):
+            english = text[pos]
+            chinese = self.mixed_replacements[english]
+            issues.append(Issue(
+                PUNCTUATION, pos, pos + 1, english, chinese, LOW, LAYOUT_CATEGORIZED,
+                category='标点符号',
+                description=f'建议使用中文标点符号 "{chinese}" 替换 "{english}"',
+            ))
+
+        stack = []  # [(开标点, 位置)]
+        open_counts = dict.fromkeys(self.paired_punctuation, 0)  # 栈中各开标点数量，无对应开标点时免于回溯
+        paired = self.paired_punctuation
+        closing = self.closing_punctuation
+        last = len(text) - 1
+        for pos in text_index.positions_of(self.pair_chars):
+            ch = text[pos]
+            if ch in paired:
+                stack.append((ch, pos))
+                open_counts[ch] += 1
+                continue
+            # 英文单词中的 ’ 视为撇号（如 don’t）
+            if ch == '’' and 0 < pos < last and text[pos - 1].isascii() and text[pos - 1].isalpha() \
+                    and text[pos + 1].isascii() and text[pos + 1].isalpha():
+                continue
+            open_punct = closing[ch]
+            if not open_counts[open_punct]:
+                issues.append(self._extra_close_issue(ch, pos))
+                continue
+            depth = len(stack) - 1
+            while stack[depth][0] != open_punct:
+                depth -= 1
+            # 与其配对的开标点之后仍未闭合的开标点（交叉嵌套）
+            for unclosed, unclosed_pos in stack[depth + 1:]:
+                issues.append(self._unclosed_issue(unclosed, unclosed_pos))
+                open_counts[unclosed] -= 1
+            open_counts[open_punct] -= 1
+            del stack[depth:]
+        for unclosed, unclosed_pos in stack:
+            issues.append(self._unclosed_issue(unclosed, unclosed_pos))
         return issues
     
+    def _unclosed_issue(self, open_punct, pos):
+        close_punct = self.paired_punctuation[open_punct]
+        return Issue(
+            PUNCTUATION, pos, pos + 1, open_punct, f'{open_punct}...{close_punct}', MEDIUM, LAYOUT_CATEGORIZED,
+            category='标点符号',
+            description=f'配对标点符号 "{open_punct}" 缺少对应的 "{close_punct}"',
+        )
+    
+    def _extra_close_issue(self, close_punct, pos):
+        return Issue(
+            PUNCTUATION, pos, pos + 1, close_punct, '', MEDIUM, LAYOUT_CATEGORIZED,
+            category='标点符号',
+            description=f'多余的闭合标点符号 "{close_punct}"',
+        )
+    
     def _check_punctuation_position(self, text):
         """检查标点符号位置"""
         issues = []
@@ -144,7 +143,7 @@ class PunctuationChecker:
 # 创建全局实例
 punctuation_checker = PunctuationChecker()
 
-def check_punctuation(text):
+def check_punctuation(text, text_index=None):
     """检查标点符号规范"""
-    return punctuation_checker.check_punctuation(text)
+    return punctuation_checker.check_punctuation(text, text_index)
 
@@ -8,21 +8,252 @@ import json
 import requests
 import re
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from .llm_cache import LLMResponseCache, get_response_cache
+from .resilience import UpstreamGuard, UpstreamError
+from .token_budget import TokenCounter, LLMSplitter
+from .issue import Issue, TYPO, WARNING, TYPE_CODES, TYPE_NAMES, LAYOUT_QWEN, LAYOUT_QWEN_STYLE, LAYOUT_QWEN_TEXT
+
+# 提示词版本：修改系统/用户提示词时需同步递增，使持久化缓存自然失效
+PROOFREAD_PROMPT_VERSION = 'proofread-v1'
+EXPLAIN_PROMPT_VERSION = 'explain-v1'
+
+# 审校提示词（新增 sensitive 类型与 few-shot 示例）
+PROOFREAD_SYSTEM_PROMPT = """你是一个专业的中文文本审校助手。请严格且只输出如下 JSON 结构：
+{
+  "corrections": [
+    {
+      "original": "原始错误文本",
+      "corrected": "修正后文本",
+      "type": "typo|grammar|punctuation|sensitive|style",
+      "reason": "简洁说明修改原因（不超过40字）",
+      "start": 数字,  // 在原文中的起始索引（包含，0 基）
+      "end": 数字     // 在原文中的结束索引（不包含）
+    }
+  ]
+}
+
+分类说明：
+- typo：错别字、用词错误（如“的地得”误用、常见混淆词）。
+- grammar：语序/搭配/语法性错误；风格表达建议请用 style。
+- punctuation：中英文标点混用、成对标点缺失、标点位置不当等。
+- sensitive：涉政、涉黄、暴恐、违法合规风险、辱骂歧视等（当存在潜在风险或不当表述时使用）。
+- style：非刚性问题的表达/风格优化，保留为建议。
+
+严格要求：
+- 仅输出 JSON，不要包含任何多余文本或解释。
+- start/end 必须精准对应 original 在用户原文中的片段（0<=start<end<=len(原文)）。
+- type 仅限上述五类；风格类用 style，合规风险用 sensitive。
+- 没有问题时返回 {"corrections": []}。
+
+示例（仅供学习格式，不要包含在输出中）：
+{
+  "corrections": [
+    {"original": "基于这个原理。", "corrected": "基于这一原理。", "type": "grammar", "reason": "用词更规范", "start": 0, "end": 7},
+    {"original": "Hello，世界", "corrected": "Hello, 世界", "type": "punctuation", "reason": "英文逗号用半角", "start": 0, "end": 8},
+    {"original": "“数据分析(DA”", "corrected": "“数据分析(DA)”", "type": "punctuation", "reason": "补全成对标点", "start": 0, "end": 8},
+    {"original": "某些群体都是…", "corrected": "某些群体往往……", "type": "sensitive", "reason": "避免刻板/歧视性表达", "start": 0, "end": 7}
+  ]
+}
+"""
+PROOFREAD_USER_PROMPT = "请审校以下文本，按上面的 JSON 结构返回；注意：优先识别语法、标点与合规风险，精确给出 start/end：\n\n"
+
+
+class OutputTruncated(Exception):
+    """模型输出达到 max_tokens 被截断（JSON 不完整）"""
+    pass
+
+class QwenHttpClient:
+    """
+    进程内共享的 HTTP 客户端：连接池 + keep-alive，复用 TCP/TLS 连接。
+    连接池由 urllib3 加锁管理，可在多线程间共享；池满时阻塞等待空闲连接，
+    因此 pool_size 同时是对上游的并发连接上限。
+    fork 后的子进程首次使用时重建会话，不与父进程共用已建立的连接。
+    """
+    def __init__(self, pool_size=None, connect_timeout=None, read_timeout=None):
+        self.pool_size = int(pool_size or os.getenv("QWEN_POOL_SIZE", 16))
+        self.connect_timeout = float(connect_timeout or os.getenv("QWEN_CONNECT_TIMEOUT", 5))
+        self.read_timeout = float(read_timeout or os.getenv("QWEN_READ_TIMEOUT", 30))
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._requests = 0
+        self._new_session()
+
+    def _new_session(self):
+        self.session = requests.Session()
+        # 重试由调用方控制，适配器层不做隐式重试
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, pool_block=True, max_retries=0)
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # 继承自父进程的套接字直接丢弃，不在子进程中关闭（会影响父进程的 TLS 会话）
+                    self._in_use = 0
+                    self._new_session()
+
+    @property
+    def timeout(self):
+        """(连接超时, 读取超时)"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def post(self, url, **kwargs):
+        self._check_pid()
+        kwargs.setdefault('timeout', self.timeout)
+        with self._lock:
+            self._in_use += 1
+            self._requests += 1
+        try:
+            return self.session.post(url, **kwargs)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+
+    def warm_up(self, url, connections=2):
+        """并发发起轻量请求，在启动阶段完成握手，使池中保留若干空闲长连接"""
+        self._check_pid()
+
+        def ping():
+            try:
+                self.session.head(url, timeout=(self.connect_timeout, 5))
+            except requests.exceptions.RequestException as e:
+                print(f"[QwenHttp] Warm-up request failed: {str(e)}")
+
+        threads = [threading.Thread(target=ping, daemon=True) for _ in range(max(1, min(connections, self.pool_size)))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        print(f"[QwenHttp] Warm-up finished: {self.stats()}")
+
+    def stats(self):
+        """
+        连接池统计：使用中、空闲连接数，以及 urllib3 累计新建的连接数
+        （连接池满时丢弃的连接会被新建替代；同一连接断开后原地重连不计入）
+        """
+        idle = 0
+        created = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            try:
+                pool = pools[key]
+            except KeyError:
+                continue
+            created += getattr(pool, 'num_connections', 0)
+            queue = getattr(pool, 'pool', None)
+            if queue is not None:
+                idle += sum(1 for conn in list(queue.queue) if conn is not None)
+        with self._lock:
+            in_use = self._in_use
+            total = self._requests
+        return {
+            'pool_size': self.pool_size,
+            'in_use': in_use,
+            'idle': idle,
+            'connections_created': created,
+            'requests': total,
+        }
+
+
+_shared_http_client = None
+_shared_http_client_lock = threading.Lock()
+
+def get_http_client() -> QwenHttpClient:
+    """获取进程内共享的 HTTP 客户端（懒创建）"""
+    global _shared_http_client
+    if _shared_http_client is None:
+        with _shared_http_client_lock:
+            if _shared_http_client is None:
+                _shared_http_client = QwenHttpClient()
+    return _shared_http_client
+
+
+_shared_guard = None
+_shared_guard_lock = threading.Lock()
+
+_part_executor = None
+_part_executor_pid = None
+_part_executor_size = 0
+_part_executor_lock = threading.Lock()
+
+def get_qwen_guard() -> UpstreamGuard:
+    """获取进程内共享的千问调用弹性控制（并发上限不超过连接池大小，避免在连接池上阻塞）"""
+    global _shared_guard
+    if _shared_guard is None:
+        with _shared_guard_lock:
+            if _shared_guard is None:
+                pool_size = get_http_client().pool_size
+                _shared_guard = UpstreamGuard(
+                    name='qwen',
+                    retryable=(UpstreamError, requests.exceptions.RequestException),
+                    max_limit=min(pool_size, int(os.getenv("QWEN_LIMIT_MAX", pool_size))),
+                )
+    return _shared_guard
+
+
+def _raise_for_status(response):
+    """限流与服务端错误可重试，其余非 200 响应直接失败"""
+    if response.status_code == 429 or response.status_code >= 500:
+        raise UpstreamError(f"API 请求失败: {response.status_code} - {response.text[:200]}")
+    if response.status_code != 200:
+        raise Exception(f"API 请求失败: {response.status_code} - {response.text}")
+
+
+def _is_corrections_json(message):
+    """审校回复是否为 {"corrections": [...]} 结构"""
+    try:
+        data = json.loads(message)
+    except (TypeError, ValueError):
+        return False
+    return isinstance(data, dict) and isinstance(data.get('corrections'), list)
+
+
+def _response_json(response):
+    """解析响应体；requests 的 JSONDecodeError 属于 RequestException，需转成不可重试的格式错误"""
+    try:
+        return response.json()
+    except ValueError as e:
+        raise Exception(f"API 返回格式异常: {str(e)}")
+
 
 class QwenProofreader:
-    def __init__(self, api_key=None, base_url=None, model_name="qwen-plus"):
+    def __init__(self, api_key=None, base_url=None, model_name="qwen-plus", http_client=None, response_cache=None,
+                 guard=None):
         """
         初始化千问审校模块。
         :param api_key: 千问 API Key (优先级: 参数 > 环境变量)
         :param base_url: 千问 API 接入点
         :param model_name: 使用的千问模型名称
+        :param http_client: 复用的 HTTP 客户端（默认使用进程内共享连接池）
+        :param response_cache: 响应持久化缓存（默认使用共享的 SQLite 缓存）
+        :param guard: 并发上限、重试与熔断控制（默认使用进程内共享实例）
         """
         self.api_key = api_key or os.getenv("QWEN_API_KEY")
         self.base_url = base_url or os.getenv("QWEN_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1")
         self.model_name = model_name or os.getenv("QWEN_MODEL", "qwen-plus")
-        self.timeout = 30  # 请求超时时间（秒）
-        self.max_retries = 2  # 最大重试次数
+        self.http = http_client or get_http_client()
+        self.response_cache = response_cache or get_response_cache()
+        self.timeout = self.http.timeout  # (连接超时, 读取超时)（秒）
+        self.guard = guard or get_qwen_guard()
+        # 大模型子请求按 token 预算切分，与规则引擎的 chunk_size 无关
+        counter = TokenCounter()
+        self.splitter = LLMSplitter(self.model_name, counter, prompt_tokens=counter.count(PROOFREAD_SYSTEM_PROMPT + PROOFREAD_USER_PROMPT))
+
+    def available(self):
+        """已配置 API Key 且上游未被熔断"""
+        return bool(self.api_key) and self.guard.available()
+
+    def warm_up(self):
+        """启动时预热到千问接入点的连接（未配置 API Key 时跳过）"""
+        if not self.api_key:
+            return
+        self.http.warm_up(self.base_url, connections=int(os.getenv("QWEN_POOL_WARMUP", 2)))
 
     def proofread(self, content: str) -> Dict:
         """
@@ -32,30 +263,50 @@ class QwenProofreader:
             content (str): 要审校的文本内容
 
         Returns:
-            dict: 审校结果，包括问题列表和统计信息
+            dict: 审校结果，包括问题列表和统计信息；有子请求被限流、熔断或调用失败时带 degraded: True（结果不完整）
         """
+        degraded = False
         try:
             print(f"[Qwen] Starting proofreading for {len(content)} characters")
             start_time = time.time()
             
-            # 调用千问 API
-            corrections = self._call_qwen_api(content)
-            
-            # 解析 API 返回结果为标准格式
-            issues = self._parse_corrections(content, corrections)
+            # 按 token 预算切成子请求（句子边界），多段时并发调用，问题位置平移回原文偏移
+            parts = self.splitter.split(content)
+            if len(parts) <= 1:
+                issues = self._proofread_part(content, parts[0][2] if parts else 0)
+            else:
+                executor = self._get_part_executor()
+                futures = [executor.submit(self._proofread_part, text, tokens) for text, _, tokens in parts]
+                issues = []
+                for (text, offset, _), future in zip(parts, futures):
+                    try:
+                        part_issues = future.result()
+                    except Exception as e:
+                        # 单段失败只丢失该段的大模型结果
+                        degraded = True
+                        print(f"[Qwen] Part at offset {offset} failed: {str(e)}")
+                        continue
+                    for issue in part_issues:
+                        issue.start += offset
+                        issue.end += offset
+                    issues.extend(part_issues)
             
             end_time = time.time()
-            print(f"[Qwen] Proofreading completed in {end_time - start_time:.2f}s, found {len(issues)} issues")
+            print(f"[Qwen] Proofreading completed in {end_time - start_time:.2f}s, {len(parts)} parts, found {len(issues)} issues")
             
-            return {
+            result = {
                 'issues': issues,
                 'statistics': self._calculate_statistics(issues)
             }
+            if degraded:
+                result['degraded'] = True
+            return result
             
         except Exception as e:
             print(f"[Qwen] Error during proofreading: {str(e)}")
             # 返回空结果，不影响整体审校流程
             return {
+                'degraded': True,
                 'issues': [],
                 'statistics': {
                     'total_issues': 0,
@@ -66,9 +317,48 @@ class QwenProofreader:
                 }
             }
 
-    def _call_qwen_api(self, content: str) -> str:
+    def _proofread_part(self, content: str, input_tokens: int) -> List[Issue]:
+        """审校一个子请求；输出仍被截断时对半再分（句子边界优先），直到无法再分"""
+        try:
+            response = self._call_qwen_api(content, self.splitter.output_tokens(input_tokens))
+        except OutputTruncated as e:
+            halves = self.splitter.halve(content)
+            if len(halves) <= 1:
+                raise
+            print(f"[Qwen] {str(e)}, splitting {len(content)} characters into {len(halves)} parts")
+            issues = []
+            for text, offset, tokens in halves:
+                for issue in self._proofread_part(text, tokens):
+                    issue.start += offset
+                    issue.end += offset
+                    issues.append(issue)
+            return issues
+        # 解析 API 返回结果为标准格式
+        return self._parse_corrections(content, response)
+
+    def _get_part_executor(self):
+        """
+        子请求线程池（进程内共享，fork 后重建）；与引擎的分块线程池分开，避免嵌套提交时互相等待。
+        线程数取 guard 并发上限的最大值，子请求的并发只受自适应上限约束，线程池不会成为更低的隐性上限。
+        """
+        global _part_executor, _part_executor_pid, _part_executor_size
+        size = self.guard.limiter.max_limit
+        if _part_executor is None or _part_executor_pid != os.getpid() or _part_executor_size < size:
+            with _part_executor_lock:
+                if _part_executor is None or _part_executor_pid != os.getpid() or _part_executor_size < size:
+                    # fork 后父进程的工作线程不存在，旧线程池直接丢弃；同一进程内扩容时旧池处理完已提交的子请求后退出
+                    previous = _part_executor if _part_executor_pid == os.getpid() else None
+                    _part_executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='qwen-part')
+                    _part_executor_size = size
+                    _part_executor_pid = os.getpid()
+                    if previous is not None:
+                        previous.shutdown(wait=False)
+        return _part_executor
+
+    def _call_qwen_api(self, content: str, max_tokens: Optional[int] = None) -> str:
         """
         调用千问 API 进行文本审校
+        :param max_tokens: 本次输出上限（默认模型最大输出）；输出被截断时抛出 OutputTruncated
         """
         # 基础校验：必须提供 API Key
         if not self.api_key:
@@ -81,46 +371,8 @@ class QwenProofreader:
             "Content-Type": "application/json"
         }
         
-        # 构建审校提示词（新增 sensitive 类型与 few-shot 示例）
-        system_prompt = """你是一个专业的中文文本审校助手。请严格且只输出如下 JSON 结构：
-{
-  "corrections": [
-    {
-      "original": "原始错误文本",
-      "corrected": "修正后文本",
-      "type": "typo|grammar|punctuation|sensitive|style",
-      "reason": "简洁说明修改原因（不超过40字）",
-      "start": 数字,  // 在原文中的起始索引（包含，0 基）
-      "end": 数字     // 在原文中的结束索引（不包含）
-    }
-  ]
-}
-
-分类说明：
-- typo：错别字、用词错误（如“的地得”误用、常见混淆词）。
-- grammar：语序/搭配/语法性错误；风格表达建议请用 style。
-- punctuation：中英文标点混用、成对标点缺失、标点位置不当等。
-- sensitive：涉政、涉黄、暴恐、违法合规风险、辱骂歧视等（当存在潜在风险或不当表述时使用）。
-- style：非刚性问题的表达/风格优化，保留为建议。
-
-严格要求：
-- 仅输出 JSON，不要包含任何多余文本或解释。
-- start/end 必须精准对应 original 在用户原文中的片段（0<=start<end<=len(原文)）。
-- type 仅限上述五类；风格类用 style，合规风险用 sensitive。
-- 没有问题时返回 {"corrections": []}。
-
-示例（仅供学习格式，不要包含在输出中）：
-{
-  "corrections": [
-    {"original": "基于这个原理。", "corrected": "基于这一原理。", "type": "grammar", "reason": "用词更规范", "start": 0, "end": 7},
-    {"original": "Hello，世界", "corrected": "Hello, 世界", "type": "punctuation", "reason": "英文逗号用半角", "start": 0, "end": 8},
-    {"original": "“数据分析(DA”", "corrected": "“数据分析(DA)”", "type": "punctuation", "reason": "补全成对标点", "start": 0, "end": 8},
-    {"original": "某些群体都是…", "corrected": "某些群体往往……", "type": "sensitive", "reason": "避免刻板/歧视性表达", "start": 0, "end": 7}
-  ]
-}
-"""
-
-        user_prompt = f"请审校以下文本，按上面的 JSON 结构返回；注意：优先识别语法、标点与合规风险，精确给出 start/end：\n\n{content}"
+        system_prompt = PROOFREAD_SYSTEM_PROMPT
+        user_prompt = PROOFREAD_USER_PROMPT + content
         
         payload = {
             "model": self.model_name,
@@ -129,47 +381,47 @@ class QwenProofreader:
                 {"role": "user", "content": user_prompt}
             ],
             "temperature": 0.1,
-            "max_tokens": 2000
+            "max_tokens": max_tokens or self.splitter.max_output_tokens
         }
+
+        # 持久化缓存：相同模型/提示词版本/温度/输入直接复用
+        cache_key = LLMResponseCache.make_key(
+            self.model_name, PROOFREAD_PROMPT_VERSION, payload["temperature"], content,
+            max_tokens=payload["max_tokens"]
+        )
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            print(f"[Qwen] Response cache hit for {len(content)} characters")
+            return cached
         
-        # 重试机制
-        for attempt in range(self.max_retries + 1):
-            try:
-                print(f"[Qwen] Calling API (attempt {attempt + 1}/{self.max_retries + 1})")
-                
-                response = requests.post(
-                    url, 
-                    headers=headers, 
-                    json=payload, 
-                    timeout=self.timeout
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if 'choices' in result and result['choices']:
-                        return result['choices'][0]['message']['content']
-                    else:
-                        raise Exception("API 返回格式异常")
-                else:
-                    raise Exception(f"API 请求失败: {response.status_code} - {response.text}")
-                    
-            except requests.exceptions.Timeout:
-                print(f"[Qwen] API timeout on attempt {attempt + 1}")
-                if attempt == self.max_retries:
-                    raise Exception("API 请求超时")
-                time.sleep(1)  # 等待1秒后重试
-                
-            except requests.exceptions.RequestException as e:
-                print(f"[Qwen] Network error on attempt {attempt + 1}: {str(e)}")
-                if attempt == self.max_retries:
-                    raise Exception(f"网络请求错误: {str(e)}")
-                time.sleep(1)
-                
-        raise Exception("API 调用失败")
+        def send():
+            response = self.http.post(url, headers=headers, json=payload, timeout=self.timeout)
+            _raise_for_status(response)
+            result = _response_json(response)
+            if 'choices' in result and result['choices']:
+                choice = result['choices'][0]
+                if choice.get('finish_reason') == 'length':
+                    raise OutputTruncated(f"输出达到 max_tokens={payload['max_tokens']} 被截断")
+                return choice['message']['content']
+            raise Exception("API 返回格式异常")
 
-    def _parse_corrections(self, original_text: str, api_response: str) -> List[Dict]:
+        # 并发上限、退避重试、对冲与熔断由共享的 guard 控制；熔断或名额不足时直接抛出，由调用方降级
+        try:
+            message = self.guard.call(send)
+        except requests.exceptions.Timeout:
+            raise Exception("API 请求超时")
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"网络请求错误: {str(e)}")
+        # 仅缓存符合约定 JSON 结构的响应；自然语言等无法结构化解析的回复只用于本次，下次重新请求
+        if _is_corrections_json(message):
+            self.response_cache.put(cache_key, message)
+        else:
+            print(f"[Qwen] Response for {len(content)} characters is not the expected JSON, not caching it")
+        return message
+
+    def _parse_corrections(self, original_text: str, api_response: str) -> List[Issue]:
         """
-        解析千问 API 返回的审校结果
+        解析千问 API 返回的审校结果（Issue 列表，对外输出时再转换为 JSON 结构）
         """
         issues = []
         
@@ -193,49 +445,30 @@ class QwenProofreader:
                     end = pos_obj.get('end')
                 
                 if original and corrected and original != corrected:
-                    normalized_type = self._normalize_type(error_type)
+                    normalized_type = TYPE_CODES[self._normalize_type(error_type)]
+                    layout = LAYOUT_QWEN_STYLE if error_type.lower() == 'style' else LAYOUT_QWEN
 
                     # 优先使用结构化位置（合法性校验）
                     if isinstance(start, int) and isinstance(end, int) and 0 <= start < end <= len(original_text):
                         # 防御：确认切片文本与 original 一致，否则回退到搜索
                         if original_text[start:end] == original:
-                            issue = {
-                                'type': normalized_type,
-                                'message': f'{reason}："{original}" → "{corrected}"',
-                                'position': {
-                                    'start': start,
-                                    'end': end
-                                },
-                                'original': original,
-                                'suggestion': corrected,
-                                'suggestions': [corrected],
-                                'severity': 'warning',
-                                'source': 'qwen'
-                            }
-                            if error_type.lower() == 'style':
-                                issue['subtype'] = 'style'
-                            issues.append(issue)
+                            issues.append(Issue(
+                                normalized_type, start, end, original, corrected, WARNING, layout,
+                                message=f'{reason}："{original}" → "{corrected}"',
+                                source='qwen',
+                                subtype='style' if layout is LAYOUT_QWEN_STYLE else None,
+                            ))
                             continue
                     
                     # 否则退回到基于文本搜索的匹配（可能产生多处）
                     positions = self._find_text_positions(original_text, original)
                     for pos in positions:
-                        issue = {
-                            'type': normalized_type,
-                            'message': f'{reason}："{original}" → "{corrected}"',
-                            'position': {
-                                'start': pos,
-                                'end': pos + len(original)
-                            },
-                            'original': original,
-                            'suggestion': corrected,
-                            'suggestions': [corrected],
-                            'severity': 'warning',
-                            'source': 'qwen'
-                        }
-                        if error_type.lower() == 'style':
-                            issue['subtype'] = 'style'
-                        issues.append(issue)
+                        issues.append(Issue(
+                            normalized_type, pos, pos + len(original), original, corrected, WARNING, layout,
+                            message=f'{reason}："{original}" → "{corrected}"',
+                            source='qwen',
+                            subtype='style' if layout is LAYOUT_QWEN_STYLE else None,
+                        ))
                         
         except json.JSONDecodeError:
             print(f"[Qwen] Failed to parse API response as JSON: {api_response[:200]}...")
@@ -259,7 +492,7 @@ class QwenProofreader:
             start = pos + 1
         return positions
 
-    def _parse_natural_language_response(self, original_text: str, response: str) -> List[Dict]:
+    def _parse_natural_language_response(self, original_text: str, response: str) -> List[Issue]:
         """
         从自然语言响应中提取修改建议
         """
@@ -278,19 +511,10 @@ class QwenProofreader:
                 if original and corrected and original != corrected:
                     positions = self._find_text_positions(original_text, original)
                     for pos in positions:
-                        issue = {
-                            'type': 'typo',
-                            'message': f'建议修改："{original}" → "{corrected}"',
-                            'position': {
-                                'start': pos,
-                                'end': pos + len(original)
-                            },
-                            'original': original,  # 添加 original 字段，兼容前端高亮校验
-                            'suggestion': corrected,  # 兼容前端字段
-                            'suggestions': [corrected],
-                            'severity': 'warning'
-                        }
-                        issues.append(issue)
+                        issues.append(Issue(
+                            TYPO, pos, pos + len(original), original, corrected, WARNING, LAYOUT_QWEN_TEXT,
+                            message=f'建议修改："{original}" → "{corrected}"',
+                        ))
         
         return issues
 
@@ -310,7 +534,7 @@ class QwenProofreader:
         """
         基于 DFA 召回的敏感片段，调用 LLM 给出解释(reason)与更安全的替代表述(corrected)。
         detections: [{start:int, end:int, word:str, category:str}]
-        返回: [{start,end, reason, corrected}]（仅对有建议的项返回）
+        返回: [{start,end, reason, corrected}]（仅对有建议的项返回）；调用被限流、熔断或失败时返回 None
         """
         if not detections:
             return []
@@ -381,32 +605,41 @@ class QwenProofreader:
             'temperature': 0.0,
             'max_tokens': 1500
         }
+        cache_key = LLMResponseCache.make_key(
+            self.model_name, EXPLAIN_PROMPT_VERSION, payload['temperature'], user_prompt,
+            max_tokens=payload['max_tokens']
+        )
 
-        # 调用并解析
-        for attempt in range(self.max_retries + 1):
-            try:
-                resp = requests.post(url, headers=headers, json=payload, timeout=self.timeout)
-                if resp.status_code != 200:
-                    raise Exception(f"API 请求失败: {resp.status_code} - {resp.text}")
-                data = resp.json()
-                content_msg = (data.get('choices') or [{}])[0].get('message', {}).get('content')
+        def send():
+            resp = self.http.post(url, headers=headers, json=payload, timeout=self.timeout)
+            _raise_for_status(resp)
+            data = _response_json(resp)
+            return (data.get('choices') or [{}])[0].get('message', {}).get('content')
+
+        # 调用并解析（重试与熔断由 guard 控制，失败静默降级为空）
+        try:
+            content_msg = self.response_cache.get(cache_key)
+            if content_msg is None:
+                content_msg = self.guard.call(send)
+                parsed = json.loads(content_msg)
+                # 仅缓存可解析的响应
+                self.response_cache.put(cache_key, content_msg)
+            else:
                 parsed = json.loads(content_msg)
-                exps = parsed.get('explanations', [])
-                results = []
-                for ex in exps:
-                    s = ex.get('start'); e = ex.get('end')
-                    reason = (ex.get('reason') or '').strip()
-                    corrected = (ex.get('corrected') or '').strip()
-                    if isinstance(s, int) and isinstance(e, int) and 0 <= s < e <= len(content) and corrected:
-                        results.append({'start': s, 'end': e, 'reason': reason or '优化表述', 'corrected': corrected})
-                return results
-            except (requests.exceptions.RequestException, json.JSONDecodeError, KeyError) as e:
-                if attempt == self.max_retries:
-                    return []
-                time.sleep(1)
-        return []
-
-    def _calculate_statistics(self, issues: List[Dict]) -> Dict:
+            exps = parsed.get('explanations', [])
+            results = []
+            for ex in exps:
+                s = ex.get('start'); e = ex.get('end')
+                reason = (ex.get('reason') or '').strip()
+                corrected = (ex.get('corrected') or '').strip()
+                if isinstance(s, int) and isinstance(e, int) and 0 <= s < e <= len(content) and corrected:
+                    results.append({'start': s, 'end': e, 'reason': reason or '优化表述', 'corrected': corrected})
+            return results
+        except Exception as e:
+            print(f"[Qwen] Sensitive explanation skipped: {str(e)}")
+            return None
+
+    def _calculate_statistics(self, issues: List[Issue]) -> Dict:
         """计算统计信息"""
         stats = {
             'total_issues': len(issues),
@@ -417,7 +650,7 @@ class QwenProofreader:
         }
         
         for issue in issues:
-            issue_type = issue['type']
+            issue_type = TYPE_NAMES[issue.type]
             if issue_type in stats:
                 stats[issue_type] += 1
         
@@ -0,0 +1,99 @@
+"""
+组件就绪状态登记
+重量级组件（词库、纠错模型）在服务启动后于后台线程依次加载并预热，
+/api/ready 据此报告各组件状态与耗时，编排系统只把流量路由到已预热的实例。
+"""
+
+import time
+import threading
+
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class Component:
+    def __init__(self, name, loader, required=True):
+        self.name = name
+        self.loader = loader
+        # required=False 的组件失败不影响整体就绪（如可选的外部连接预热）
+        self.required = required
+        self.state = PENDING
+        self.seconds = None
+        self.error = None
+        self.detail = None
+
+    def run(self):
+        self.state = LOADING
+        t0 = time.time()
+        try:
+            self.detail = self.loader()
+            self.state = READY
+        except Exception as e:
+            self.error = str(e)
+            self.state = FAILED
+            print(f"[Readiness] {self.name} failed: {self.error}")
+        self.seconds = round(time.time() - t0, 4)
+        print(f"[Readiness] {self.name} {self.state} in {self.seconds}s")
+
+    def to_dict(self):
+        result = {'state': self.state, 'required': self.required, 'seconds': self.seconds}
+        if self.error:
+            result['error'] = self.error
+        if self.detail is not None:
+            result['detail'] = self.detail
+        return result
+
+
+class Readiness:
+    def __init__(self):
+        self._components = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._done = threading.Event()
+        self.started_at = None
+        self.finished_at = None
+
+    def register(self, name, loader, required=True):
+        """登记组件；按登记顺序加载，后登记的组件可依赖先登记的"""
+        with self._lock:
+            self._components.append(Component(name, loader, required))
+
+    def start(self):
+        """在后台线程中依次加载全部组件（幂等）"""
+        with self._lock:
+            if self._thread is not None:
+                return self._thread
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name='readiness-init', daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def _run(self):
+        for component in list(self._components):
+            component.run()
+        self.finished_at = time.time()
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """等待后台加载结束（不论成败），返回是否已结束"""
+        return self._done.wait(timeout)
+
+    def is_ready(self):
+        """全部必需组件已就绪（可选组件仍在加载或失败不影响）"""
+        return self.started_at is not None and all(
+            c.state == READY for c in self._components if c.required
+        )
+
+    def status(self):
+        return {
+            'ready': self.is_ready(),
+            'started': self.started_at is not None,
+            'seconds': round(self.finished_at - self.started_at, 4) if self.finished_at else None,
+            'components': {c.name: c.to_dict() for c in self._components},
+        }
+
+
+# 进程内全局就绪状态（组件在 proofreading_engine 中登记）
+readiness = Readiness()
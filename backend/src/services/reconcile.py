@@ -0,0 +1,112 @@
+"""
+问题区间和解
+审校后处理中的重叠和解、LLM 窗口抑制与展示分组，
+均基于按起点排序的扫描与二分查找，结果与逐对比较的实现完全一致。
+"""
+
+from bisect import bisect_left
+
+from .issue import PUNCTUATION
+
+
+def reconcile_overlaps(issues, weight):
+    """
+    重叠和解：同一区间优先保留权重高者（权重相同保留靠前者）。
+    :param issues: 已按起点排序的 Issue 列表
+    :param weight: 权重函数
+    :return: 保留的问题（保持原顺序）
+
+    与逐对比较等价：按起点顺序取当前问题 a，依次与其后仍存活、且起点落在 a 区间内的问题比较；
+    起点不小于 a 终点的问题不可能与 a 相交，后续问题起点只会更大，可直接结束本轮扫描。
+    已被抑制的问题通过“下一个存活位置”指针（并查集路径压缩）跳过。
+    """
+    n = len(issues)
+    if n < 2:
+        return list(issues)
+    starts = [it.start for it in issues]
+    ends = [it.end for it in issues]
+    weights = [weight(it) for it in issues]
+    suppressed = [False] * n
+    # nxt[k]：k 及之后第一个未被抑制的位置（n 表示没有）
+    nxt = list(range(n + 1))
+
+    def alive_from(k):
+        root = k
+        while nxt[root] != root:
+            root = nxt[root]
+        while nxt[k] != root:
+            nxt[k], k = root, nxt[k]
+        return root
+
+    def suppress(k):
+        suppressed[k] = True
+        nxt[k] = k + 1
+
+    for i in range(n):
+        if suppressed[i]:
+            continue
+        a_s, a_e, a_w = starts[i], ends[i], weights[i]
+        j = alive_from(i + 1)
+        while j < n and starts[j] < a_e:
+            if ends[j] > a_s:
+                if weights[j] > a_w:
+                    suppress(i)
+                    break
+                suppress(j)
+            j = alive_from(j + 1)
+    return [it for k, it in enumerate(issues) if not suppressed[k]]
+
+
+class LLMWindowIndex:
+    """
+    LLM 建议区间索引：判断规则问题是否与任一 LLM 区间相交，或与其边界相距不超过 radius。
+    等价于逐个区间检查：
+        min(e, le) - max(s, ls) > 0  或  |s - le| <= radius  或  |ls - e| <= radius
+    """
+    def __init__(self, ranges, radius):
+        self.radius = radius
+        self._ends = sorted(le for _, le in ranges)
+        self._starts = sorted(ls for ls, _ in ranges)
+        # 相交判断只需考虑非空区间：按起点排序，记录终点前缀最大值
+        valid = sorted((ls, le) for ls, le in ranges if ls < le)
+        self._valid_starts = [ls for ls, _ in valid]
+        self._prefix_max_end = []
+        best = None
+        for _, le in valid:
+            best = le if best is None or le > best else best
+            self._prefix_max_end.append(best)
+
+    @staticmethod
+    def _any_within(values, lo, hi):
+        k = bisect_left(values, lo)
+        return k < len(values) and values[k] <= hi
+
+    def near(self, s, e):
+        if self._any_within(self._ends, s - self.radius, s + self.radius):
+            return True
+        if self._any_within(self._starts, e - self.radius, e + self.radius):
+            return True
+        if s < e:
+            # 起点 < e 的非空区间中，终点最大者是否越过 s
+            k = bisect_left(self._valid_starts, e)
+            if k and self._prefix_max_end[k - 1] > s:
+                return True
+        return False
+
+
+def partition_for_display(issues, punct_limit=12):
+    """
+    展示分组：LLM 风格建议在前，其次其他问题，最后是限流后的标点问题。
+    同时属于 LLM 风格与标点的问题会出现在两组中（与按成员关系分组的原实现一致）。
+    """
+    llm_style, other, punct = [], [], []
+    for it in issues:
+        is_style = it.source == 'qwen' and it.subtype == 'style'
+        is_punct = it.type == PUNCTUATION
+        if is_style:
+            llm_style.append(it)
+        if is_punct:
+            punct.append(it)
+        if not is_style and not is_punct:
+            other.append(it)
+    return llm_style + other + punct[:punct_limit]
@@ -0,0 +1,432 @@
+"""
+上游调用的弹性控制
+进程内共享的自适应并发上限、指数退避（全抖动）、重试预算、可选的对冲请求与熔断器，
+上游变慢或不可用时快速失败，让调用方降级为纯规则审校，而不是让请求线程全部堆积在等待上。
+"""
+
+import os
+import math
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeoutError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class UpstreamError(Exception):
+    """上游返回可重试的错误（限流 429、服务端 5xx）"""
+    pass
+
+
+class UpstreamUnavailable(Exception):
+    """本地判定暂不调用上游：调用方应直接降级"""
+    pass
+
+
+class CircuitOpen(UpstreamUnavailable):
+    pass
+
+
+class ConcurrencyLimitExceeded(UpstreamUnavailable):
+    pass
+
+
+def backoff_delay(attempt, base, cap, rng=random):
+    """第 attempt 次重试（从 0 计）前的等待秒数：指数退避 + 全抖动，在 [0, min(cap, base * 2^attempt)] 内均匀取值"""
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AdaptiveLimiter:
+    """
+    按观测延迟自适应的并发上限（梯度算法）：
+    近期延迟（短 EWMA）相对基线（长 EWMA）升高超过容忍倍数时按比例收缩上限，
+    延迟平稳且在途请求接近上限时以 sqrt(上限) 的余量缓慢放大；超时、限流等失败按比例收缩。
+    """
+
+    def __init__(self, initial=8, min_limit=1, max_limit=16, tolerance=2.0, smoothing=0.2, backoff_ratio=0.9):
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self.tolerance = float(tolerance)
+        self.smoothing = float(smoothing)
+        self.backoff_ratio = float(backoff_ratio)
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._short_rtt = None
+        self._long_rtt = None
+        self.rejected = 0
+
+    def acquire(self, timeout=None):
+        """占用一个并发名额；timeout 秒内仍无名额时返回 False（0 表示不等待，None 表示一直等待）"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.rejected += 1
+                    return False
+                self._cond.wait(remaining)
+            self._in_flight += 1
+            return True
+
+    def release(self, latency=None, dropped=False):
+        """
+        归还名额并更新上限：
+        :param latency: 成功调用的耗时（秒），为空时不参与调整（如非上游原因的失败）
+        :param dropped: 是否为超时、限流等过载信号
+        """
+        with self._cond:
+            in_flight = self._in_flight
+            self._in_flight -= 1
+            if dropped:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+            elif latency is not None:
+                self._update(latency, in_flight)
+            self._cond.notify_all()
+
+    def _update(self, latency, in_flight):
+        if self._short_rtt is None:
+            self._short_rtt = self._long_rtt = latency
+            return
+        self._short_rtt += 0.3 * (latency - self._short_rtt)
+        self._long_rtt += 0.02 * (latency - self._long_rtt)
+        # 近期延迟低于基线时基线随之下调，避免一次长尾把基线长期抬高
+        if self._long_rtt > self._short_rtt * 2:
+            self._long_rtt *= 0.95
+        gradient = max(0.5, min(1.0, self.tolerance * self._long_rtt / self._short_rtt))
+        if gradient < 1.0:
+            target = self.limit * gradient
+        elif in_flight < self.limit / 2:
+            # 在途请求远低于上限时说明并发并未受限，不据此放大上限
+            return
+        else:
+            target = self.limit + math.sqrt(self.limit)
+        limit = (1 - self.smoothing) * self.limit + self.smoothing * target
+        self.limit = max(self.min_limit, min(self.max_limit, limit))
+
+    def stats(self):
+        with self._cond:
+            return {
+                'limit': int(self.limit),
+                'in_flight': self._in_flight,
+                'rejected': self.rejected,
+                'latency_recent': round(self._short_rtt, 3) if self._short_rtt is not None else None,
+                'latency_baseline': round(self._long_rtt, 3) if self._long_rtt is not None else None,
+            }
+
+
+class RetryBudget:
+    """
+    重试预算（令牌桶）：每个新请求存入 ratio 个令牌，每次重试或对冲取出 1 个，
+    另按 min_per_second 匀速补充保证低流量时也能重试；上游整体故障时重试量被限制在请求量的 ratio 倍以内。
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=1.0, capacity=10, clock=time.monotonic):
+        self.ratio = float(ratio)
+        self.min_per_second = float(min_per_second)
+        self.capacity = float(capacity)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._balance = self.capacity
+        self._refilled_at = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._balance = min(self.capacity, self._balance + (now - self._refilled_at) * self.min_per_second)
+        self._refilled_at = now
+
+    def deposit(self):
+        with self._lock:
+            self._refill()
+            self._balance = min(self.capacity, self._balance + self.ratio)
+
+    def withdraw(self):
+        """取出一个令牌，预算不足时返回 False"""
+        with self._lock:
+            self._refill()
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+    @property
+    def balance(self):
+        with self._lock:
+            self._refill()
+            return self._balance
+
+
+class CircuitBreaker:
+    """
+    熔断器：最近 window 次调用中失败比例达到 failure_ratio（且至少 min_calls 次）时打开，
+    打开期间直接拒绝；cooldown 秒后进入半开，只放行一个探测请求，成功则关闭、失败则重新打开。
+    """
+
+    def __init__(self, window=20, min_calls=10, failure_ratio=0.5, cooldown=30.0, clock=time.monotonic):
+        self.min_calls = int(min_calls)
+        self.failure_ratio = float(failure_ratio)
+        self.cooldown = float(cooldown)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=max(1, int(window)))  # True 表示失败
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.trips = 0
+
+    def _current_state(self):
+        if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._probing = False
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def allow(self):
+        """是否放行本次调用（半开状态下占用唯一的探测名额）"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+                print("[Resilience] Circuit closed, upstream recovered")
+            elif state == CLOSED:
+                self._outcomes.append(False)
+
+    def record_failure(self):
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._trip()
+            elif state == CLOSED:
+                self._outcomes.append(True)
+                failures = sum(self._outcomes)
+                if len(self._outcomes) >= self.min_calls and failures >= self.failure_ratio * len(self._outcomes):
+                    self._trip()
+
+    def record_ignored(self):
+        """放行后未实际调用上游（如本地并发名额不足），或调用结果不反映上游健康状况：不计入窗口，只归还半开探测名额"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probing = False
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self.trips += 1
+        print(f"[Resilience] Circuit opened, rejecting calls for {self.cooldown:.0f}s")
+
+
+class UpstreamGuard:
+    """
+    组合并发上限、熔断、重试预算、退避与对冲的调用入口，进程内同一上游共享一个实例。
+    call(fn) 中 fn 发起一次上游请求：抛出 retryable 中的异常视为可重试的失败（计入熔断并收缩并发上限），
+    其他异常（如 4xx、输出截断、响应格式异常）为不可重试的失败：直接抛出且不重试，不计入熔断。
+    """
+
+    def __init__(self, name='upstream', retryable=(UpstreamError,), limiter=None, breaker=None, budget=None,
+                 max_retries=None, backoff_base=None, backoff_cap=None, queue_timeout=None, hedge=None, max_limit=None):
+        """
+        :param retryable: 视为可重试失败的异常类型
+        :param max_retries: 最大重试次数（默认 QWEN_MAX_RETRIES，2）
+        :param backoff_base: 退避基数秒（默认 QWEN_BACKOFF_BASE_MS，200ms）
+        :param backoff_cap: 单次退避上限秒（默认 QWEN_BACKOFF_CAP_MS，5s）
+        :param queue_timeout: 等待并发名额的最长秒数，超时即降级（默认 QWEN_LIMIT_QUEUE_TIMEOUT，2s）
+        :param hedge: 对冲请求：'off'（默认 QWEN_HEDGE）、'auto'（按近期 p95 延迟）或固定毫秒数
+        :param max_limit: 并发上限的最大值（默认 QWEN_LIMIT_MAX，16；应不超过连接池大小）
+        """
+        self.name = name
+        self.retryable = tuple(retryable)
+        max_limit = int(max_limit if max_limit is not None else os.getenv('QWEN_LIMIT_MAX', 16))
+        self.limiter = limiter or AdaptiveLimiter(
+            initial=min(max_limit, int(os.getenv('QWEN_LIMIT_INITIAL', 8))),
+            min_limit=int(os.getenv('QWEN_LIMIT_MIN', 1)),
+            max_limit=max_limit,
+            tolerance=float(os.getenv('QWEN_LATENCY_TOLERANCE', 2.0)),
+        )
+        self.breaker = breaker or CircuitBreaker(
+            window=int(os.getenv('QWEN_BREAKER_WINDOW', 20)),
+            min_calls=int(os.getenv('QWEN_BREAKER_MIN_CALLS', 10)),
+            failure_ratio=float(os.getenv('QWEN_BREAKER_FAILURE_RATIO', 0.5)),
+            cooldown=float(os.getenv('QWEN_BREAKER_COOLDOWN', 30)),
+        )
+        self.budget = budget or RetryBudget(
+            ratio=float(os.getenv('QWEN_RETRY_BUDGET_RATIO', 0.2)),
+            min_per_second=float(os.getenv('QWEN_RETRY_BUDGET_MIN_PER_SEC', 1)),
+        )
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv('QWEN_MAX_RETRIES', 2))
+        self.backoff_base = float(backoff_base if backoff_base is not None else float(os.getenv('QWEN_BACKOFF_BASE_MS', 200)) / 1000.0)
+        self.backoff_cap = float(backoff_cap if backoff_cap is not None else float(os.getenv('QWEN_BACKOFF_CAP_MS', 5000)) / 1000.0)
+        self.queue_timeout = float(queue_timeout if queue_timeout is not None else os.getenv('QWEN_LIMIT_QUEUE_TIMEOUT', 2))
+        self.hedge = str(hedge if hedge is not None else os.getenv('QWEN_HEDGE', 'off')).strip().lower()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=200)
+        self._executor = None
+        self._executor_pid = None
+        self.calls = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.budget_exhausted = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def available(self):
+        """上游是否可用（熔断器未打开）；半开时返回 True，由首个请求探测"""
+        return self.breaker.state != OPEN
+
+    def call(self, fn):
+        """按熔断、并发上限、对冲与重试策略执行 fn，返回其结果；无法调用时抛出 UpstreamUnavailable"""
+        if not self.breaker.allow():
+            with self._lock:
+                self.short_circuited += 1
+            raise CircuitOpen(f"{self.name} 熔断中，暂停调用")
+        self.budget.deposit()
+        with self._lock:
+            self.calls += 1
+        attempt = 0
+        while True:
+            try:
+                delay = self._hedge_delay()
+                return self._attempt(fn) if delay is None else self._hedged(fn, delay)
+            except self.retryable as e:
+                if attempt >= self.max_retries or self.breaker.state == OPEN:
+                    raise
+                if not self.budget.withdraw():
+                    with self._lock:
+                        self.budget_exhausted += 1
+                    print(f"[Resilience] {self.name} retry budget exhausted, giving up: {str(e)}")
+                    raise
+                wait_seconds = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                print(f"[Resilience] {self.name} attempt {attempt + 1} failed: {str(e)}, retrying in {wait_seconds:.2f}s")
+                with self._lock:
+                    self.retries += 1
+                time.sleep(wait_seconds)
+                attempt += 1
+
+    def _attempt(self, fn):
+        if not self.limiter.acquire(self.queue_timeout):
+            self.breaker.record_ignored()
+            raise ConcurrencyLimitExceeded(f"{self.name} 并发已达上限 {int(self.limiter.limit)}，等待 {self.queue_timeout:.1f}s 未获得名额")
+        return self._invoke(fn)
+
+    def _invoke(self, fn):
+        """在已占用并发名额的前提下执行一次调用，并把结果反馈给并发上限与熔断器"""
+        start = time.monotonic()
+        try:
+            result = fn()
+        except self.retryable:
+            self.limiter.release(time.monotonic() - start, dropped=True)
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            # 不可重试的失败（如 4xx、输出截断、响应格式异常）：上游已正常应答，与其健康状况无关，
+            # 不计入熔断（只归还半开探测名额），也不是过载信号，不参与并发上限调整
+            self.limiter.release()
+            self.breaker.record_ignored()
+            raise
+        latency = time.monotonic() - start
+        self.limiter.release(latency)
+        self.breaker.record_success()
+        with self._lock:
+            self._latencies.append(latency)
+        return result
+
+    def _hedge_delay(self):
+        """对冲前的等待秒数，None 表示不对冲"""
+        if self.hedge in ('', 'off', '0', 'false'):
+            return None
+        if self.hedge == 'auto':
+            with self._lock:
+                samples = sorted(self._latencies)
+            # 样本太少时 p95 不可靠，不对冲
+            if len(samples) < 20:
+                return None
+            return samples[int(len(samples) * 0.95) - 1]
+        try:
+            return float(self.hedge) / 1000.0
+        except ValueError:
+            return None
+
+    def _get_executor(self):
+        # fork 后的子进程没有父进程的工作线程，重新创建
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.limiter.max_limit * 2, thread_name_prefix=f'{self.name}-hedge'
+                    )
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def _hedged(self, fn, delay):
+        """
+        主请求 delay 秒内未完成时再发一个相同请求，取先成功的结果（另一个在后台完成，结果丢弃）。
+        对冲请求不排队等待并发名额，并消耗一个重试预算令牌；名额或预算不足时只等主请求。
+        """
+        executor = self._get_executor()
+        primary = executor.submit(self._attempt, fn)
+        try:
+            return primary.result(timeout=delay)
+        except FuturesTimeoutError:
+            pass
+        if self.breaker.state != CLOSED or not self.limiter.acquire(0):
+            return primary.result()
+        if not self.budget.withdraw():
+            self.limiter.release()
+            return primary.result()
+        with self._lock:
+            self.hedges += 1
+        hedge = executor.submit(self._invoke, fn)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if future is hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return result
+        raise error
+
+    def stats(self):
+        with self._lock:
+            samples = sorted(self._latencies)
+            counters = {
+                'calls': self.calls,
+                'retries': self.retries,
+                'short_circuited': self.short_circuited,
+                'budget_exhausted': self.budget_exhausted,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+            }
+        return {
+            'state': self.breaker.state,
+            'trips': self.breaker.trips,
+            **self.limiter.stats(),
+            **counters,
+            'latency_p50': round(samples[len(samples) // 2], 3) if samples else None,
+            'latency_p95': round(samples[int(len(samples) * 0.95) - 1], 3) if len(samples) >= 20 else None,
+        }
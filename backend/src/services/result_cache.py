@@ -0,0 +1,104 @@
+"""
+审校结果缓存
+按内容哈希缓存整次审校结果：字节上限 + LRU 淘汰 + TTL，线程安全
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def _json_default(value):
+    # Issue 等内部对象按其 JSON 结构估算
+    to_dict = getattr(value, 'to_dict', None)
+    return to_dict() if to_dict is not None else str(value)
+
+
+_size_encoder = json.JSONEncoder(ensure_ascii=False, default=_json_default)
+
+
+def estimate_size(value) -> int:
+    """
+    粗略估算缓存值占用的字节数（以 UTF-8 JSON 体积近似）
+    分段编码累加长度，不在内存中拼出整段 JSON（长文本结果的整段 JSON 会成为请求的内存峰值）
+    """
+    try:
+        return sum(len(chunk.encode('utf-8')) for chunk in _size_encoder.iterencode(value))
+    except Exception:
+        return 1024
+
+
+class ResultCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=3600):
+        """
+        :param max_bytes: 缓存总字节上限，超出后按最近最少使用淘汰
+        :param ttl: 条目存活时间（秒），<= 0 表示不过期
+        """
+        self.max_bytes = int(max_bytes)
+        self.ttl = float(ttl)
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """读取缓存；未命中或已过期返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, size, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.current_bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, size=None):
+        """写入缓存；单条超过总上限时直接放弃"""
+        if self.max_bytes <= 0:
+            return
+        size = estimate_size(value) if size is None else int(size)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (expires_at, size, value)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, old_size, _) = self._entries.popitem(last=False)
+                self.current_bytes -= old_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """命中统计，便于在健康检查中观察缓存效果"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
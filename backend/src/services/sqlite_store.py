@@ -0,0 +1,58 @@
+"""
+本地 SQLite 存储的公共连接管理
+WAL 模式 + busy_timeout，允许多个 worker 进程并发读写同一文件
+"""
+
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    def __init__(self, path, schema=''):
+        """
+        :param path: 数据库文件路径（目录不存在时自动创建）
+        :param schema: 首次连接时执行的建表脚本（需幂等）
+        """
+        self.path = os.path.abspath(path)
+        self.schema = schema
+        self._local = threading.local()
+
+    def connection(self):
+        """
+        每线程一个连接；fork 后的子进程会重新建立连接，不复用父进程的句柄。
+        连接为自动提交模式，需要原子性时使用 transaction()。
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=30000')
+        if self.schema:
+            conn.executescript(self.schema)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def transaction(self):
+        """写事务：BEGIN IMMEDIATE 立即获取写锁，避免多进程读后写的升级死锁"""
+        return _Transaction(self.connection())
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute('COMMIT')
+        else:
+            self.conn.execute('ROLLBACK')
+        return False
@@ -0,0 +1,41 @@
+"""
+测试 batch_scheduler 模块
+"""
+
+import threading
+import pytest
+from .batch_scheduler import MicroBatcher
+
+def test_concurrent_submissions_are_batched_and_routed_back():
+    seen = []
+    def upper(items):
+        seen.append(len(items))
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(upper, max_batch_size=8, max_wait_ms=50)
+    results = {}
+    def request(n):
+        items = [f'r{n}-s{i}' for i in range(3)]
+        results[n] = (items, batcher.submit(items, timeout=5))
+
+    threads = [threading.Thread(target=request, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for items, out in results.values():
+        assert out == [item.upper() for item in items]
+    assert sum(seen) == 18
+    assert max(seen) <= 8
+    assert len(seen) < 18  # 跨请求合批
+    assert batcher.stats()['items'] == 18
+
+def test_batch_failure_propagates():
+    def boom(items):
+        raise RuntimeError('model crashed')
+
+    batcher = MicroBatcher(boom, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        batcher.submit(['a', 'b'], timeout=5)
+    assert batcher.submit([]) == []
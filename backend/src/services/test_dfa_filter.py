@@ -0,0 +1,155 @@
+"""
+测试 dfa_filter 模块（Aho-Corasick 扫描）
+"""
+
+import random
+from .dfa_filter import DFAFilter, LexiconMatcher
+
+def _brute_force(words, text):
+    found = set()
+    for w in words:
+        start = text.find(w)
+        while start != -1:
+            found.add((start, start + len(w)))
+            start = text.find(w, start + 1)
+    return sorted(found)
+
+def _legacy_filter(words, message, repl='*'):
+    """原逐位置重启的实现：自左向右取最短词，不重叠替换"""
+    ret, detected, start = [], [], 0
+    while start < len(message):
+        for end in range(start + 1, len(message) + 1):
+            if message[start:end] in words:
+                detected.append({'word': message[start:end], 'start': start, 'end': end})
+                ret.append(repl * (end - start))
+                start = end
+                break
+        else:
+            ret.append(message[start])
+            start += 1
+    return ''.join(ret), detected
+
+def test_find_all_reports_overlapping_and_nested():
+    f = DFAFilter()
+    for w in ['he', 'she', 'his', 'hers', '毒品', '毒品交易', '品交']:
+        f.add_word(w)
+    text = 'ushers 毒品交易'
+    spans = [(m['start'], m['end'], m['word']) for m in f.find_all(text)]
+    assert spans == [
+        (1, 4, 'she'), (2, 4, 'he'), (2, 6, 'hers'),
+        (7, 9, '毒品'), (7, 11, '毒品交易'), (8, 10, '品交'),
+    ]
+    assert all(m['type'] == 'sensitive' for m in f.find_all(text))
+
+def test_matches_brute_force_and_legacy_filter():
+    rng = random.Random(3)
+    alphabet = 'abcA暴力赌毒'
+    for _ in range(200):
+        words = {''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))).lower() for _ in range(rng.randint(1, 12))}
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        f = DFAFilter()
+        for w in words:
+            f.add_word(w)
+        lower = text.lower()
+        assert [(m['start'], m['end']) for m in f.find_all(text)] == _brute_force(words, lower)
+        assert f.filter(text) == _legacy_filter(words, lower)
+        assert f.contains(text) == bool(_brute_force(words, lower))
+
+def test_add_word_after_scan_rebuilds():
+    f = DFAFilter()
+    f.add_word('赌博')
+    assert not f.contains('吸毒')
+    f.add_word('吸毒')
+    assert f.contains('吸毒')
+
+def test_scan_many_matches_individual_scans():
+    matcher = LexiconMatcher()
+    matcher.register('sensitive', [('暴力', 'violence', None), ('ab', 'x', None), ('b', 'y', None)])
+    texts = ['暴力ab', '', 'AB暴', '力b', 'xxab暴力']
+    assert matcher.scan_many(texts) == [matcher.scan(text) for text in texts]
+
+def _per_lexicon_scan(lexicons, text):
+    """参照实现：每个词库单独建自动机逐一扫描"""
+    hits = {}
+    for lexicon_id, entries in lexicons.items():
+        f = DFAFilter()
+        for word, _, _ in entries:
+            f.add_word(word)
+        hits[lexicon_id] = sorted(f.iter_matches(text.lower()))
+    return hits
+
+def _spans(hits):
+    return {lexicon_id: sorted((start, end) for start, end, _ in items) for lexicon_id, items in hits.items()}
+
+def test_scan_matches_per_lexicon_scans_with_shared_terms():
+    lexicons = {
+        'sensitive': [('暴力', 'violence', None), ('毒品交易', 'drug', '**')],
+        'ideology': [('暴力革命', 'politics', None), ('品交', 'x', None)],
+        'typo': [('暴力', 'typo', '暴厉'), ('散不', 'typo', '散步')],
+    }
+    matcher = LexiconMatcher()
+    for lexicon_id, entries in lexicons.items():
+        matcher.register(lexicon_id, entries)
+    text = '反对暴力革命与毒品交易，饭后散不'
+    hits = matcher.scan(text)
+    assert _spans(hits) == _per_lexicon_scan(lexicons, text)
+    # 同一词属于多个词库时，各词库都命中且带各自的标签
+    assert [(s, e, p.category) for s, e, p in hits['sensitive']] == [(2, 4, 'violence'), (7, 11, 'drug')]
+    assert [(s, e, p.replacement) for s, e, p in hits['typo']] == [(2, 4, '暴厉'), (14, 16, '散步')]
+    assert all(p.lexicon == lexicon_id for lexicon_id, items in hits.items() for _, _, p in items)
+    texts = [text, '', '暴力', '散不暴', '力革命']
+    assert matcher.scan_many(texts) == [matcher.scan(t) for t in texts]
+
+def test_scan_many_matches_per_lexicon_scans_randomized():
+    rng = random.Random(7)
+    alphabet = 'abAB暴力'
+    for _ in range(100):
+        lexicons = {
+            lexicon_id: [(''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 3))), lexicon_id, None)
+                         for _ in range(rng.randint(0, 5))]
+            for lexicon_id in ('sensitive', 'ideology', 'typo')
+        }
+        matcher = LexiconMatcher()
+        for lexicon_id, entries in lexicons.items():
+            matcher.register(lexicon_id, entries)
+        texts = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20))) for _ in range(rng.randint(1, 5))]
+        results = matcher.scan_many(texts)
+        assert results == [matcher.scan(text) for text in texts]
+        for text, hits in zip(texts, results):
+            assert _spans(hits) == _per_lexicon_scan(lexicons, text)
+
+def test_replace_lexicons_swaps_atomically_and_keeps_others():
+    matcher = LexiconMatcher()
+    matcher.register('sensitive', [('暴力', 'violence', None)])
+    matcher.register('typo', [('散不', 'typo', '散步')])
+    old_version = matcher.version
+    in_flight = matcher._compile()
+    version = matcher.replace_lexicons({'sensitive': [('赌博', 'gambling', None)]})
+    assert version == matcher.version != old_version
+    hits = matcher.scan('暴力赌博，散不')
+    assert [(s, e) for s, e, _ in hits['sensitive']] == [(2, 4)]
+    # 未替换的词库保留
+    assert [(s, e) for s, e, _ in hits['typo']] == [(5, 7)]
+    # 已取得旧自动机的扫描不受切换影响
+    assert [(s, e) for s, e, _ in in_flight.iter_tagged('暴力赌博')] == [(0, 2)]
+    # 内容回到原状时版本号也回到原值
+    matcher.replace_lexicons({'sensitive': [('暴力', 'violence', None)]})
+    assert matcher.version == old_version
+
+def test_restore_from_snapshot_matches_original():
+    matcher = LexiconMatcher()
+    matcher.register('sensitive', [('暴力', 'violence', None), ('毒品', 'drug', '**')])
+    matcher.register('ideology', [('暴力革命', 'politics', None)])
+    snapshot = matcher.snapshot()
+    restored = LexiconMatcher()
+    restored.register('typo', [('散不', 'typo', '散步')])
+    assert restored.restore(snapshot) == matcher.version
+    assert restored.version == matcher.version
+    assert restored.lexicons() == matcher.lexicons()
+    text = '暴力革命与毒品，散不'
+    assert restored.scan(text) == matcher.scan(text)
+    assert restored.scan_many([text, '毒品']) == matcher.scan_many([text, '毒品'])
+    # 恢复后继续注册词库会在原版本基础上重新编译
+    restored.register('typo', [('散不', 'typo', '散步')])
+    assert restored.version != matcher.version
+    assert [(s, e) for s, e, _ in restored.scan(text)['typo']] == [(8, 10)]
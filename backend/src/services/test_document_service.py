@@ -0,0 +1,39 @@
+"""
+测试 document_service 模块
+"""
+
+import json
+import re
+
+from .document_service import DocumentService, diff_html, diff_segments
+
+def _result(n):
+    issues = [{
+        'id': f'i-{k}', 'type': 'typo', 'severity': 'high' if k % 2 else 'warning',
+        'position': {'start': k, 'end': k + 2}, 'original': '散不', 'suggestion': '散步',
+        'message': '<疑似错别字>',
+    } for k in range(n)]
+    return {'issues': issues, 'statistics': {'total_issues': n, 'typos': n}}
+
+def test_diff_is_computed_once_for_both_sides():
+    assert diff_segments('散不吧', '散步吧') == (
+        (('散', False), ('不', True), ('吧', False)),
+        (('散', False), ('步', True), ('吧', False)),
+    )
+    assert diff_html('a<b', 'a>b') == ('a<u>&lt;</u>b', 'a<u>&gt;</u>b')
+    diff_segments.cache_clear()
+    DocumentService().render_report_html('我们去散不吧' * 10, _result(50))
+    info = diff_segments.cache_info()
+    assert info.misses <= 1
+
+def test_report_is_streamed_in_chunks_with_embedded_payload():
+    content = '我们去散不吧</script>' * 200
+    result = _result(3000)
+    parts = list(DocumentService().iter_report_html(content, result, {'title': 'T'}))
+    assert len(parts) > 1
+    html = ''.join(parts)
+    assert html.count("<td class='orig'>散<u>不</u></td>") == 3000
+    assert '&lt;疑似错别字&gt;' in html
+    payload = re.search(r"<script id='__report_payload__' type='application/json'>(.*?)</script>", html, re.S).group(1)
+    data = json.loads(payload)
+    assert data['content'] == content and data['result'] == result and data['title'] == 'T'
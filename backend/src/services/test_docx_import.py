@@ -0,0 +1,66 @@
+"""
+测试 docx_import 模块
+"""
+
+import io
+
+from docx import Document
+
+from .docx_import import DocxLocator, DocxParagraph, iter_paragraphs, open_document_xml, proofread_docx
+from .proofreading_engine import ProofreadingEngine
+
+def _docx(build):
+    doc = Document()
+    build(doc)
+    buf = io.BytesIO()
+    doc.save(buf)
+    buf.seek(0)
+    return buf
+
+def _build_contract(doc):
+    p = doc.add_paragraph('今天天气很好,')
+    p.add_run('我们去散')
+    p.add_run('不吧。')
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = '胡蝶在飞'
+    for i in range(300):
+        doc.add_paragraph(f'第{i}条：系统测试因该在下周完成。')
+
+def test_paragraphs_and_runs_are_streamed_in_order():
+    paragraphs = list(iter_paragraphs(open_document_xml(_docx(_build_contract))))
+    assert paragraphs[0].runs == ['今天天气很好,', '我们去散', '不吧。']
+    assert paragraphs[1].text == '胡蝶在飞'
+    assert [p.index for p in paragraphs] == list(range(302))
+
+def test_locator_maps_offsets_and_releases_old_paragraphs():
+    locator = DocxLocator()
+    locator.add(DocxParagraph(0, ['ab', '', 'cde']))
+    locator.add(DocxParagraph(1, []))
+    locator.add(DocxParagraph(2, ['xyz']))
+    # 全文：'abcde\n\nxyz\n'
+    assert locator.locate(3) == {'paragraph': 0, 'run': 2, 'offset': 1}
+    assert locator.locate_span(1, 3) == {
+        'start': {'paragraph': 0, 'run': 0, 'offset': 1},
+        'end': {'paragraph': 0, 'run': 2, 'offset': 1},
+    }
+    assert locator.locate(6) == {'paragraph': 1, 'run': None, 'offset': 0}
+    locator.release(8)
+    assert locator.locate(8) == {'paragraph': 2, 'run': 0, 'offset': 1}
+
+def test_issue_locations_point_into_source_runs():
+    engine = ProofreadingEngine()
+    engine.chunk_size = 300
+    paragraphs = list(iter_paragraphs(open_document_xml(_docx(_build_contract))))
+    events = list(proofread_docx(engine, open_document_xml(_docx(_build_contract)), {'qwen': False}))
+
+    assert events[-1][0] == 'done' and events[-1][1]['paragraphs'] == len(paragraphs)
+    issues = [it for event, payload in events if event == 'chunk' for it in payload['issues']]
+    assert {'散不', '因该'} <= {it['original'] for it in issues}
+    for it in issues:
+        start, end = it['location']['start'], it['location']['end']
+        runs = paragraphs[start['paragraph']].runs
+        # 按 run 拼回的源文本与问题原文一致
+        if start['run'] == end['run']:
+            text = runs[start['run']][start['offset']:end['offset']]
+        else:
+            text = runs[start['run']][start['offset']:] + ''.join(runs[start['run'] + 1:end['run']]) + runs[end['run']][:end['offset']]
+        assert text == it['original']
@@ -0,0 +1,44 @@
+"""
+测试 issue 模块
+"""
+
+from .issue import (
+    Issue, id_allocator, TYPO, GRAMMAR, PUNCTUATION, MEDIUM, INFO, WARNING,
+    LAYOUT_RULE_TYPO, LAYOUT_RULE_GRAMMAR, LAYOUT_CATEGORIZED, LAYOUT_QWEN_STYLE,
+)
+from .typo_checker import check_typos_and_grammar
+from .punctuation_checker import check_punctuation
+
+def test_to_dict_matches_api_shape():
+    typo = Issue(TYPO, 3, 5, '散不', '散步', MEDIUM, LAYOUT_RULE_TYPO, message='m', subtype='high_value')
+    assert list(typo.to_dict().items()) == [
+        ('type', 'typo'), ('message', 'm'), ('original', '散不'), ('suggestion', '散步'),
+        ('position', {'start': 3, 'end': 5}), ('suggestions', ['散步']), ('severity', 'medium'),
+        ('subtype', 'high_value'),
+    ]
+    grammar = Issue(GRAMMAR, 0, 2, '被被', '', INFO, LAYOUT_RULE_GRAMMAR, message='重复')
+    assert grammar.to_dict()['suggestions'] == []
+    punct = Issue(PUNCTUATION, 1, 2, ',', '，', MEDIUM, LAYOUT_CATEGORIZED, category='标点符号', description='d')
+    assert list(punct.to_dict(offset=10)) == ['type', 'category', 'position', 'original', 'suggestion', 'description', 'severity']
+    assert punct.to_dict(offset=10)['position'] == {'start': 11, 'end': 12}
+
+def test_shifted_copy_and_ids():
+    issue = Issue(GRAMMAR, 4, 8, 'abcd', 'x', WARNING, LAYOUT_QWEN_STYLE, message='m', source='qwen', subtype='style')
+    issue.id = 'a-1'
+    moved = issue.shifted(100)
+    assert (moved.start, moved.end, moved.id, moved.subtype) == (104, 108, 'a-1', 'style')
+    assert (issue.start, issue.end) == (4, 8)
+    assert moved.to_dict()['id'] == 'a-1'
+    assert not hasattr(issue, '__dict__')
+
+    next_id = id_allocator()
+    ids = [next_id() for _ in range(1000)]
+    assert len(set(ids)) == 1000
+    assert id_allocator()() != ids[0]
+
+def test_checkers_emit_issues():
+    text = '我们去散不吧,他认真的完成了作业。'
+    issues = check_typos_and_grammar(text) + check_punctuation(text)
+    assert issues and all(isinstance(it, Issue) for it in issues)
+    for it in issues:
+        assert text[it.start:it.end] == it.original
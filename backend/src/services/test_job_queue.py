@@ -0,0 +1,79 @@
+"""
+测试 job_queue 模块
+"""
+
+import time
+import threading
+
+from .job_queue import JobQueue, DONE, FAILED, QUEUED, RUNNING
+from .proofreading_engine import ProofreadingEngine
+
+class FakeEngine:
+    def __init__(self, gate=None):
+        self.gate = gate
+
+    def proofread_events(self, content, options=None):
+        if content == 'boom':
+            raise RuntimeError('模型调用失败')
+        yield 'rules', {'issues': [], 'elapsed': 0.0}
+        for i in range(3):
+            if self.gate is not None:
+                self.gate.wait(5)
+            yield 'llm', {'chunk': i, 'chunks': 3, 'issues': [], 'elapsed': 0.0}
+        yield 'final', {'issues': [{'original': content}], 'statistics': {'total_issues': 1}, 'suppressed': []}
+
+def _wait(queue, job_id, states=(DONE, FAILED), timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in states:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f'job {job_id} still {job["status"]}')
+
+def test_jobs_run_on_worker_pool_with_progress(tmp_path):
+    queue = JobQueue(FakeEngine(), path=str(tmp_path / 'jobs.sqlite3'), workers=2, poll_interval=0.05)
+    queue.start()
+    try:
+        ids = [queue.submit(f'文档{i}', {'qwen': True}) for i in range(5)]
+        for i, job_id in enumerate(ids):
+            job = _wait(queue, job_id)
+            assert job['status'] == DONE
+            assert job['progress'] == {'chunks_done': 3, 'chunks_total': 3}
+            assert job['result']['issues'] == [{'original': f'文档{i}'}]
+        events = queue.events_after(ids[0])
+        assert [event for _, event, _ in events] == ['rules', 'llm', 'llm', 'llm']
+        assert [seq for seq, _, _ in queue.events_after(ids[0], 2)] == [3, 4]
+
+        failed = _wait(queue, queue.submit('boom'))
+        assert failed['status'] == FAILED and '模型调用失败' in failed['error']
+        assert queue.get('missing') is None
+    finally:
+        queue.stop(timeout=5)
+
+def test_queue_survives_restart_and_requeues_interrupted_jobs(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    gate = threading.Event()
+    first = JobQueue(FakeEngine(gate), path=path, workers=1, poll_interval=0.05)
+    first.start()
+    running = first.submit('运行中')
+    queued = first.submit('排队中')
+    _wait(first, running, states=(RUNNING,))
+    assert first.get(queued)['queue_position'] == 1
+    # 模拟进程退出：停止认领新任务，运行中任务的心跳随之过期
+    first._stopping = True
+    first.store.connection().execute('UPDATE jobs SET heartbeat_at = 0 WHERE id = ?', (running,))
+
+    second = JobQueue(ProofreadingEngine(), path=path, workers=1, poll_interval=0.05)
+    assert second.requeue_stale() == 1
+    assert second.get(running)['status'] == QUEUED
+    second.start()
+    try:
+        gate.set()
+        for job_id in (running, queued):
+            job = _wait(second, job_id)
+            assert job['status'] == DONE and job['attempts'] >= 1
+        assert second.get(running)['result']['statistics']['total_issues'] >= 0
+    finally:
+        second.stop(timeout=5)
+        first.stop(timeout=5)
@@ -0,0 +1,97 @@
+"""
+测试 lexicon_store 模块
+"""
+
+import threading
+
+from . import lexicon_store
+from . import typo_checker  # noqa: F401  注册错别字混淆集
+from .dfa_filter import lexicon_matcher, check_sensitive_content
+
+def _write_lexicons(directory, sensitive, ideology):
+    (directory / 'sensitive_words.txt').write_text('\n'.join(sensitive) + '\n', encoding='utf-8')
+    (directory / 'ideology_words.txt').write_text('\n'.join(ideology) + '\n', encoding='utf-8')
+
+def test_artifact_roundtrip_and_reload(tmp_path, monkeypatch):
+    monkeypatch.setenv('LEXICON_DATA_DIR', str(tmp_path))
+    try:
+        _write_lexicons(tmp_path, ['赌博', '毒品'], ['颠覆'])
+        live_version = lexicon_matcher.version
+        header = lexicon_store.build_artifact()
+        # 生成产物不改动进程内正在使用的词库
+        assert lexicon_matcher.version == live_version
+        text_version = header['version']
+
+        info = lexicon_store.load_lexicons(force=True)
+        assert info['source'] == 'artifact'
+        assert info['version'] == text_version == lexicon_matcher.version
+        # 与从文本编译得到的版本一致
+        lexicon_matcher.replace_lexicons(lexicon_store._file_entries(lexicon_store.read_source_words()))
+        assert lexicon_matcher.version == text_version
+        issues = check_sensitive_content('禁止赌博，不得颠覆。')
+        assert [i.original for i in issues] == ['赌博', '颠覆']
+        assert issues[1].suggestion == '[已删除]'
+        # 错别字混淆集随产物一并恢复
+        assert lexicon_matcher.scan('我们去散不吧')['typo']
+
+        # 词库文件变化后产物过期，回退到文本编译并切换到新词库
+        _write_lexicons(tmp_path, ['赌博', '诈骗'], ['颠覆'])
+        info = lexicon_store.load_lexicons()
+        assert info['source'] == 'text'
+        assert info['version'] != text_version
+        assert [i.original for i in check_sensitive_content('诈骗与毒品')] == ['诈骗']
+    finally:
+        monkeypatch.undo()
+        lexicon_store.load_lexicons(force=True)
+
+def test_reload_all_broadcasts_through_artifact(tmp_path, monkeypatch):
+    monkeypatch.setenv('LEXICON_DATA_DIR', str(tmp_path))
+    try:
+        _write_lexicons(tmp_path, ['赌博'], ['颠覆'])
+        lexicon_store.load_lexicons(force=True)
+        before = lexicon_store.LexiconWatcher.signature()
+
+        # 未启动监视线程：只作用于当前 worker
+        monkeypatch.setattr(lexicon_store, '_watcher', None)
+        _write_lexicons(tmp_path, ['赌博', '诈骗'], ['颠覆'])
+        info = lexicon_store.reload_all()
+        assert info['scope'] == 'worker'
+        assert info['source'] == 'artifact'
+        assert [i.original for i in check_sensitive_content('诈骗')] == ['诈骗']
+        # 产物重写后修改时间变化，其他 worker 的监视线程据此重新加载
+        after = lexicon_store.LexiconWatcher.signature()
+        assert after != before
+        header, _ = lexicon_store.read_artifact()
+        assert header['version'] == info['version']
+
+        watcher = lexicon_store.LexiconWatcher(60)
+        watcher.start()
+        try:
+            monkeypatch.setattr(lexicon_store, '_watcher', watcher)
+            info = lexicon_store.reload_all()
+            assert info['scope'] == 'all_workers'
+            assert info['propagation_seconds'] == 60
+            assert lexicon_store.LexiconWatcher.signature() != after
+        finally:
+            watcher.stop()
+
+        # 管理接口与监视线程并发重载：记录的版本始终与正在使用的自动机一致
+        def admin():
+            for i in range(10):
+                _write_lexicons(tmp_path, ['赌博', f'诈骗{i}'], ['颠覆'])
+                lexicon_store.reload_all()
+
+        def watch():
+            for _ in range(20):
+                lexicon_store.load_lexicons()
+
+        threads = [threading.Thread(target=admin), threading.Thread(target=watch)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert lexicon_store.status()['version'] == lexicon_matcher.version
+        assert [i.original for i in check_sensitive_content('诈骗9')] == ['诈骗9']
+    finally:
+        monkeypatch.undo()
+        lexicon_store.load_lexicons(force=True)
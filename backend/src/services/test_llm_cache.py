@@ -0,0 +1,96 @@
+"""
+测试 llm_cache 与 sqlite_store 模块
+"""
+
+import json
+import time
+import threading
+import multiprocessing
+
+from .llm_cache import LLMResponseCache
+from .qwen_integration import QwenProofreader
+from .resilience import UpstreamGuard
+
+def _cache(tmp_path, **kwargs):
+    return LLMResponseCache(path=str(tmp_path / 'cache' / 'llm.sqlite3'), enabled=True, **kwargs)
+
+def _read_in_child(path, key, queue):
+    queue.put(LLMResponseCache(path=path, enabled=True).get(key))
+
+def test_persists_across_instances_and_connections(tmp_path):
+    cache = _cache(tmp_path)
+    key = LLMResponseCache.make_key('qwen-plus', 'v1', 0.1, '我们去散不吧。', max_tokens=512)
+    assert key != LLMResponseCache.make_key('qwen-plus', 'v1', 0.1, '我们去散不吧。', max_tokens=1024)
+    cache.put(key, '{"corrections": []}')
+
+    # 新实例（模拟重启）
+    assert _cache(tmp_path).get(key) == '{"corrections": []}'
+    # 同进程另一个线程使用自己的连接
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(cache.get(key)))
+    thread.start()
+    thread.join()
+    assert seen == ['{"corrections": []}']
+    # 另一个进程（如另一个 gunicorn worker）
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    child = ctx.Process(target=_read_in_child, args=(cache.store.path, key, queue))
+    child.start()
+    assert queue.get(timeout=30) == '{"corrections": []}'
+    child.join()
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = _cache(tmp_path, ttl=0.05)
+    cache.put('k', 'v')
+    assert cache.get('k') == 'v'
+    time.sleep(0.1)
+    assert cache.get('k') is None
+    stats = cache.stats()
+    assert stats['expirations'] == 1 and stats['entries'] == 0
+
+def test_evicts_least_recently_accessed_over_budget(tmp_path):
+    cache = _cache(tmp_path, max_bytes=300, ttl=0)
+    cache.EVICT_CHECK_EVERY = 1
+    for i in range(3):
+        cache.put(f'k{i}', str(i) * 100)
+    # k0 最近被访问，k1 最久未访问
+    conn = cache.store.connection()
+    conn.execute("UPDATE llm_responses SET accessed_at = accessed_at + 10 WHERE key = 'k0'")
+    cache.put('k3', '3' * 100)
+    assert cache.get('k1') is None
+    assert cache.get('k0') == '0' * 100 and cache.get('k3') == '3' * 100
+    assert cache.stats()['bytes'] <= 300
+
+class FakeResponse:
+    status_code = 200
+    text = ''
+
+    def __init__(self, content):
+        self.content = content
+
+    def json(self):
+        return {'choices': [{'message': {'content': self.content}, 'finish_reason': 'stop'}]}
+
+class FakeHttp:
+    pool_size = 4
+    timeout = (1, 5)
+
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.content)
+
+def test_only_parseable_responses_are_cached(tmp_path):
+    corrections = {'corrections': [{'original': '散不', 'corrected': '散步', 'type': 'typo', 'reason': '错别字', 'start': 3, 'end': 5}]}
+    for content, cached in ((json.dumps(corrections, ensure_ascii=False), True), ('将 "散不" 改为 "散步"。', False)):
+        cache = _cache(tmp_path / str(cached))
+        http = FakeHttp(content)
+        qwen = QwenProofreader(api_key='test', http_client=http, response_cache=cache,
+                               guard=UpstreamGuard(name='test', hedge='off'))
+        for _ in range(2):
+            assert {i.suggestion for i in qwen.proofread('我们去散不吧。')['issues']} == {'散步'}
+        assert cache.stats()['entries'] == (1 if cached else 0)
+        assert http.calls == (1 if cached else 2)
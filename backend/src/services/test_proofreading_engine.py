@@ -0,0 +1,200 @@
+"""
+测试 proofreading_engine 模块
+"""
+
+import time
+
+from .proofreading_engine import ProofreadingEngine
+from .issue import Issue, TYPO, WARNING, LAYOUT_QWEN
+
+def _spans(result):
+    return [(it['position']['start'], it['position']['end'], it.get('original')) for it in result['issues']]
+
+def _engine_with_fake_llm(delay=lambda content: 0.0):
+    """千问替身：对每块返回“天气→天汽”的纠错，耗时由 delay(content) 决定"""
+    engine = ProofreadingEngine()
+    engine.qwen_proofreader.api_key = 'test'
+    engine.qwen_proofreader.explain_sensitive = lambda content, detections: []
+
+    def proofread(content):
+        time.sleep(delay(content))
+        issues = []
+        start = content.find('天气')
+        while start != -1:
+            issues.append(Issue(TYPO, start, start + 2, '天气', '天汽', WARNING, LAYOUT_QWEN, message='测试', source='qwen'))
+            start = content.find('天气', start + 1)
+        return {'issues': issues}
+
+    engine.qwen_proofreader.proofread = proofread
+    return engine
+
+LONG_DOC = ''.join(f"第{i}段：我们去散不吧,今天天气很好（未闭合。\n" for i in range(60))
+
+def test_parallel_chunks_match_sequential():
+    engine = _engine_with_fake_llm()
+    engine.chunk_size = 300
+    parallel = engine.proofread(LONG_DOC, {'use_cache': False})
+    sequential = engine.proofread(LONG_DOC, {'use_cache': False, 'parallel': False})
+    assert len(engine._split_text_smart(LONG_DOC)) > 2
+    assert any(it.get('source') == 'qwen' for it in parallel['issues'])
+    assert _spans(parallel) == _spans(sequential)
+    assert 'degraded' not in parallel
+
+def test_late_chunks_fall_back_to_rules_and_are_not_cached():
+    engine = _engine_with_fake_llm(lambda content: 1.0 if content.startswith('第0段') else 0.0)
+    engine.chunk_size = 300
+    engine.chunk_deadline = 0.2
+    result = engine.proofread(LONG_DOC, {})
+    assert result['degraded'] is True
+    # 超时块只有规则结果，其余块保留大模型结果
+    first_chunk_end = len(engine._split_text_smart(LONG_DOC)[0][0])
+    qwen_starts = [it['position']['start'] for it in result['issues'] if it.get('source') == 'qwen']
+    assert qwen_starts and min(qwen_starts) >= first_chunk_end
+    assert engine.result_cache.stats()['entries'] == 0
+    events = list(engine.proofread_events(LONG_DOC, {}))
+    assert events[-1][0] == 'final' and events[-1][1]['degraded'] is True
+    assert engine.result_cache.stats()['entries'] == 0
+
+def test_chunk_deadline_excludes_time_queued_for_a_worker():
+    # 4 块、2 个线程：后两块要排队约 0.3 秒，但每块自身耗时都在截止时间内
+    engine = _engine_with_fake_llm(lambda content: 0.3)
+    engine.chunk_size = 300
+    engine.chunk_workers = 2
+    engine.chunk_deadline = 0.5
+    doc = LONG_DOC[:1100]
+    assert len(engine._split_text_smart(doc)) == 4
+    result = engine.proofread(doc, {})
+    assert 'degraded' not in result
+    assert engine.result_cache.stats()['entries'] == 1
+
+def test_incremental_reuses_unchanged_paragraphs():
+    engine = ProofreadingEngine()
+    doc = "我们去散不吧,好的。\n\n今天的天气很好,胡蝶飞。\n第三段暴力内容。\n"
+    options = {'qwen': False, 'incremental': True}
+
+    first = engine.proofread(doc, dict(options))
+    assert _spans(first) == _spans(engine.proofread(doc, {'qwen': False}))
+
+    # 在开头插入新段落并改动第二段：仅这两段需要重算，其余问题平移到新偏移
+    edited = "新增一段,再来。\n" + doc.replace('今天', '明天')
+    misses_before = engine.paragraph_cache.misses
+    second = engine.proofread(edited, dict(options))
+    assert engine.paragraph_cache.misses - misses_before == 2
+    for it in second['issues']:
+        s, e = it['position']['start'], it['position']['end']
+        assert edited[s:e] == it['original']
+    assert _spans(second) == _spans(engine.proofread(edited, {'qwen': False}))
+
+def test_stream_matches_whole_document_chunking():
+    engine = ProofreadingEngine()
+    engine.chunk_size = 200
+    doc = ''.join(f"第{i}段：我们去散不吧,胡蝶在飞（未闭合。\n" if i % 3 else f"第{i}句暴力内容，今天天气很好。" for i in range(120))
+    options = {'qwen': False}
+
+    # 以不规则的小片段送入，模拟分块上传
+    pieces, pos, step = [], 0, 1
+    while pos < len(doc):
+        pieces.append(doc[pos:pos + step])
+        pos += step
+        step = step * 3 % 97 + 1
+    events = list(engine.proofread_stream(iter(pieces), options))
+
+    chunks = engine._split_text_smart(doc)
+    assert [e for e, _ in events] == ['chunk'] * len(chunks) + ['done']
+    assert [(d['offset'], d['length']) for _, d in events[:-1]] == [(o, len(t)) for t, o in chunks]
+    streamed = [it for _, d in events[:-1] for it in d['issues']]
+    assert streamed and events[-1][1]['statistics']['total_issues'] == len(streamed)
+    assert events[-1][1]['characters'] == len(doc)
+    for it in streamed:
+        assert doc[it['position']['start']:it['position']['end']] == it['original']
+    assert len({it['id'] for it in streamed}) == len(streamed)
+
+def test_batch_matches_individual_proofread():
+    engine = ProofreadingEngine()
+    engine.chunk_size = 200
+    docs = [
+        ("我们去散不吧,胡蝶在飞。", {'qwen': False}),
+        ("第二篇暴力内容，今天天气很好（未闭合。", {'qwen': False, 'rules_mode': 'full'}),
+        ("", {'qwen': False}),
+        ("长文档：我们去散不吧,胡蝶在飞。\n" * 30, {'qwen': False}),
+        ("只查标点,不查敏感暴力。", {'qwen': False, 'check_sensitive': False}),
+    ]
+    expected = [_spans(ProofreadingEngine().proofread(content, dict(options))) for content, options in docs]
+
+    results = list(engine.proofread_batch(docs, max_concurrency=2))
+    assert sorted(index for index, _, _ in results) == list(range(len(docs)))
+    for index, result, error in results:
+        assert error is None
+        assert _spans(result) == expected[index]
+
+    # 第二次全部命中结果缓存
+    hits_before = engine.result_cache.hits
+    assert len(list(engine.proofread_batch(docs))) == len(docs)
+    assert engine.result_cache.hits - hits_before == len(docs)
+
+def _without_ids(issues):
+    return [{k: v for k, v in it.items() if k != 'id'} for it in issues]
+
+def test_events_sequence_and_final_match_proofread():
+    engine = _engine_with_fake_llm()
+    engine.chunk_size = 300
+    chunks = len(engine._split_text_smart(LONG_DOC))
+    events = list(engine.proofread_events(LONG_DOC, {'use_cache': False}))
+    assert [e for e, _ in events] == ['rules'] + ['llm'] * chunks + ['final']
+    assert events[0][1]['chunks'] == chunks
+    assert sorted(d['chunk'] for e, d in events if e == 'llm') == list(range(chunks))
+
+    final = events[-1][1]
+    expected = engine.proofread(LONG_DOC, {'use_cache': False})
+    assert _without_ids(final['issues']) == _without_ids(expected['issues'])
+    assert final['statistics'] == expected['statistics']
+    assert 'degraded' not in final
+
+    # 流式阶段下发的 ID 要么出现在 final 中，要么列入 suppressed
+    streamed = [it for e, d in events[:-1] for it in d['issues']]
+    for it in streamed:
+        assert LONG_DOC[it['position']['start']:it['position']['end']] == it['original']
+    streamed_ids = [it['id'] for it in streamed]
+    final_ids = {it['id'] for it in final['issues']}
+    assert len(set(streamed_ids)) == len(streamed_ids)
+    assert final['suppressed'] == [i for i in streamed_ids if i not in final_ids]
+    assert final['suppressed'] and final_ids & set(streamed_ids)
+    assert not final_ids & set(final['suppressed'])
+
+    # 命中缓存时只有 final 事件，且没有待抑制的问题
+    cached = list(engine.proofread_events(LONG_DOC, {}))
+    assert [e for e, _ in cached] == ['final']
+    assert _without_ids(cached[0][1]['issues']) == _without_ids(final['issues'])
+    assert cached[0][1]['suppressed'] == []
+
+def test_incremental_recomputes_paragraphs_linked_by_cross_paragraph_issues():
+    engine = ProofreadingEngine()
+    engine.qwen_proofreader.api_key = 'test'
+
+    def proofread(content):
+        # 大模型替身：给出跨越换行的“天\n气”问题
+        start = content.find('天\n气')
+        if start == -1:
+            return {'issues': []}
+        return {'issues': [Issue(TYPO, start, start + 3, '天\n气', '天气', WARNING, LAYOUT_QWEN, message='测试', source='qwen')]}
+
+    engine.qwen_proofreader.proofread = proofread
+    doc = "第一段今天天\n气很好。\n第三段散不。\n"
+    first = engine.proofread(doc, {'incremental': True})
+    assert '天\n气' in [original for _, _, original in _spans(first)]
+    assert _spans(first) == _spans(engine.proofread(doc, {'use_cache': False}))
+
+    # 只改第二段：第一段因跨段问题、第三段因在大模型问题的抑制窗口内都未被记忆，
+    # 与第二段一起重算，不再残留旧的跨段问题，被抑制的规则问题也随之恢复
+    edited = doc.replace('气很好', '晴朗')
+    misses_before = engine.paragraph_cache.misses
+    second = engine.proofread(edited, {'incremental': True})
+    assert engine.paragraph_cache.misses - misses_before == 3
+    assert _spans(second) == _spans(engine.proofread(edited, {'use_cache': False}))
+    assert '天\n气' not in [original for _, _, original in _spans(second)]
+
+    # 已知限制：两段各自已被记忆时直接复用，拼接后新出现的跨段问题检测不到
+    engine.proofread("第一段今天天\n", {'incremental': True})
+    engine.proofread("气很好。\n", {'incremental': True})
+    third = engine.proofread(doc, {'incremental': True, 'use_cache': False})
+    assert '天\n气' not in [original for _, _, original in _spans(third)]
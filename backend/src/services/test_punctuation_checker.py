@@ -0,0 +1,41 @@
+"""
+测试 punctuation_checker 模块
+"""
+
+import random
+import re
+from .punctuation_checker import check_punctuation
+
+def _paired(issues):
+    return sorted((it.start, it.original, it.suggestion) for it in issues if it.severity_name == 'medium')
+
+def test_mixed_punctuation_matches_regex_scan():
+    rng = random.Random(5)
+    alphabet = ['中', '文', 'a', '1', ',', '.', '!', '?', ';', ':', '，', ' ', '\n', '（', '）']
+    for _ in range(200):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+        expected = sorted(
+            m.start() + 1 for english in ',.!?;:'
+            for m in re.finditer(r'[一-鿿]' + re.escape(english), text)
+        )
+        mixed = [it for it in check_punctuation(text) if it.severity_name == 'low']
+        assert sorted(it.start for it in mixed) == expected
+        assert all(it.original == text[it.start] and it.category == '标点符号' for it in mixed)
+
+def test_every_unmatched_mark_is_reported():
+    text = '根据《合同法（修订）第三条，甲方（即出卖人）应当）交付【标的物。“乙方意见”'
+    assert _paired(check_punctuation(text)) == [
+        (2, '《', '《...》'),
+        (24, '）', ''),
+        (27, '【', '【...】'),
+    ]
+
+def test_crossing_and_nested_pairs():
+    # 《 内的 （ 未闭合即遇到 》：报告 （；随后的 ） 无对应开标点
+    text = '《甲（乙》丙）'
+    assert _paired(check_punctuation(text)) == [(2, '（', '（...）'), (6, '）', '')]
+    assert _paired(check_punctuation('“引用‘内层’结束”，（正常【嵌套】）')) == []
+
+def test_apostrophe_is_not_a_closing_quote():
+    assert _paired(check_punctuation('他说 don’t 可以。')) == []
+    assert _paired(check_punctuation('多余’')) == [(2, '’', '')]
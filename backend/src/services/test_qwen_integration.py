@@ -2,8 +2,12 @@
 测试 qwen_integration 模块
 """
 
+import os
+import threading
+import multiprocessing
 import pytest
-from .qwen_integration import QwenProofreader
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from .qwen_integration import QwenProofreader, QwenHttpClient
 
 def test_qwen_proofreader():
     proofreader = QwenProofreader()
@@ -13,5 +17,71 @@ def test_qwen_proofreader():
     assert 'issues' in result
     assert 'statistics' in result
     assert result['statistics']['total_issues'] == 1
-    assert result['issues'][0]['type'] == 'typo'
-    assert result['issues'][0]['message'] == '疑似错别字："例子" → "例子2"'
\ No newline at end of file
+    assert result['issues'][0].type_name == 'typo'
+    assert result['issues'][0].message == '疑似错别字："例子" → "例子2"'
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """keep-alive 的本地上游：回显本次请求所在连接的客户端端口"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = str(self.client_address[1]).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
+
+def test_http_client_reuses_pooled_connection(upstream):
+    client = QwenHttpClient(pool_size=4)
+    session = client.session
+    ports = {client.post(upstream, json={'i': i}).text for i in range(5)}
+    assert client.session is session
+    # 顺序调用复用同一条长连接
+    assert len(ports) == 1
+    stats = client.stats()
+    assert stats['connections_created'] == 1
+    assert stats['requests'] == 5
+    assert stats['in_use'] == 0 and stats['idle'] == 1
+
+def _post_in_child(client, url, queue):
+    try:
+        inherited = id(client.session)
+        port = client.post(url, json={}).text
+        queue.put((id(client.session) != inherited, client._pid == os.getpid(),
+                   client.stats()['connections_created'], port))
+    except Exception as e:
+        queue.put(repr(e))
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='需要 fork')
+def test_http_client_resets_pool_after_fork(upstream):
+    client = QwenHttpClient(pool_size=4)
+    parent_port = client.post(upstream, json={}).text
+    ctx = multiprocessing.get_context('fork')
+    queue = ctx.Queue()
+    child = ctx.Process(target=_post_in_child, args=(client, upstream, queue))
+    child.start()
+    reply = queue.get(timeout=10)
+    child.join(timeout=10)
+    assert isinstance(reply, tuple), reply
+    rebuilt, pid_updated, created, child_port = reply
+    # 子进程重建会话并新建自己的连接，不复用父进程的套接字
+    assert rebuilt and pid_updated
+    assert created == 1
+    assert child_port != parent_port
+    # 父进程的连接不受影响，仍可继续复用
+    assert client.post(upstream, json={}).text == parent_port
+    assert client.stats()['connections_created'] == 1
@@ -0,0 +1,26 @@
+"""
+测试 readiness 模块
+"""
+
+from .readiness import Readiness, READY, FAILED
+
+def test_required_and_optional_components():
+    readiness = Readiness()
+    readiness.register('lexicons', lambda: {'words': 3})
+    readiness.register('pool', lambda: 1 / 0, required=False)
+    assert not readiness.is_ready()
+    readiness.start()
+    assert readiness.wait(5)
+    status = readiness.status()
+    assert status['ready'] is True
+    assert status['components']['lexicons']['state'] == READY
+    assert status['components']['lexicons']['detail'] == {'words': 3}
+    assert status['components']['pool']['state'] == FAILED
+    assert 'division' in status['components']['pool']['error']
+
+def test_required_failure_blocks_readiness():
+    readiness = Readiness()
+    readiness.register('model', lambda: (_ for _ in ()).throw(RuntimeError('boom')))
+    readiness.start()
+    readiness.wait(5)
+    assert readiness.status()['ready'] is False
@@ -0,0 +1,86 @@
+"""
+测试 reconcile 模块：与原逐对比较实现做差分对比
+"""
+
+import random
+from .reconcile import reconcile_overlaps, LLMWindowIndex, partition_for_display
+from .issue import Issue, TYPO, GRAMMAR, PUNCTUATION, SENSITIVE, HIGH, MEDIUM, LOW, WARNING, INFO, LAYOUT_QWEN
+
+def legacy_reconcile(issues, weight):
+    suppressed = [False] * len(issues)
+    for i in range(len(issues)):
+        if suppressed[i]:
+            continue
+        a = issues[i]; a_s, a_e = a.start, a.end
+        for j in range(i+1, len(issues)):
+            if suppressed[j]:
+                continue
+            b = issues[j]; b_s, b_e = b.start, b.end
+            if not (b_s >= a_e or b_e <= a_s):
+                if weight(b) > weight(a):
+                    suppressed[i] = True; break
+                else:
+                    suppressed[j] = True
+    return [it for k, it in enumerate(issues) if not suppressed[k]]
+
+def legacy_near(llm_ranges, s, e, radius):
+    for ls, le in llm_ranges:
+        if max(0, min(e, le) - max(s, ls)) > 0:
+            return True
+        if abs(s - le) <= radius or abs(ls - e) <= radius:
+            return True
+    return False
+
+def legacy_partition(issues):
+    llm_style = [it for it in issues if it.source == 'qwen' and it.subtype == 'style']
+    punct = [it for it in issues if it.type == PUNCTUATION]
+    other = [it for it in issues if it not in llm_style and it not in punct]
+    return llm_style + other + punct[:12]
+
+def _random_issues(rng, n, span):
+    issues = []
+    for k in range(n):
+        s = rng.randint(-2, span)
+        # 含空区间与反向区间，覆盖异常位置
+        e = s + rng.choice([0, 1, 1, 2, 3, 5, 8, 30, -1])
+        issue = Issue(
+            rng.choice([TYPO, GRAMMAR, PUNCTUATION, SENSITIVE, -1]), s, e, '', '',
+            rng.choice([HIGH, MEDIUM, LOW, WARNING, INFO, -1]), LAYOUT_QWEN,
+            source=rng.choice([None, None, 'qwen']),
+            subtype=rng.choice([None, 'style', 'function_word', 'high_value']),
+        )
+        issue.id = k
+        issues.append(issue)
+    issues.sort(key=lambda x: x.start)
+    return issues
+
+def _weight(issue):
+    base = {TYPO: 3.0, GRAMMAR: 2.2, SENSITIVE: 2.6, PUNCTUATION: 1.25}.get(issue.type, 1.0)
+    return base + {HIGH: 1.0, MEDIUM: 0.5, WARNING: 0.5}.get(issue.severity, 0.0)
+
+def test_reconcile_matches_pairwise():
+    rng = random.Random(7)
+    for trial in range(300):
+        issues = _random_issues(rng, rng.randint(0, 80), rng.choice([10, 60, 400]))
+        assert [it.id for it in reconcile_overlaps(issues, _weight)] == \
+            [it.id for it in legacy_reconcile(issues, _weight)]
+
+def test_window_index_matches_scan():
+    rng = random.Random(11)
+    for trial in range(200):
+        ranges = []
+        for _ in range(rng.randint(0, 15)):
+            s = rng.randint(0, 300)
+            ranges.append((s, s + rng.choice([-3, 0, 1, 4, 40])))
+        index = LLMWindowIndex(ranges, 25)
+        for _ in range(50):
+            s = rng.randint(-5, 320)
+            e = s + rng.choice([-1, 0, 1, 2, 6])
+            assert index.near(s, e) == legacy_near(ranges, s, e, 25)
+
+def test_partition_matches_membership_split():
+    rng = random.Random(3)
+    for trial in range(100):
+        issues = _random_issues(rng, rng.randint(0, 40), 100)
+        assert [it.id for it in partition_for_display(issues)] == \
+            [it.id for it in legacy_partition(issues)]
@@ -0,0 +1,291 @@
+"""
+测试 resilience 模块
+"""
+
+import json
+import time
+import random
+import threading
+
+import pytest
+import requests
+
+from .resilience import (
+    AdaptiveLimiter, RetryBudget, CircuitBreaker, UpstreamGuard, UpstreamError, CircuitOpen,
+    ConcurrencyLimitExceeded, backoff_delay, CLOSED, OPEN, HALF_OPEN,
+)
+from .proofreading_engine import ProofreadingEngine
+from .qwen_integration import QwenProofreader, OutputTruncated
+from .llm_cache import LLMResponseCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeResponse:
+    def __init__(self, status_code=200, content=None, body=None):
+        self.status_code = status_code
+        self.text = body if body is not None else ''
+        self._content = content
+
+    def json(self):
+        if self._content is None:
+            # 与 requests 一致：响应体不是 JSON 时抛出 requests 的 JSONDecodeError（同时是 RequestException）
+            raise requests.exceptions.JSONDecodeError('Expecting value', self.text, 0)
+        return {'choices': [{'message': {'content': self._content}, 'finish_reason': 'stop'}]}
+
+class FakeHttp:
+    """按 responder(调用序号) 返回响应，并记录调用次数"""
+    pool_size = 4
+    timeout = (1, 5)
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        return self.responder(self.calls)
+
+def _ok(calls):
+    corrections = [{'original': '散不', 'corrected': '散步', 'type': 'typo', 'reason': '错别字', 'start': 3, 'end': 5}]
+    return FakeResponse(content=json.dumps({'corrections': corrections}, ensure_ascii=False))
+
+def _qwen(http, tmp_path, guard):
+    return QwenProofreader(
+        api_key='test', http_client=http, guard=guard,
+        response_cache=LLMResponseCache(path=str(tmp_path / 'llm.sqlite3'), enabled=False),
+    )
+
+def _guard(**kwargs):
+    params = dict(name='test', max_retries=2, backoff_base=0.001, backoff_cap=0.002, queue_timeout=0.05, hedge='off')
+    params.update(kwargs)
+    return UpstreamGuard(**params)
+
+def test_backoff_delay_is_jittered_within_exponential_cap():
+    rng = random.Random(1)
+    for attempt in range(6):
+        delays = [backoff_delay(attempt, 0.1, 1.0, rng) for _ in range(200)]
+        assert all(0 <= d <= min(1.0, 0.1 * 2 ** attempt) for d in delays)
+        assert len(set(delays)) > 100
+
+def test_limiter_rejects_when_full_and_shrinks_on_latency_and_drops():
+    limiter = AdaptiveLimiter(initial=4, min_limit=1, max_limit=8)
+    assert all(limiter.acquire(0) for _ in range(4))
+    assert not limiter.acquire(0.01)
+    assert limiter.rejected == 1
+    for _ in range(4):
+        limiter.release(0.1)
+    # 延迟稳定且并发打满时上限放大
+    for _ in range(30):
+        for _ in range(int(limiter.limit)):
+            limiter.acquire(0)
+        for _ in range(int(limiter.limit)):
+            limiter.release(0.1)
+    grown = limiter.limit
+    assert grown > 4
+    # 延迟升高 10 倍后上限收缩
+    for _ in range(30):
+        limiter.acquire(0)
+        limiter.release(1.0)
+    assert limiter.limit < grown
+    # 超时等过载信号按比例收缩，且不低于下限
+    for _ in range(100):
+        limiter.acquire(0)
+        limiter.release(dropped=True)
+    assert limiter.limit == 1
+
+def test_retry_budget_limits_retries_to_ratio_of_requests():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.25, min_per_second=0, capacity=2, clock=clock)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+    for _ in range(4):
+        budget.deposit()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    # 低流量时按 min_per_second 匀速补充
+    budget.min_per_second = 1.0
+    clock.now = 1.0
+    assert budget.withdraw()
+
+def test_circuit_breaker_opens_half_opens_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(window=10, min_calls=4, failure_ratio=0.5, cooldown=30, clock=clock)
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    clock.now = 31
+    assert breaker.state == HALF_OPEN
+    # 半开只放行一个探测
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now = 62
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+def test_guard_retries_retryable_errors_only():
+    guard = _guard()
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise UpstreamError('503')
+        return 'ok'
+
+    assert guard.call(flaky) == 'ok'
+    assert len(calls) == 3 and guard.retries == 2
+
+    calls.clear()
+
+    def bad_request():
+        calls.append(1)
+        raise ValueError('400')
+
+    with pytest.raises(ValueError):
+        guard.call(bad_request)
+    assert len(calls) == 1
+    assert guard.limiter.stats()['in_flight'] == 0
+
+def test_non_retryable_errors_never_trip_the_breaker(tmp_path):
+    guard = _guard(breaker=CircuitBreaker(window=4, min_calls=2, failure_ratio=0.5, cooldown=60))
+
+    def truncated():
+        raise OutputTruncated('输出达到 max_tokens 被截断')
+
+    for _ in range(10):
+        with pytest.raises(OutputTruncated):
+            guard.call(truncated)
+    assert guard.breaker.state == CLOSED and guard.breaker.trips == 0
+    assert guard.retries == 0
+
+    # 内容审查等 4xx 同样只说明本次请求被拒，上游本身健康
+    http = FakeHttp(lambda calls: FakeResponse(status_code=400, body='data_inspection_failed'))
+    qwen = _qwen(http, tmp_path, guard)
+    for _ in range(10):
+        assert qwen.proofread('我们去散不吧。')['degraded'] is True
+    assert http.calls == 10
+    assert guard.breaker.state == CLOSED and guard.available()
+
+    # 半开探测遇到不可重试错误时归还探测名额，下一个请求仍可探测
+    def down():
+        raise UpstreamError('503')
+
+    clock = FakeClock()
+    guard = _guard(max_retries=0, breaker=CircuitBreaker(window=4, min_calls=2, failure_ratio=0.5, cooldown=5, clock=clock))
+    for _ in range(2):
+        with pytest.raises(UpstreamError):
+            guard.call(down)
+    assert guard.breaker.state == OPEN
+    clock.now = 10
+    with pytest.raises(OutputTruncated):
+        guard.call(truncated)
+    assert guard.breaker.state == HALF_OPEN
+    assert guard.call(lambda: 'ok') == 'ok'
+    assert guard.breaker.state == CLOSED
+
+def test_malformed_json_and_4xx_are_not_retried(tmp_path):
+    guard = _guard()
+    http = FakeHttp(lambda calls: FakeResponse(body='<html>bad gateway page</html>'))
+    assert _qwen(http, tmp_path, guard).proofread('我们去散不吧。')['degraded'] is True
+    assert http.calls == 1
+    http = FakeHttp(lambda calls: FakeResponse(status_code=400, body='bad request'))
+    assert _qwen(http, tmp_path, guard).proofread('我们去散不吧。')['degraded'] is True
+    assert http.calls == 1 and guard.retries == 0
+
+def test_guard_short_circuits_while_open():
+    guard = _guard(max_retries=0, breaker=CircuitBreaker(window=4, min_calls=4, failure_ratio=0.5, cooldown=60))
+    calls = []
+
+    def down():
+        calls.append(1)
+        raise UpstreamError('timeout')
+
+    for _ in range(4):
+        with pytest.raises(UpstreamError):
+            guard.call(down)
+    assert not guard.available()
+    with pytest.raises(CircuitOpen):
+        guard.call(down)
+    assert len(calls) == 4 and guard.short_circuited == 1
+
+def test_guard_fails_fast_when_concurrency_limit_reached():
+    guard = _guard(limiter=AdaptiveLimiter(initial=1, min_limit=1, max_limit=1))
+    gate = threading.Event()
+    holder = threading.Thread(target=guard.call, args=(lambda: gate.wait(5),))
+    holder.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    with pytest.raises(ConcurrencyLimitExceeded):
+        guard.call(lambda: 'never')
+    assert time.monotonic() - start < 1
+    gate.set()
+    holder.join()
+
+def test_hedged_request_returns_faster_copy():
+    guard = _guard(hedge='20')
+    calls = []
+    lock = threading.Lock()
+
+    def slow_first():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        time.sleep(1.0 if first else 0.01)
+        return 'first' if first else 'hedge'
+
+    start = time.monotonic()
+    assert guard.call(slow_first) == 'hedge'
+    assert time.monotonic() - start < 0.5
+    assert guard.hedges == 1 and guard.hedge_wins == 1
+
+def test_engine_degrades_to_rules_only_while_circuit_open():
+    engine = ProofreadingEngine()
+    engine.qwen_proofreader.api_key = 'test'
+    engine.qwen_proofreader.guard = _guard(breaker=CircuitBreaker(min_calls=1, cooldown=60))
+    engine.qwen_proofreader.guard.breaker.record_failure()
+
+    def unexpected(content):
+        raise AssertionError('LLM should not be called while the circuit is open')
+
+    engine.qwen_proofreader.proofread = unexpected
+    content = "我们去散不吧,胡蝶在飞。"
+    result = engine.proofread(content, {'qwen': True})
+    assert result['degraded'] is True
+    expected = engine.proofread(content, {'qwen': False})
+    assert 'degraded' not in expected
+    assert result['issues'] == expected['issues']
+    events = list(engine.proofread_events(content, {'qwen': True, 'use_cache': False}))
+    assert [event for event, _ in events] == ['rules', 'final']
+    assert events[0][1]['degraded'] and events[-1][1]['degraded']
+
+def test_shed_request_is_degraded_and_not_cached(tmp_path):
+    guard = _guard(limiter=AdaptiveLimiter(initial=1, min_limit=1, max_limit=1), queue_timeout=0.01)
+    http = FakeHttp(_ok)
+    engine = ProofreadingEngine()
+    engine.qwen_proofreader = _qwen(http, tmp_path, guard)
+    content = "我们去散不吧,胡蝶在飞。"
+    # 占满唯一的并发名额：本次大模型调用被拒绝，只有规则结果
+    assert guard.limiter.acquire(0)
+    shed = engine.proofread(content, {})
+    assert shed['degraded'] is True and http.calls == 0
+    assert not any(it.get('source') == 'qwen' for it in shed['issues'])
+    assert engine.result_cache.stats()['entries'] == 0
+    events = list(engine.proofread_events(content, {}))
+    assert events[-1][1]['degraded'] is True
+    assert engine.result_cache.stats()['entries'] == 0
+    guard.limiter.release()
+    # 过载结束后不会命中被降级的结果
+    full = engine.proofread(content, {})
+    assert 'degraded' not in full and http.calls == 1
+    assert any(it.get('source') == 'qwen' for it in full['issues'])
+    assert engine.result_cache.stats()['entries'] == 1
@@ -0,0 +1,48 @@
+"""
+测试 result_cache 模块及引擎结果缓存
+"""
+
+import time
+from .result_cache import ResultCache
+from .proofreading_engine import ProofreadingEngine
+
+def test_lru_eviction_by_bytes():
+    cache = ResultCache(max_bytes=100, ttl=0)
+    cache.put('a', 'A', size=40)
+    cache.put('b', 'B', size=40)
+    assert cache.get('a') == 'A'  # a 变为最近使用
+    cache.put('c', 'C', size=40)
+    assert cache.get('b') is None
+    assert cache.get('a') == 'A'
+    assert cache.get('c') == 'C'
+    assert cache.stats()['evictions'] == 1
+    assert cache.current_bytes == 80
+
+def test_ttl_expiry_and_counters():
+    cache = ResultCache(max_bytes=1000, ttl=0.01)
+    cache.put('k', {'v': 1})
+    assert cache.get('k') == {'v': 1}
+    time.sleep(0.02)
+    assert cache.get('k') is None
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['expirations'] == 1
+    assert stats['entries'] == 0
+
+def test_engine_cache_hit_and_bypass():
+    engine = ProofreadingEngine()
+    content = "今天天气很好,我们去散不吧。"
+    options = {'qwen': False}
+    first = engine.proofread(content, dict(options))
+    second = engine.proofread(content, dict(options))
+    assert second['issues'] is first['issues']
+    assert engine.result_cache.hits == 1
+
+    refreshed = engine.proofread(content, dict(options, use_cache=False))
+    assert refreshed['issues'] is not first['issues']
+    assert refreshed['statistics'] == first['statistics']
+
+    # 选项不同则不命中
+    engine.proofread(content, dict(options, check_punctuation=False))
+    assert engine.result_cache.hits == 1
@@ -0,0 +1,104 @@
+"""
+测试 text_index 模块：与各阶段原有的逐次扫描结果对比
+"""
+
+import re
+import random
+from .text_index import TextIndex
+
+SAMPLES = [
+    '', 'abc', '\n', '。', 'a\nb\n\ncd\n', '第一段。\n第二段！还有？\n\n第三段',
+    '今天天气很好,我们去散不吧.真的!', '末尾无句号', '连续。。句号！？\n',
+]
+
+def _random_text(rng, n):
+    alphabet = '天气很好我们去散步，。！？,.!?;:\n ab1（）'
+    return ''.join(rng.choice(alphabet) for _ in range(n))
+
+def legacy_paragraph_ids(content):
+    paragraph_id_by_pos = {}
+    pid = 0; last = 0
+    for i, ch in enumerate(content):
+        if ch == '\n':
+            for k in range(last, i+1):
+                paragraph_id_by_pos[k] = pid
+            last = i+1; pid += 1
+    for k in range(last, len(content)):
+        paragraph_id_by_pos[k] = pid
+    return paragraph_id_by_pos
+
+def legacy_sentences(text):
+    sentences = re.split(r'([。！？\n])', text)
+    merged = []
+    for i in range(0, len(sentences), 2):
+        s = sentences[i]
+        p = sentences[i+1] if i+1 < len(sentences) else ''
+        merged.append(s + p)
+    return [s for s in merged if s]
+
+def _texts():
+    rng = random.Random(5)
+    return SAMPLES + [_random_text(rng, rng.randint(1, 300)) for _ in range(100)]
+
+def test_paragraph_lookup_matches_per_char_map():
+    for content in _texts():
+        expected = legacy_paragraph_ids(content)
+        index = TextIndex(content)
+        for pos in range(-2, len(content) + 3):
+            assert index.paragraph_of(pos) == expected.get(pos, 0)
+
+def test_sentence_spans_match_regex_split():
+    for text in _texts():
+        index = TextIndex(text)
+        assert [text[s:e] for s, e in index.sentence_spans()] == legacy_sentences(text)
+        assert ''.join(text[s:e] for s, e in index.paragraph_spans()) == text
+
+def test_positions_after_cjk_match_regex():
+    for text in _texts():
+        index = TextIndex(text)
+        for ch in ',.!?;:':
+            expected = [m.end() - 1 for m in re.finditer(r'[一-鿿]' + re.escape(ch), text)]
+            assert index.positions_after_cjk(ch) == expected
+
+def test_sub_index_matches_fresh_index():
+    rng = random.Random(9)
+    for text in _texts():
+        index = TextIndex(text)
+        for _ in range(5):
+            start = rng.randint(0, len(text))
+            end = rng.randint(start, len(text))
+            sub, fresh = index.sub(start, end), TextIndex(text[start:end])
+            assert sub.text == fresh.text
+            assert sub.newlines == fresh.newlines
+            assert sub.sentence_ends == fresh.sentence_ends
+            assert sub.codepoints.tolist() == fresh.codepoints.tolist()
+
+def test_non_bmp_and_surrogates_keep_offsets():
+    text = '表情😀，好。\ud800x'
+    index = TextIndex(text)
+    assert len(index.codepoints) == len(text)
+    assert index.sentence_spans()[0] == (0, 6)
+
+def test_smart_split_matches_char_scan():
+    from .proofreading_engine import ProofreadingEngine
+
+    def legacy_split(text, chunk_size):
+        chunks = []
+        current_pos = 0
+        while current_pos < len(text):
+            chunk_end = min(current_pos + chunk_size, len(text))
+            if chunk_end < len(text):
+                for i in range(chunk_end, max(current_pos + chunk_size // 2, chunk_end - 200), -1):
+                    if text[i-1] in '。！？\n':
+                        chunk_end = i
+                        break
+            chunks.append((text[current_pos:chunk_end], current_pos))
+            current_pos = chunk_end
+        return chunks
+
+    engine = ProofreadingEngine()
+    rng = random.Random(13)
+    for _ in range(30):
+        engine.chunk_size = rng.choice([50, 300, 1000])
+        text = _random_text(rng, rng.randint(0, 5000))
+        assert engine._split_text_smart(text) == legacy_split(text, engine.chunk_size)
@@ -0,0 +1,164 @@
+"""
+测试 token_budget 模块
+"""
+
+import json
+import time
+import threading
+
+from .token_budget import TokenCounter, LLMSplitter, model_limits, DEFAULT_LIMITS
+from .qwen_integration import QwenProofreader
+from .llm_cache import LLMResponseCache
+from .resilience import UpstreamGuard, AdaptiveLimiter, CircuitBreaker, CLOSED
+from .proofreading_engine import ProofreadingEngine
+
+SENTENCE = '今天天气很好,我们去散不吧。公园里的花都盛升了，胡蝶在花丛中飞舞。'
+
+class FakeResponse:
+    status_code = 200
+    text = ''
+
+    def __init__(self, content, finish_reason='stop'):
+        self.payload = {'choices': [{'message': {'content': content}, 'finish_reason': finish_reason}]}
+
+    def json(self):
+        return self.payload
+
+class FakeHttp:
+    """按子请求原文返回 “散不→散步” 的纠错；输入超过 truncate_over 字时模拟输出截断"""
+    pool_size = 4
+    timeout = (1, 5)
+
+    def __init__(self, truncate_over=None):
+        self.truncate_over = truncate_over
+        self.truncated = 0
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def post(self, url, json=None, **kwargs):
+        text = json['messages'][1]['content'].split('\n\n', 1)[1]
+        with self.lock:
+            self.requests.append((len(text), json['max_tokens']))
+        if self.truncate_over and len(text) > self.truncate_over:
+            with self.lock:
+                self.truncated += 1
+            return FakeResponse('{"corrections": [', 'length')
+        corrections = []
+        start = text.find('散不')
+        while start != -1:
+            corrections.append({'original': '散不', 'corrected': '散步', 'type': 'typo', 'reason': '错别字',
+                                'start': start, 'end': start + 2})
+            start = text.find('散不', start + 1)
+        return FakeResponse(_dumps({'corrections': corrections}))
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False)
+
+def _proofreader(http, tmp_path, **splitter):
+    qwen = QwenProofreader(
+        api_key='test', http_client=http, guard=UpstreamGuard(name='test', hedge='off'),
+        response_cache=LLMResponseCache(path=str(tmp_path / 'llm.sqlite3'), enabled=False),
+    )
+    qwen.splitter = LLMSplitter(qwen.model_name, TokenCounter(''), **splitter)
+    return qwen
+
+def test_model_limits_match_by_prefix():
+    assert model_limits('qwen-plus-2025-01-25') == model_limits('qwen-plus')
+    assert model_limits('qwen-max-latest')[0] < model_limits('qwen-plus')[0]
+    assert model_limits('unknown-model') == DEFAULT_LIMITS
+
+def test_estimate_weights_cjk_and_ascii():
+    counter = TokenCounter('')
+    assert not counter.exact
+    assert counter.count('') == 0
+    assert counter.count('中' * 100) == 70
+    assert counter.count('abcd' * 25) == 30
+    prefix = counter.prefix_counts('中文abc')
+    assert len(prefix) == 6 and prefix[2] == 1.4
+
+def test_split_respects_budget_and_sentence_boundaries():
+    splitter = LLMSplitter('qwen-plus', TokenCounter(''), max_input_tokens=200)
+    text = SENTENCE * 40
+    parts = splitter.split(text)
+    assert len(parts) > 1
+    assert ''.join(part for part, _, _ in parts) == text
+    for part, offset, tokens in parts:
+        assert text[offset:offset + len(part)] == part
+        assert tokens <= 200
+        assert part.endswith('。')
+    assert splitter.output_tokens(200) <= splitter.max_output_tokens
+    # 无句末符的长句在逗号处切，仍没有时硬切
+    long_clause = '很长的分句' * 100 + '，' + '没有标点' * 100
+    assert all(tokens <= 200 for _, _, tokens in splitter.split(long_clause))
+    assert ''.join(part for part, _, _ in splitter.split('字' * 1000)) == '字' * 1000
+
+def test_input_budget_is_bounded_by_model_output():
+    splitter = LLMSplitter('unknown-model', TokenCounter(''), max_input_tokens=100000, output_ratio=2.0)
+    assert splitter.max_input_tokens == (DEFAULT_LIMITS[1] - LLMSplitter.OUTPUT_RESERVE) // 2
+
+def test_proofreader_splits_requests_and_maps_offsets(tmp_path):
+    http = FakeHttp()
+    qwen = _proofreader(http, tmp_path, max_input_tokens=200)
+    content = SENTENCE * 40
+    result = qwen.proofread(content)
+    assert len(http.requests) > 1
+    positions = sorted((issue.start, issue.end) for issue in result['issues'])
+    expected = [(i, i + 2) for i in range(len(content)) if content.startswith('散不', i)]
+    assert positions == expected
+
+def test_truncated_output_is_split_again(tmp_path):
+    http = FakeHttp(truncate_over=300)
+    qwen = _proofreader(http, tmp_path, max_input_tokens=1500)
+    content = SENTENCE * 20
+    result = qwen.proofread(content)
+    assert http.requests[0][0] == len(content)
+    # 截断的请求逐级对半再分，最终成功的子请求恰好覆盖全文
+    assert sum(size for size, _ in http.requests if size <= 300) == len(content)
+    assert len(result['issues']) == content.count('散不')
+
+class SlowHttp(FakeHttp):
+    """每个子请求耗时 delay 秒，记录同时在途的峰值"""
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    def post(self, url, json=None, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            return super().post(url, json=json, **kwargs)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+def test_parts_run_concurrently_up_to_limiter_ceiling(tmp_path):
+    http = SlowHttp(0.1)
+    qwen = _proofreader(http, tmp_path, max_input_tokens=50)
+    qwen.guard = UpstreamGuard(name='test', hedge='off', queue_timeout=5,
+                               limiter=AdaptiveLimiter(initial=12, min_limit=12, max_limit=12))
+    content = SENTENCE * 40
+    assert len(qwen.splitter.split(content)) > 12
+    result = qwen.proofread(content)
+    assert 'degraded' not in result
+    # 子请求线程池不再把并发压到并发上限以下
+    assert http.peak == 12
+
+def test_dense_parts_are_halved_without_tripping_the_breaker(tmp_path):
+    # 每个子请求首次调用都被截断（错误密集的文本），对半再分后成功；截断不是上游故障，熔断器保持关闭
+    http = FakeHttp(truncate_over=150)
+    qwen = _proofreader(http, tmp_path, max_input_tokens=200)
+    qwen.guard = UpstreamGuard(name='test', hedge='off', breaker=CircuitBreaker())
+    engine = ProofreadingEngine()
+    engine.qwen_proofreader = qwen
+    content = SENTENCE * 100
+    assert len(content) <= engine.chunk_size
+    result = engine.proofread(content, {'use_cache': False})
+    assert http.truncated > qwen.guard.breaker.min_calls
+    assert sum(size for size, _ in http.requests if size <= 150) == len(content)
+    assert 'degraded' not in result
+    assert [it['original'] for it in result['issues'] if it.get('source') == 'qwen'] == ['散不'] * content.count('散不')
+    assert qwen.guard.breaker.state == CLOSED and qwen.guard.breaker.trips == 0
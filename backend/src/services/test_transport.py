@@ -0,0 +1,116 @@
+"""
+测试 transport 模块
+"""
+
+import io
+import gzip
+import json
+import zlib
+
+import pytest
+from flask import Flask, jsonify, request
+
+from . import transport
+from .transport import init_transport
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    init_transport(app)
+
+    @app.route('/echo', methods=['POST'])
+    def echo():
+        data = request.get_json()
+        return jsonify({'success': True, 'data': data})
+
+    return app.test_client()
+
+def _payload():
+    return {'content': '今天天气很好，我们去散不吧。' * 400, 'options': {'qwen': False}}
+
+def test_gzip_request_body_is_decoded(client):
+    body = gzip.compress(json.dumps(_payload(), ensure_ascii=False).encode('utf-8'))
+    resp = client.post('/echo', data=body, headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+    assert resp.status_code == 200
+    assert resp.get_json()['data'] == _payload()
+
+def test_response_negotiates_gzip(client):
+    resp = client.post('/echo', json=_payload(), headers={'Accept-Encoding': 'gzip, deflate'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in resp.headers['Vary']
+    raw = gzip.decompress(resp.get_data())
+    assert json.loads(raw)['data'] == _payload()
+    # UTF-8 原文输出，不做 \uXXXX 转义
+    assert '散不'.encode('utf-8') in raw
+
+def test_small_or_unaccepted_responses_stay_plain(client):
+    resp = client.post('/echo', json={'content': '短'}, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in resp.headers
+    resp = client.post('/echo', json=_payload(), headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in resp.headers
+    assert resp.get_json()['data'] == _payload()
+
+def test_bad_or_oversized_bodies_are_rejected(client, monkeypatch):
+    resp = client.post('/echo', data=b'not gzip', headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+    assert resp.status_code == 400
+    assert resp.get_json()['error']['code'] == 'INVALID_REQUEST'
+
+    resp = client.post('/echo', data=b'x', headers={'Content-Type': 'application/json', 'Content-Encoding': 'compress'})
+    assert resp.status_code == 415
+    assert resp.get_json()['error']['code'] == 'UNSUPPORTED_ENCODING'
+
+    bomb = zlib.compress(b'0' * (1024 * 1024))
+    with pytest.raises(ValueError):
+        transport.decompress_body(bomb, 'deflate', limit=64 * 1024)
+
+@pytest.mark.skipif(transport._brotli is None, reason='brotli 未安装')
+def test_brotli_roundtrip(client):
+    brotli = transport._brotli
+    body = brotli.compress(json.dumps(_payload()).encode('utf-8'))
+    resp = client.post('/echo', data=body, headers={
+        'Content-Type': 'application/json', 'Content-Encoding': 'br', 'Accept-Encoding': 'gzip, br',
+    })
+    assert resp.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(resp.get_data()))['data'] == _payload()
+
+def test_chunked_gzip_body_is_decoded_as_stream():
+    app = Flask(__name__)
+    init_transport(app)
+
+    @app.route('/size', methods=['POST'])
+    def size():
+        assert isinstance(request.environ['wsgi.input'], transport.DecompressingStream)
+        total = 0
+        while True:
+            block = request.stream.read(4096)
+            if not block:
+                break
+            total += len(block)
+        return jsonify({'success': True, 'data': total})
+
+    raw = '今天天气很好，我们去散不吧。'.encode('utf-8') * 50000
+    resp = app.test_client().post('/size', input_stream=io.BytesIO(gzip.compress(raw)), headers={
+        'Content-Type': 'text/plain', 'Content-Encoding': 'gzip',
+    }, environ_overrides={'wsgi.input_terminated': True, 'CONTENT_LENGTH': ''})
+    assert resp.get_json()['data'] == len(raw)
+
+    stream = transport.DecompressingStream(io.BytesIO(gzip.compress(raw)), 'gzip', limit=64 * 1024)
+    with pytest.raises(ValueError):
+        stream.read()
+
+def test_streamed_response_is_compressed_incrementally():
+    app = Flask(__name__)
+    init_transport(app)
+    parts = ['<p>今天天气很好，我们去散不吧。</p>' * 200 for _ in range(20)]
+
+    @app.route('/report')
+    def report():
+        return transport.streamed_response(iter(parts), 'text/html; charset=utf-8')
+
+    client = app.test_client()
+    resp = client.get('/report', headers={'Accept-Encoding': 'gzip'})
+    assert resp.is_streamed and resp.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(resp.get_data()).decode('utf-8') == ''.join(parts)
+    resp = client.get('/report')
+    assert 'Content-Encoding' not in resp.headers
+    assert resp.get_data(as_text=True) == ''.join(parts)
@@ -0,0 +1,120 @@
+"""
+测试 typo_sidecar 模块
+"""
+
+import os
+import types
+import socket
+import struct
+import tempfile
+import threading
+import pytest
+from .typo_sidecar import SidecarServer, SidecarCorrector, SidecarError
+from . import typo_checker
+from .typo_checker import TypoChecker, LocalCorrector
+
+class FakeCorrector:
+    """与 pycorrector 1.x 的 Corrector 实例接口一致：把“散不”纠正为“散步”，结果为字典"""
+    def correct(self, sentence):
+        errors = []
+        i = sentence.find('散不')
+        if i >= 0:
+            errors.append(('散不', '散步', i))
+        return {'source': sentence, 'target': sentence.replace('散不', '散步'), 'errors': errors}
+
+    def correct_batch(self, sentences):
+        return [self.correct(s) for s in sentences]
+
+class BrokenCorrector(FakeCorrector):
+    def correct_batch(self, sentences):
+        raise RuntimeError('model crashed')
+
+def _fake_pycorrector(corrector_cls):
+    """只有 Corrector 类、没有模块级 correct / correct_batch 的 pycorrector"""
+    return types.SimpleNamespace(Corrector=corrector_cls)
+
+def _start_server():
+    socket_path = os.path.join(tempfile.mkdtemp(), 'typo.sock')
+    server = SidecarServer(socket_path, LocalCorrector(FakeCorrector()))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, socket_path
+
+def test_batch_roundtrip():
+    server, socket_path = _start_server()
+    try:
+        client = SidecarCorrector(socket_path)
+        results = client.correct_batch(['我们去散不吧。', '天气很好。'])
+        assert results == [('我们去散步吧。', [('散不', '散步', 3, 5)]), ('天气很好。', [])]
+        assert client.ping()['ok'] is True
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_typo_checker_uses_sidecar_offsets(monkeypatch):
+    server, socket_path = _start_server()
+    try:
+        monkeypatch.setenv('TYPO_SIDECAR_SOCKET', socket_path)
+        checker = TypoChecker()
+        assert checker.describe()['backend'] == 'sidecar'
+        # 只验证批量结果的偏移还原，误报过滤另有覆盖
+        monkeypatch.setattr(checker, '_is_valid_typo', lambda wrong, right: True)
+        text = '天气很好。我们去散不吧。'
+        issues = checker.check_typos(text)
+        assert [(i.original, i.start) for i in issues] == [('散不', 8)]
+        assert text[8:10] == '散不'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_typo_checker_falls_back_when_sidecar_down(monkeypatch):
+    monkeypatch.setenv('TYPO_SIDECAR_SOCKET', os.path.join(tempfile.mkdtemp(), 'missing.sock'))
+    checker = TypoChecker()
+    issues = checker.check_typos('我们去散不吧。')
+    assert [i.suggestion for i in issues] == ['散步']
+
+def _start_garbage_server(reply):
+    """每次收到请求都回一个畸形帧的假 sidecar"""
+    socket_path = os.path.join(tempfile.mkdtemp(), 'garbage.sock')
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(4)
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            conn.recv(65536)
+            conn.sendall(struct.pack('>I', len(reply)) + reply)
+            conn.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener, socket_path
+
+@pytest.mark.parametrize('reply', [b'{not json', b'\xff\xfe', b'[1, 2]'])
+def test_malformed_reply_is_sidecar_error(monkeypatch, reply):
+    listener, socket_path = _start_garbage_server(reply)
+    try:
+        with pytest.raises(SidecarError):
+            SidecarCorrector(socket_path).correct_batch(['我们去散不吧。'])
+        monkeypatch.setenv('TYPO_SIDECAR_SOCKET', socket_path)
+        assert [i.suggestion for i in TypoChecker().check_typos('我们去散不吧。')] == ['散步']
+    finally:
+        listener.close()
+
+def test_local_corrector_uses_model_instance(monkeypatch):
+    monkeypatch.delenv('TYPO_SIDECAR_SOCKET', raising=False)
+    monkeypatch.setattr(typo_checker, '_load_pycorrector', lambda: _fake_pycorrector(FakeCorrector))
+    checker = TypoChecker()
+    assert checker.backend == 'pycorrector'
+    monkeypatch.setattr(checker, '_is_valid_typo', lambda wrong, right: True)
+    issues = checker.check_typos('天气很好。我们去散不吧。')
+    assert [(i.original, i.start, i.end) for i in issues] == [('散不', 8, 10)]
+
+def test_typo_checker_falls_back_when_model_fails(monkeypatch):
+    monkeypatch.delenv('TYPO_SIDECAR_SOCKET', raising=False)
+    monkeypatch.setattr(typo_checker, '_load_pycorrector', lambda: _fake_pycorrector(BrokenCorrector))
+    checker = TypoChecker()
+    issues = checker.check_typos('我们去散不吧。')
+    assert [i.suggestion for i in issues] == ['散步']
@@ -0,0 +1,140 @@
+"""
+文本结构索引
+每个请求只扫描一次全文，得到句子、段落（行）边界与码点分类掩码，供各检查器与后处理共用，
+避免各阶段各自 re.split / 逐字符扫描。偏移到段落的查询为 O(log n)。
+"""
+
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+# 句末符（与分块、句子级纠错的切分规则一致）
+SENTENCE_TERMINATORS = '。！？\n'
+# 标点分类掩码覆盖的中英文标点
+PUNCTUATION_CHARS = '，。！？；：“”‘’（）【】《》、…—' + ',.!?;:"\'()[]<>'
+
+_TERMINATOR_CODES = np.array([ord(c) for c in SENTENCE_TERMINATORS], dtype=np.uint32)
+_PUNCTUATION_CODES = np.array(sorted({ord(c) for c in PUNCTUATION_CHARS}), dtype=np.uint32)
+
+
+def _codes(chars):
+    return np.array(sorted({ord(c) for c in chars}), dtype=np.uint32)
+
+
+class TextIndex:
+    def __init__(self, text):
+        self.text = text
+        self.length = len(text)
+        # UTF-32 编码后每个码点恰为 4 字节，可零拷贝视为 uint32 数组
+        self.codepoints = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        # 换行位置：段落与行均以换行为界，换行符归属其前面的段落
+        self.newlines = np.flatnonzero(self.codepoints == 10).tolist()
+        # 句子结束位置（不含）：句末符之后的偏移
+        self.sentence_ends = (np.flatnonzero(np.isin(self.codepoints, _TERMINATOR_CODES)) + 1).tolist()
+        self._is_cjk = None
+        self._is_ascii = None
+        self._is_punct = None
+
+    @classmethod
+    def _derived(cls, text, codepoints, newlines, sentence_ends):
+        index = cls.__new__(cls)
+        index.text = text
+        index.length = len(text)
+        index.codepoints = codepoints
+        index.newlines = newlines
+        index.sentence_ends = sentence_ends
+        index._is_cjk = None
+        index._is_ascii = None
+        index._is_punct = None
+        return index
+
+    def sub(self, start, end):
+        """
+        取 [start, end) 片段的索引（偏移相对片段起点），由已有数组切片平移得到，不再扫描文本。
+        用于长文本分块：整篇建一次索引，各块共用。
+        """
+        start = max(0, start)
+        end = min(self.length, end)
+        newlines = self.newlines[bisect_left(self.newlines, start):bisect_left(self.newlines, end)]
+        ends = self.sentence_ends[bisect_right(self.sentence_ends, start):bisect_right(self.sentence_ends, end)]
+        return self._derived(
+            self.text[start:end],
+            self.codepoints[start:end],
+            [k - start for k in newlines],
+            [k - start for k in ends],
+        )
+
+    # === 码点分类掩码（按需计算） ===
+    @property
+    def is_cjk(self):
+        """CJK 统一表意文字（U+4E00–U+9FFF）"""
+        if self._is_cjk is None:
+            cp = self.codepoints
+            self._is_cjk = (cp >= 0x4e00) & (cp <= 0x9fff)
+        return self._is_cjk
+
+    @property
+    def is_ascii(self):
+        if self._is_ascii is None:
+            self._is_ascii = self.codepoints < 128
+        return self._is_ascii
+
+    @property
+    def is_punct(self):
+        if self._is_punct is None:
+            self._is_punct = np.isin(self.codepoints, _PUNCTUATION_CODES)
+        return self._is_punct
+
+    def positions_after_cjk(self, chars):
+        """紧跟在 CJK 字符之后、属于 chars 的字符位置（升序），等价于正则 [\\u4e00-\\u9fff][chars] 的命中"""
+        if self.length < 2:
+            return []
+        hits = np.isin(self.codepoints[1:], _codes(chars)) & self.is_cjk[:-1]
+        return (np.flatnonzero(hits) + 1).tolist()
+
+    def positions_of(self, chars):
+        """chars 中任一字符出现的位置（升序）"""
+        return np.flatnonzero(np.isin(self.codepoints, _codes(chars))).tolist()
+
+    # === 边界 ===
+    def paragraph_of(self, pos):
+        """偏移所在段落编号；越界位置视为第 0 段"""
+        if 0 <= pos < self.length:
+            return bisect_left(self.newlines, pos)
+        return 0
+
+    def paragraph_spans(self):
+        """段落（行）区间 [(start, end)]，换行符计入前一段"""
+        spans = []
+        start = 0
+        for k in self.newlines:
+            spans.append((start, k + 1))
+            start = k + 1
+        if start < self.length:
+            spans.append((start, self.length))
+        return spans
+
+    def line_starts(self):
+        """各行起点偏移"""
+        return [0] + [k + 1 for k in self.newlines if k + 1 < self.length]
+
+    def sentence_spans(self):
+        """句子区间 [(start, end)]，句末符计入句子；末尾无句末符的残句单独成句"""
+        spans = []
+        start = 0
+        for end in self.sentence_ends:
+            spans.append((start, end))
+            start = end
+        if start < self.length:
+            spans.append((start, self.length))
+        return spans
+
+    def last_sentence_end(self, lo, hi):
+        """(lo, hi] 内最后一个句子结束位置，没有时返回 None"""
+        k = bisect_right(self.sentence_ends, hi) - 1
+        if k >= 0 and self.sentence_ends[k] > lo:
+            return self.sentence_ends[k]
+        return None
+
+    def slice(self, start, end):
+        """按偏移截取文本（越界自动收窄）"""
+        return self.text[max(0, start):min(self.length, end)]
@@ -0,0 +1,170 @@
+"""
+大模型调用的 token 预算与切分
+按所配置模型的上下文窗口与最大输出 token 数，估算每段文本的输入 token 与纠错 JSON 的输出 token，
+在句子边界把文本切成若干子请求，使输出不会被 max_tokens 截断；与规则引擎的 chunk_size 相互独立。
+设置 QWEN_TOKENIZER（tokenizer.json 路径或 Hugging Face 模型名，需安装 tokenizers）时按分词器精确计数，
+否则按码点类别估算（中文约 0.7 token/字，英文与数字约 4 字符/token）。
+"""
+
+import os
+import math
+import numpy as np
+
+from .text_index import TextIndex
+
+# 模型名前缀 -> (上下文窗口, 最大输出 token)；带日期或 -latest 后缀的快照按前缀匹配
+MODEL_LIMITS = {
+    'qwen-max': (32768, 8192),
+    'qwen-plus': (131072, 8192),
+    'qwen-turbo': (131072, 8192),
+}
+# 未知模型：保守的上下文窗口，最大输出沿用原先固定的 max_tokens
+DEFAULT_LIMITS = (8192, 2000)
+
+# 估算用的每字符 token 数
+CJK_TOKENS_PER_CHAR = 0.7
+ASCII_WORD_TOKENS_PER_CHAR = 0.3
+SPACE_TOKENS_PER_CHAR = 0.25
+OTHER_TOKENS_PER_CHAR = 1.0
+
+# 子请求内优先的次级切分点（单句超出预算时）
+_CLAUSE_BREAKS = np.array(sorted({ord(c) for c in '，；、：,;:'}), dtype=np.uint32)
+
+
+def _ceil(tokens):
+    # 估算值为浮点累加，先舍去累加误差再向上取整
+    return int(math.ceil(round(float(tokens), 6)))
+
+
+def model_limits(model_name):
+    """(上下文窗口, 最大输出 token)，按最长前缀匹配"""
+    name = (model_name or '').lower()
+    best = None
+    for prefix in MODEL_LIMITS:
+        if name.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return MODEL_LIMITS[best] if best else DEFAULT_LIMITS
+
+
+def _load_tokenizer(name):
+    """按需加载分词器（tokenizers 未安装或加载失败时返回 None，回退到估算）"""
+    try:
+        from tokenizers import Tokenizer  # type: ignore
+        if os.path.isfile(name):
+            return Tokenizer.from_file(name)
+        return Tokenizer.from_pretrained(name)
+    except Exception as e:
+        print(f"[TokenBudget] Tokenizer {name} unavailable, falling back to estimates: {str(e)}")
+        return None
+
+
+class TokenCounter:
+    def __init__(self, tokenizer_name=None):
+        """:param tokenizer_name: tokenizer.json 路径或模型名（默认 QWEN_TOKENIZER，空则只做估算）"""
+        name = tokenizer_name if tokenizer_name is not None else os.getenv('QWEN_TOKENIZER', '').strip()
+        self._tokenizer = _load_tokenizer(name) if name else None
+
+    @property
+    def exact(self):
+        return self._tokenizer is not None
+
+    def prefix_counts(self, text, text_index=None):
+        """长度 len(text)+1 的数组：prefix[p] 为 text[:p] 的 token 数，任意区间的 token 数为两项之差"""
+        if self._tokenizer is not None:
+            offsets = self._tokenizer.encode(text, add_special_tokens=False).offsets
+            starts = np.fromiter((start for start, _ in offsets), dtype=np.int64, count=len(offsets))
+            starts.sort()
+            # 每个 token 记在其起始字符上
+            return np.searchsorted(starts, np.arange(len(text) + 1), side='left').astype(np.float64)
+        if text_index is None:
+            text_index = TextIndex(text)
+        cp = text_index.codepoints
+        cost = np.full(len(cp), OTHER_TOKENS_PER_CHAR)
+        word = ((cp >= 48) & (cp <= 57)) | ((cp >= 65) & (cp <= 90)) | ((cp >= 97) & (cp <= 122))
+        cost[word] = ASCII_WORD_TOKENS_PER_CHAR
+        cost[(cp == 32) | (cp == 9) | (cp == 10) | (cp == 13)] = SPACE_TOKENS_PER_CHAR
+        cost[text_index.is_cjk] = CJK_TOKENS_PER_CHAR
+        prefix = np.empty(len(cp) + 1)
+        prefix[0] = 0.0
+        np.cumsum(cost, out=prefix[1:])
+        return prefix
+
+    def count(self, text):
+        return _ceil(self.prefix_counts(text)[-1])
+
+
+class LLMSplitter:
+    """
+    按 token 预算把文本切成大模型子请求：
+    每段输入不超过 max_input_tokens，且按 output_ratio 估算的输出加余量不超过模型最大输出；
+    在句子边界切分，单句超出预算时在逗号等次级边界切，仍不够再按 token 硬切。
+    """
+    # 输出中 JSON 外壳与估算误差的余量
+    OUTPUT_RESERVE = 256
+
+    def __init__(self, model_name, counter=None, prompt_tokens=0, max_input_tokens=None, output_ratio=None):
+        """
+        :param prompt_tokens: 每个子请求固定的提示词 token 数（计入上下文窗口）
+        :param max_input_tokens: 单个子请求的输入 token 上限（默认 QWEN_PART_MAX_INPUT_TOKENS，1500）
+        :param output_ratio: 纠错 JSON 输出 token 相对输入的估算倍数（默认 QWEN_OUTPUT_RATIO，1.5；错误密集时可调大）
+        """
+        self.counter = counter or TokenCounter()
+        self.context_window, self.max_output_tokens = model_limits(model_name)
+        self.output_ratio = float(output_ratio if output_ratio is not None else os.getenv('QWEN_OUTPUT_RATIO', 1.5))
+        limit = int(max_input_tokens if max_input_tokens is not None else os.getenv('QWEN_PART_MAX_INPUT_TOKENS', 1500))
+        self.max_input_tokens = max(16, int(min(
+            limit,
+            (self.max_output_tokens - self.OUTPUT_RESERVE) / self.output_ratio,
+            self.context_window - prompt_tokens - self.max_output_tokens,
+        )))
+
+    def output_tokens(self, input_tokens):
+        """子请求的 max_tokens：按输入估算输出并加余量，不超过模型最大输出"""
+        return int(min(self.max_output_tokens, math.ceil(input_tokens * self.output_ratio) + self.OUTPUT_RESERVE))
+
+    def split(self, text, max_input_tokens=None):
+        """返回 [(片段, 偏移, 估算输入 token)]，片段按序拼接即为原文"""
+        if not text:
+            return []
+        budget = max_input_tokens or self.max_input_tokens
+        index = TextIndex(text)
+        prefix = self.counter.prefix_counts(text, index)
+        if prefix[-1] <= budget:
+            return [(text, 0, _ceil(prefix[-1]))]
+        ends = index.sentence_ends
+        if not ends or ends[-1] != len(text):
+            ends = ends + [len(text)]
+        parts = []
+        start = 0
+        k = 0
+        while start < len(text):
+            limit = prefix[start] + budget
+            # 预算内最远的句子边界
+            while k < len(ends) and ends[k] <= start:
+                k += 1
+            j = k
+            while j < len(ends) and prefix[ends[j]] <= limit:
+                j += 1
+            if j > k:
+                end = ends[j - 1]
+            else:
+                end = self._cut_sentence(index, prefix, start, limit)
+            parts.append((text[start:end], start, _ceil(prefix[end] - prefix[start])))
+            start = end
+        return parts
+
+    def _cut_sentence(self, index, prefix, start, limit):
+        """单句超出预算：取预算内最后一个次级边界，没有时按 token 硬切（至少前进一个字符）"""
+        hard = int(np.searchsorted(prefix, limit, side='right')) - 1
+        hard = max(start + 1, min(hard, index.length))
+        breaks = np.flatnonzero(np.isin(index.codepoints[start:hard], _CLAUSE_BREAKS))
+        if len(breaks):
+            return start + int(breaks[-1]) + 1
+        return hard
+
+    def halve(self, text):
+        """输出仍被截断时把片段一分为二（句子边界优先），返回 [(片段, 偏移, token)]；无法再分时返回单段"""
+        tokens = self.counter.count(text)
+        if len(text) < 2:
+            return [(text, 0, tokens)]
+        return self.split(text, max(1, int(math.ceil(tokens / 2))))
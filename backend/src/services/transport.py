@@ -0,0 +1,320 @@
+"""
+HTTP 传输层优化
+- FastJSONProvider：优先使用 orjson 编解码 JSON（未安装时回退标准库），输出 UTF-8 原文、不排序键；
+- RequestDecompressionMiddleware：接受 gzip / br / deflate 压缩的请求体（长文档与报告导出会重复上传全文）；
+- compress_response：按 Accept-Encoding 协商压缩响应（br 优先，其次 gzip）；
+- streamed_response：流式响应（如大报告）逐段压缩输出。
+均为可选依赖：orjson、brotli 缺失时自动降级。
+"""
+
+import io
+import os
+import zlib
+import json
+
+from flask import request, current_app
+from flask.json.provider import DefaultJSONProvider
+
+
+def _load_orjson():
+    try:
+        import orjson  # type: ignore
+        return orjson
+    except Exception:
+        return None
+
+
+def _load_brotli():
+    try:
+        import brotli  # type: ignore
+        return brotli
+    except Exception:
+        return None
+
+
+_orjson = _load_orjson()
+_brotli = _load_brotli()
+
+# 小于该字节数的响应不压缩（压缩收益抵不过开销）
+MIN_COMPRESS_BYTES = int(os.getenv('TRANSPORT_MIN_COMPRESS_BYTES', '1024'))
+# 动态内容使用中等压缩级别，兼顾 CPU 与体积
+GZIP_LEVEL = int(os.getenv('TRANSPORT_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('TRANSPORT_BROTLI_QUALITY', '5'))
+# 解压后请求体上限，防止压缩炸弹
+MAX_BODY_BYTES = int(os.getenv('TRANSPORT_MAX_BODY_BYTES', str(32 * 1024 * 1024)))
+# 分块传输（无 Content-Length）的请求体边读边解压，上限单独配置
+MAX_STREAM_BODY_BYTES = int(os.getenv('TRANSPORT_MAX_STREAM_BYTES', str(1024 * 1024 * 1024)))
+_READ_BLOCK = 64 * 1024
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/javascript',
+    'application/javascript',
+    'image/svg+xml',
+}
+
+
+def dumps(obj):
+    """序列化为 JSON 字符串（UTF-8 原文，不转义中文），供 SSE 等非 jsonify 场景使用"""
+    if _orjson is not None:
+        try:
+            return _orjson.dumps(obj).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON 提供者：orjson 可用时直接编码为 bytes，避免 str 中转与 \\uXXXX 转义"""
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if _orjson is not None and not kwargs:
+            try:
+                return _orjson.dumps(obj, default=self.default).decode('utf-8')
+            except TypeError:
+                # orjson 不支持的输入（如超过 64 位的整数）回退标准库
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if _orjson is not None and not kwargs:
+            return _orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if _orjson is not None and not ((self.compact is None and self._app.debug) or self.compact is False):
+            try:
+                body = _orjson.dumps(obj, default=self.default)
+                return self._app.response_class(body, mimetype=self.mimetype)
+            except TypeError:
+                pass
+        return super().response(obj)
+
+    @staticmethod
+    def backend():
+        return 'orjson' if _orjson is not None else 'json'
+
+
+def _json_error(status, code, message):
+    body = json.dumps({'success': False, 'error': {'code': code, 'message': message}}, ensure_ascii=False).encode('utf-8')
+    headers = [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))]
+    return status, headers, body
+
+
+def decompress_body(data, encoding, limit=MAX_BODY_BYTES):
+    """
+    按 Content-Encoding 解压请求体，解压结果超过 limit 时抛出 ValueError
+    :raises LookupError: 不支持的编码（或 brotli 未安装）
+    """
+    if encoding in ('gzip', 'x-gzip', 'deflate'):
+        # wbits=47：自动识别 gzip 头或 zlib 头
+        decoder = zlib.decompressobj(wbits=47)
+        try:
+            out = decoder.decompress(data, limit + 1)
+        except zlib.error as e:
+            raise ValueError(f'请求体解压失败: {str(e)}')
+        if len(out) > limit or decoder.unconsumed_tail:
+            raise ValueError('解压后的请求体过大')
+        return out
+    if encoding == 'br' and _brotli is not None:
+        decoder = _brotli.Decompressor()
+        out = bytearray()
+        view = memoryview(data)
+        try:
+            # 分段喂入，超过上限即停止
+            for offset in range(0, len(view), 64 * 1024):
+                out += decoder.process(bytes(view[offset:offset + 64 * 1024]))
+                if len(out) > limit:
+                    raise ValueError('解压后的请求体过大')
+        except _brotli.error as e:
+            raise ValueError(f'请求体解压失败: {str(e)}')
+        return bytes(out)
+    raise LookupError(encoding)
+
+
+class DecompressingStream:
+    """
+    边读边解压的请求体流（分块上传时使用），内存中只保留一个读块的解压结果。
+    解压失败或超过 limit 时 read 抛出 ValueError。
+    """
+
+    def __init__(self, raw, encoding, limit=MAX_STREAM_BODY_BYTES):
+        self.raw = raw
+        self.limit = limit
+        self.total = 0
+        self._brotli = encoding == 'br'
+        self._decoder = _brotli.Decompressor() if self._brotli else zlib.decompressobj(wbits=47)
+        self._buffer = b''
+        self._eof = False
+
+    def _fill(self):
+        # gzip/deflate 单次解压输出有上限，未消费的输入留到下一次
+        tail = b'' if self._brotli else self._decoder.unconsumed_tail
+        block = tail or self.raw.read(_READ_BLOCK)
+        if not block:
+            self._eof = True
+            out = b'' if self._brotli else self._decoder.flush()
+        else:
+            try:
+                out = self._decoder.process(block) if self._brotli else self._decoder.decompress(block, _READ_BLOCK * 4)
+            except Exception as e:
+                raise ValueError(f'请求体解压失败: {str(e)}')
+        self.total += len(out)
+        if self.total > self.limit:
+            raise ValueError('解压后的请求体过大')
+        self._buffer += out
+
+    def read(self, size=-1):
+        while not self._eof and (size is None or size < 0 or len(self._buffer) < size):
+            self._fill()
+        if size is None or size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readable(self):
+        return True
+
+
+class RequestDecompressionMiddleware:
+    """
+    WSGI 中间件：解压带 Content-Encoding 的请求体，下游看到的是普通请求。
+    带 Content-Length 的请求一次解压；分块传输的请求体替换为 DecompressingStream 边读边解压。
+    """
+
+    def __init__(self, app, limit=MAX_BODY_BYTES):
+        self.app = app
+        self.limit = limit
+
+    def __call__(self, environ, start_response):
+        encoding = environ.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if not encoding or encoding == 'identity':
+            return self.app(environ, start_response)
+
+        if not environ.get('CONTENT_LENGTH') and environ.get('wsgi.input_terminated'):
+            if encoding not in ('gzip', 'x-gzip', 'deflate') and not (encoding == 'br' and _brotli is not None):
+                status, headers, payload = _json_error(
+                    '415 Unsupported Media Type', 'UNSUPPORTED_ENCODING', f'不支持的请求体编码: {encoding}'
+                )
+                start_response(status, headers)
+                return [payload]
+            environ['wsgi.input'] = DecompressingStream(environ['wsgi.input'], encoding)
+            environ.pop('HTTP_CONTENT_ENCODING', None)
+            return self.app(environ, start_response)
+
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if length > self.limit:
+            error = _json_error('413 Request Entity Too Large', 'CONTENT_TOO_LARGE', '请求体过大')
+        else:
+            raw = environ['wsgi.input'].read(length) if length > 0 else environ['wsgi.input'].read()
+            try:
+                body = decompress_body(raw, encoding, self.limit)
+                error = None
+            except LookupError:
+                error = _json_error('415 Unsupported Media Type', 'UNSUPPORTED_ENCODING', f'不支持的请求体编码: {encoding}')
+            except ValueError as e:
+                error = _json_error('400 Bad Request', 'INVALID_REQUEST', str(e))
+
+        if error is not None:
+            status, headers, payload = error
+            start_response(status, headers)
+            return [payload]
+
+        environ['wsgi.input'] = io.BytesIO(body)
+        environ['CONTENT_LENGTH'] = str(len(body))
+        environ.pop('HTTP_CONTENT_ENCODING', None)
+        return self.app(environ, start_response)
+
+
+def choose_encoding(accept_encodings):
+    """按客户端 Accept-Encoding（含 q 值）选择响应编码：br 优先，其次 gzip；都不接受时返回 None"""
+    candidates = []
+    if _brotli is not None:
+        candidates.append('br')
+    candidates.append('gzip')
+    best, best_quality = None, 0
+    for encoding in candidates:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_body(data, encoding):
+    if encoding == 'br':
+        return _brotli.compress(data, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_response(response):
+    """after_request 钩子：对足够大的 JSON / HTML 等文本响应协商压缩（流式与文件直传响应不处理）"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    response.set_data(compress_body(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def compress_stream(chunks, encoding):
+    """逐段压缩 bytes 序列，压缩器内部缓冲，凑够数据才产出"""
+    if encoding == 'br':
+        compressor = _brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            out = compressor.process(chunk)
+            if out:
+                yield out
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def streamed_response(chunks, mimetype):
+    """
+    由文本（或 bytes）片段生成流式响应，按 Accept-Encoding 协商逐段压缩
+    （compress_response 不处理流式响应）。需在请求上下文中调用。
+    """
+    body = (chunk.encode('utf-8') if isinstance(chunk, str) else chunk for chunk in chunks)
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        response = current_app.response_class(body, mimetype=mimetype)
+    else:
+        response = current_app.response_class(compress_stream(body, encoding), mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_transport(app):
+    """在 Flask 应用上启用快速 JSON、请求体解压与响应压缩"""
+    app.json = FastJSONProvider(app)
+    app.wsgi_app = RequestDecompressionMiddleware(app.wsgi_app)
+    app.after_request(compress_response)
+    print(f"[Transport] JSON backend: {FastJSONProvider.backend()}, response encodings: "
+          f"{'br, gzip' if _brotli is not None else 'gzip'}")
+    return app
@@ -1,24 +1,42 @@
 """
 错别字与语法检查模块
-优先使用 pycorrector，如不可用则回退至 Aho-Corasick + 规则
+优先使用 pycorrector，如不可用则回退至混淆集词库匹配 + 规则
 """
 
+import os
 import re
 import time
+import threading
+from .dfa_filter import lexicon_matcher
+from .typo_sidecar import SidecarCorrector, SidecarError
+from .batch_scheduler import MicroBatcher
+from .text_index import TextIndex
+from .issue import Issue, TYPO, GRAMMAR, LOW, INFO, SEVERITY_CODES, LAYOUT_RULE_TYPO, LAYOUT_RULE_GRAMMAR
 
-try:
-    import pycorrector  # type: ignore
-    PYCORRECTOR_AVAILABLE = True
-except Exception as e:
-    pycorrector = None
-    PYCORRECTOR_AVAILABLE = False
+def _load_pycorrector():
+    """按需导入 pycorrector（导入与首次纠错都很重，不在模块导入时进行）"""
+    try:
+        import pycorrector  # type: ignore
+        return pycorrector
+    except Exception:
+        return None
 
-try:
-    import ahocorasick  # type: ignore
-    AHO_AVAILABLE = True
-except Exception:
-    ahocorasick = None
-    AHO_AVAILABLE = False
+def load_pycorrector_model():
+    """
+    构建 pycorrector 纠错模型实例：PYCORRECTOR_MODEL=kenlm（默认，Corrector）或 macbert（MacBertCorrector）。
+    pycorrector 1.x 只在模型实例上提供 correct / correct_batch；未安装或构建失败时返回 None。
+    """
+    module = _load_pycorrector()
+    if module is None:
+        return None
+    name = os.getenv('PYCORRECTOR_MODEL', 'kenlm').strip().lower()
+    try:
+        if name == 'macbert':
+            return module.MacBertCorrector()
+        return module.Corrector()
+    except Exception as e:
+        print(f"[TypoChecker] Failed to build pycorrector {name} model: {str(e)}")
+        return None
 
 # 常见错别字混淆集（可扩展）
 COMMON_MIXUPS = {
@@ -72,24 +90,77 @@ HIGH_VALUE_PAIRS = {
     ('显注', '显著'),
 }
 
+def register_typo_lexicon():
+    """将混淆集注册到共享的多词库匹配器，与敏感词在同一次扫描中命中"""
+    lexicon_matcher.register('typo', (
+        (wrong, None, right)
+        for pairs in COMMON_MIXUPS.values()
+        for wrong, right in pairs
+    ))
+
+# 混淆集注册很轻，导入时即完成，保证词库版本与是否已加载纠错模型无关
+register_typo_lexicon()
+
+def _normalize_correction(result):
+    """
+    统一纠错结果为 (corrected, [(wrong, right, begin, end), ...])。
+    兼容旧版 pycorrector 的二元组与新版的 {'target', 'errors': [(wrong, right, pos)]} 字典。
+    """
+    if isinstance(result, dict):
+        return result.get('target', ''), [
+            (wrong, right, pos, pos + len(wrong)) for wrong, right, pos in result.get('errors', ())
+        ]
+    corrected, details = result
+    return corrected, [tuple(d) for d in details]
+
+
+class LocalCorrector:
+    """进程内 pycorrector 模型实例，与 SidecarCorrector 提供相同的 correct_batch 接口"""
+    def __init__(self, model):
+        self.model = model
+
+    def correct_batch(self, sentences):
+        # 模型实例的批量接口一次处理多句，返回 [{'source', 'target', 'errors': [(wrong, right, pos)]}, ...]
+        return [_normalize_correction(r) for r in self.model.correct_batch(list(sentences))]
+
+
 class TypoChecker:
     def __init__(self):
-        self._init_automaton()
-        if PYCORRECTOR_AVAILABLE:
-            print('[TypoChecker] pycorrector is available and will be used for typo detection')
+        # 设置 TYPO_SIDECAR_SOCKET 时由共享的 sidecar 进程持有模型，本进程不加载 pycorrector
+        sidecar_socket = os.getenv('TYPO_SIDECAR_SOCKET', '').strip()
+        if sidecar_socket:
+            self.corrector = SidecarCorrector(sidecar_socket)
+            self.backend = 'sidecar'
+            print(f'[TypoChecker] Using typo sidecar at {sidecar_socket}')
         else:
-            print('[TypoChecker] pycorrector is NOT available; fallback to automaton + rules')
+            model = load_pycorrector_model()
+            self.corrector = LocalCorrector(model) if model is not None else None
+            self.backend = 'pycorrector' if model is not None else 'rules'
+            if model is not None:
+                print('[TypoChecker] pycorrector is available and will be used for typo detection')
+            else:
+                print('[TypoChecker] pycorrector is NOT available; fallback to automaton + rules')
+        # 并发请求的句子合并成批次送入纠错后端（最大条数 / 最长等待毫秒）
+        self.batcher = None
+        if self.corrector is not None:
+            self.batcher = MicroBatcher(
+                self.corrector.correct_batch,
+                max_batch_size=int(os.getenv('TYPO_BATCH_MAX_SIZE', 32)),
+                max_wait_ms=float(os.getenv('TYPO_BATCH_MAX_WAIT_MS', 5)),
+                name='typo-batcher',
+            )
+        # 单次提交等待纠错结果的上限（秒），超时按混淆集词库回退
+        self.batch_timeout = float(os.getenv('TYPO_BATCH_TIMEOUT', 30))
 
-    def _init_automaton(self):
-        self.automaton = None
-        if AHO_AVAILABLE:
-            automaton = ahocorasick.Automaton()
-            # 将所有混淆词加入自动机
-            for pairs in COMMON_MIXUPS.values():
-                for wrong, right in pairs:
-                    automaton.add_word(wrong, (wrong, right))
-            automaton.make_automaton()
-            self.automaton = automaton
+    def describe(self):
+        """纠错后端信息；sidecar 模式下探测连通性，不可达时抛出 SidecarError"""
+        info = {'backend': self.backend}
+        if self.batcher is not None:
+            info['batching'] = self.batcher.stats()
+        if self.backend == 'sidecar':
+            ping = self.corrector.ping()
+            info.update({'sidecar_pid': ping.get('pid'), 'sidecar_rss_kb': ping.get('rss_kb')})
+        return info
 
     def _is_valid_typo(self, original: str, corrected: str) -> bool:
         """验证错别字是否为有效的纠错，过滤误报"""
@@ -148,103 +219,66 @@ class TypoChecker:
             return 'high_value', 'medium'
         return 'general', 'warning'
 
-    def check_typos(self, text: str):
+    def check_typos(self, text: str, lexicon_hits=None, text_index=None):
+        """
+        :param lexicon_hits: 已有的 lexicon_matcher.scan(text) 结果（仅回退路径使用）；为空时自行扫描
+        :param text_index: 已有的 TextIndex(text)，用于句子切分；为空时自行构建
+        """
         issues = []
-        if PYCORRECTOR_AVAILABLE:
+        corrected_batch = None
+        if self.corrector is not None:
             t0 = time.time()
-            # 句子级处理可显著提升长文本性能
-            sentences = re.split(r'([。！？\n])', text)
-            merged = []
-            # 将标点重新合并回句子
-            for i in range(0, len(sentences), 2):
-                s = sentences[i]
-                p = sentences[i+1] if i+1 < len(sentences) else ''
-                merged.append(s + p)
-            offset = 0
-            for s in merged:
-                corrected, details = pycorrector.correct(s)
+            # 句子级处理可显著提升长文本性能（句末符计入句子）
+            if text_index is None:
+                text_index = TextIndex(text)
+            spans = text_index.sentence_spans()
+            merged = [text[start:end] for start, end in spans]
+            try:
+                # 整篇句子一次提交，与其他请求的句子合并成批（sidecar 模式下每批一次往返）
+                corrected_batch = self.batcher.submit(merged, timeout=self.batch_timeout)
+            except SidecarError as e:
+                print(f"[TypoChecker] Typo sidecar failed, fallback to automaton + rules: {str(e)}")
+            except Exception as e:
+                # 模型推理异常或超时同样回退，不让单个后端故障变成请求失败
+                print(f"[TypoChecker] {self.backend} failed, fallback to automaton + rules: {type(e).__name__}: {str(e)}")
+        if corrected_batch is not None:
+            for (offset, _), (corrected, details) in zip(spans, corrected_batch):
                 for wrong, right, begin, end in details:
                     # 增加验证步骤，过滤误报
                     if not self._is_valid_typo(wrong, right):
                         continue
                     subtype, sev = self._classify_typo(wrong, right)
-                    issues.append({
-                        'type': 'typo',
-                        'message': f'疑似错别字："{wrong}" → "{right}"',
-                        'original': wrong,  # 添加 original 字段兼容前端
-                        'suggestion': right,  # 添加 suggestion 字段兼容前端
-                        'position': {
-                            'start': offset + begin,
-                            'end': offset + end
-                        },
-                        'suggestions': [right],
-                        'severity': sev,
-                        'subtype': subtype
-                    })
-                offset += len(s)
-            print(f"[TypoChecker] pycorrector typos took {time.time() - t0:.2f}s, sentences={len(merged)}, valid_issues={len(issues)}")
+                    issues.append(Issue(
+                        TYPO, offset + begin, offset + end, wrong, right, SEVERITY_CODES[sev], LAYOUT_RULE_TYPO,
+                        message=f'疑似错别字："{wrong}" → "{right}"',
+                        subtype=subtype,
+                    ))
+            print(f"[TypoChecker] {self.backend} typos took {time.time() - t0:.2f}s, sentences={len(merged)}, valid_issues={len(issues)}")
             return issues
         
-        # Fallback: Aho-Corasick + 简单规则
-        if self.automaton:
-            for end_idx, (wrong, right) in self.automaton.iter(text):
-                start_idx = end_idx - len(wrong) + 1
-                subtype, sev = self._classify_typo(wrong, right)
-                issues.append({
-                    'type': 'typo',
-                    'message': f'疑似错别字："{wrong}" → "{right}"',
-                    'original': wrong,
-                    'suggestion': right,
-                    'position': {
-                        'start': start_idx,
-                        'end': end_idx + 1
-                    },
-                    'suggestions': [right],
-                    'severity': sev,
-                    'subtype': subtype
-                })
-        else:
-            # 如果自动机不可用，回退到简单查找
-            for pairs in COMMON_MIXUPS.values():
-                for wrong, right in pairs:
-                    start = 0
-                    while True:
-                        idx = text.find(wrong, start)
-                        if idx == -1:
-                            break
-                        subtype, sev = self._classify_typo(wrong, right)
-                        issues.append({
-                            'type': 'typo',
-                            'message': f'疑似错别字："{wrong}" → "{right}"',
-                            'original': wrong,
-                            'suggestion': right,
-                            'position': {
-                                'start': idx,
-                                'end': idx + len(wrong)
-                            },
-                            'suggestions': [right],
-                            'severity': sev,
-                            'subtype': subtype
-                        })
-                        start = idx + len(wrong)
+        # Fallback: 混淆集词库匹配（按结束位置递增，同一结束位置长词在前）
+        if lexicon_hits is None:
+            lexicon_hits = lexicon_matcher.scan(text)
+        for start_idx, end_idx, payload in lexicon_hits.get('typo', ()):
+            wrong = text[start_idx:end_idx]
+            right = payload.replacement
+            subtype, sev = self._classify_typo(wrong, right)
+            issues.append(Issue(
+                TYPO, start_idx, end_idx, wrong, right, SEVERITY_CODES[sev], LAYOUT_RULE_TYPO,
+                message=f'疑似错别字："{wrong}" → "{right}"',
+                subtype=subtype,
+            ))
         return issues
 
     def check_grammar(self, text: str):
         issues = []
         for pattern, msg in GRAMMAR_PATTERNS:
             for m in pattern.finditer(text):
-                issues.append({
-                    'type': 'grammar',
-                    'message': msg,
-                    'original': text[m.start():m.end()],  # 添加 original 字段
-                    'suggestion': '',  # 语法问题通常不提供具体建议
-                    'position': {
-                        'start': m.start(),
-                        'end': m.end()
-                    },
-                    'suggestions': [],
-                    'severity': 'info'
-                })
+                # 语法问题通常不提供具体建议
+                issues.append(Issue(
+                    GRAMMAR, m.start(), m.end(), text[m.start():m.end()], '', INFO, LAYOUT_RULE_GRAMMAR,
+                    message=msg,
+                ))
         
         # 轻量“的/地/得”启发式：仅在较明显的情况下提示
         for m in _DE_DI_DE_HEURISTIC.finditer(text):
@@ -271,27 +305,30 @@ class TypoChecker:
                 confident = False
             
             if message:
-                issues.append({
-                    'type': 'grammar',
-                    'message': message,
-                    'original': char,
-                    'suggestion': '',
-                    'position': {
-                        'start': start,
-                        'end': end
-                    },
-                    'suggestions': [],
-                    'severity': 'low' if not confident else 'info'
-                })
+                issues.append(Issue(
+                    GRAMMAR, start, end, char, '', LOW if not confident else INFO, LAYOUT_RULE_GRAMMAR,
+                    message=message,
+                ))
         return issues
 
 
-# 模块级单例，避免重复初始化
-_typo_checker_singleton = TypoChecker()
+# 模块级单例（懒创建），避免重复初始化
+_typo_checker_singleton = None
+_typo_checker_lock = threading.Lock()
+
+def get_typo_checker() -> TypoChecker:
+    """获取进程内共享的 TypoChecker；首次调用时导入 pycorrector"""
+    global _typo_checker_singleton
+    if _typo_checker_singleton is None:
+        with _typo_checker_lock:
+            if _typo_checker_singleton is None:
+                _typo_checker_singleton = TypoChecker()
+    return _typo_checker_singleton
 
-def check_typos_and_grammar(text: str):
+def check_typos_and_grammar(text: str, lexicon_hits=None, text_index=None):
+    checker = get_typo_checker()
     issues = []
-    issues.extend(_typo_checker_singleton.check_typos(text))
-    issues.extend(_typo_checker_singleton.check_grammar(text))
+    issues.extend(checker.check_typos(text, lexicon_hits, text_index))
+    issues.extend(checker.check_grammar(text))
     return issues
 
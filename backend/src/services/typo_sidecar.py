@@ -0,0 +1,211 @@
+"""
+错别字纠错模型 sidecar
+由一个常驻进程（或预派生的小进程池）持有 pycorrector 模型，web worker 通过本地 Unix socket
+批量提交句子，worker 本身不再加载模型。
+
+协议：每条消息为 4 字节大端长度 + UTF-8 JSON。
+    请求  {"op": "correct", "sentences": ["...", ...]}
+    响应  {"ok": true, "results": [[corrected, [[wrong, right, begin, end], ...]], ...]}
+    请求  {"op": "ping"}
+    响应  {"ok": true, "pid": 123, "model": true, "rss_kb": 456789, "batching": {...}}
+
+启动（在 backend 目录下）：
+    python -m src.services.typo_sidecar serve [--socket PATH] [--processes N]
+web worker 设置 TYPO_SIDECAR_SOCKET 为同一路径后，TypoChecker 即改用 sidecar。
+"""
+
+import os
+import json
+import time
+import socket
+import struct
+import threading
+import socketserver
+from .batch_scheduler import MicroBatcher
+
+DEFAULT_SOCKET_PATH = '/tmp/proofread-typo.sock'
+# 单条消息上限，防止异常长度把进程内存打满
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+_HEADER = struct.Struct('>I')
+
+
+class SidecarError(Exception):
+    pass
+
+
+def send_message(sock, payload):
+    data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            raise ConnectionError('connection closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def recv_message(sock):
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if size > MAX_MESSAGE_BYTES:
+        raise SidecarError(f'message too large: {size} bytes')
+    return json.loads(_recv_exact(sock, size).decode('utf-8'))
+
+def rss_kb():
+    """当前进程常驻内存（KB，仅 Linux 可用，其他平台返回 None）"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class SidecarCorrector:
+    """web worker 侧客户端：每线程一条长连接，断开后自动重连一次"""
+    def __init__(self, socket_path=None, timeout=None):
+        self.socket_path = socket_path or os.getenv('TYPO_SIDECAR_SOCKET') or DEFAULT_SOCKET_PATH
+        self.timeout = float(timeout or os.getenv('TYPO_SIDECAR_TIMEOUT', 30))
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return sock
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self._local.sock = sock
+        self._local.pid = os.getpid()
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _request(self, payload):
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_message(sock, payload)
+                response = recv_message(sock)
+                if not isinstance(response, dict):
+                    raise ValueError(f'unexpected response type {type(response).__name__}')
+                break
+            except (OSError, ConnectionError, ValueError, SidecarError) as e:
+                # 畸形帧（长度越界、非 UTF-8、非法 JSON）之后连接上的数据已错位，同样断开重连
+                self._close()
+                if attempt:
+                    raise SidecarError(f'sidecar unavailable: {type(e).__name__}: {str(e)}')
+        if not response.get('ok'):
+            raise SidecarError(response.get('error', 'sidecar error'))
+        return response
+
+    def correct_batch(self, sentences):
+        """批量纠错，返回与 sentences 对齐的 [(corrected, [(wrong, right, begin, end), ...]), ...]"""
+        if not sentences:
+            return []
+        results = self._request({'op': 'correct', 'sentences': list(sentences)})['results']
+        return [(corrected, [tuple(d) for d in details]) for corrected, details in results]
+
+    def ping(self):
+        return self._request({'op': 'ping'})
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (ConnectionError, OSError, ValueError, SidecarError):
+                return
+            try:
+                response = self.server.dispatch(message)
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+            send_message(self.request, response)
+
+
+class SidecarServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, corrector, max_batch_size=None, max_wait_ms=None):
+        """
+        :param corrector: 提供 correct_batch(sentences) 的纠错后端
+        各连接提交的句子经微批调度合并后送入模型；模型推理在调度线程中串行执行，并发度由进程数决定
+        """
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.corrector = corrector
+        self.batcher = MicroBatcher(
+            corrector.correct_batch,
+            max_batch_size=max_batch_size or int(os.getenv('TYPO_BATCH_MAX_SIZE', 32)),
+            max_wait_ms=max_wait_ms if max_wait_ms is not None else float(os.getenv('TYPO_BATCH_MAX_WAIT_MS', 5)),
+            name='typo-sidecar-batcher',
+        )
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o660)
+
+    def dispatch(self, message):
+        op = message.get('op')
+        if op == 'correct':
+            results = self.batcher.submit(message.get('sentences') or [])
+            return {'ok': True, 'results': [[c, [list(d) for d in details]] for c, details in results]}
+        if op == 'ping':
+            return {'ok': True, 'pid': os.getpid(), 'model': True, 'rss_kb': rss_kb(), 'batching': self.batcher.stats()}
+        return {'ok': False, 'error': f'unknown op: {op}'}
+
+
+def serve(socket_path=None, processes=1):
+    """加载模型后监听 socket；processes > 1 时在加载后派生子进程共享同一监听套接字与模型页"""
+    from .typo_checker import LocalCorrector, load_pycorrector_model
+
+    socket_path = socket_path or os.getenv('TYPO_SIDECAR_SOCKET') or DEFAULT_SOCKET_PATH
+    t0 = time.time()
+    model = load_pycorrector_model()
+    if model is None:
+        raise SystemExit('[TypoSidecar] pycorrector is not available; install it or unset TYPO_SIDECAR_SOCKET on the workers')
+    # 首次纠错才真正加载语言模型，在派生前完成，使子进程共享同一份内存
+    corrector = LocalCorrector(model)
+    corrector.correct_batch(['预热句子。'])
+    server = SidecarServer(socket_path, corrector)
+    print(f"[TypoSidecar] Model loaded in {time.time() - t0:.2f}s, listening on {socket_path}, rss={rss_kb()}KB")
+
+    children = []
+    for _ in range(max(0, processes - 1)):
+        pid = os.fork()
+        if pid == 0:
+            children = []
+            break
+        children.append(pid)
+    try:
+        server.serve_forever()
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, 15)
+            except OSError:
+                pass
+        if children and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='错别字纠错模型 sidecar')
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('--socket', default=None, help='Unix socket 路径（默认 TYPO_SIDECAR_SOCKET 或 /tmp/proofread-typo.sock）')
+    parser.add_argument('--processes', type=int, default=int(os.getenv('TYPO_SIDECAR_PROCESSES', 1)))
+    args = parser.parse_args()
+    serve(args.socket, args.processes)